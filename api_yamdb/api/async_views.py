@@ -0,0 +1,95 @@
+"""
+Coroutine views for the hot read endpoints under ASGI.
+
+Django 3.2 runs every sync view of an ASGI process in one shared
+thread, so a single slow query stalls all requests of the worker.
+Neither the ORM nor DRF are async yet, so these views keep the viewset
+logic and run it, rendering included, in the default thread pool of the
+event loop (size set by ASGI_THREADS). Requests of one worker then wait
+on the database concurrently. Each pool thread keeps its own database
+connection, which is checked like at the end of a request.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.routers import DefaultRouter
+
+from .metrics import timed
+
+SAFE_ACTIONS = {'list', 'retrieve'}
+
+
+def async_viewset_view(view, safe_actions):
+    """
+    Coroutine view running `safe_actions` of the viewset `view` in the
+    thread pool; other methods go to `view` the way Django runs sync
+    views under ASGI.
+    """
+    safe_view = view.cls.as_view(safe_actions, **view.initkwargs)
+
+    def handle(request, *args, **kwargs):
+        try:
+            response = safe_view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                with timed('render'):
+                    response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    handle_in_thread = sync_to_async(handle, thread_sensitive=False)
+    handle_unsafe = sync_to_async(view, thread_sensitive=True)
+    safe_methods = set(safe_actions)
+    if 'get' in safe_methods:
+        safe_methods.add('head')
+
+    async def async_view(request, *args, **kwargs):
+        if request.method.lower() in safe_methods:
+            return await handle_in_thread(request, *args, **kwargs)
+        return await handle_unsafe(request, *args, **kwargs)
+
+    async_view.cls = view.cls
+    async_view.initkwargs = view.initkwargs
+    async_view.actions = view.actions
+    # csrf_exempt() of Django 3.2 would wrap the coroutine in a sync view.
+    async_view.csrf_exempt = True
+    return async_view
+
+
+class AsyncReadRouter(DefaultRouter):
+    """
+    DefaultRouter serving `list` and `retrieve` of the `async_routes`,
+    pairs of basename and `detail`, with coroutine views when
+    settings.ASYNC_READ_VIEWS is on. Writes and extra actions of the same
+    URLs stay sync. Under WSGI they would only add an event loop per
+    request.
+    """
+
+    def __init__(self, async_routes=(), **kwargs):
+        super().__init__(**kwargs)
+        self.async_routes = set(async_routes)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if not settings.ASYNC_READ_VIEWS:
+            return urls
+        return [self.make_async(url) for url in urls]
+
+    def make_async(self, url):
+        view = url.callback
+        initkwargs = getattr(view, 'initkwargs', {})
+        route = (initkwargs.get('basename'), initkwargs.get('detail'))
+        safe_actions = {
+            method: action
+            for method, action in getattr(view, 'actions', {}).items()
+            if action in SAFE_ACTIONS
+        }
+        if route not in self.async_routes or not safe_actions:
+            return url
+        return URLPattern(
+            url.pattern,
+            async_viewset_view(view, safe_actions),
+            url.default_args,
+            url.name,
+        )
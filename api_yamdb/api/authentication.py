@@ -0,0 +1,200 @@
+"""
+Stateless JWT authentication.
+
+Access tokens issued by `get_jwt_token` carry the claims the permission
+classes need (role, is_staff, is_superuser), so requests authenticate into
+a `RoleTokenUser` without loading the `User` row. Decoded tokens are kept
+in a bounded LRU keyed by signature, which skips signature verification
+for repeated tokens.
+
+Every token also carries the user's `token_version`. Changing a token
+claim, deactivating or deleting a user bumps the version (see
+`User.save` and api.signals), and tokens with an older version are
+rejected. Current versions live in the `token_versions` cache, shared by
+the workers, with a database fallback, so revocation reaches all
+processes at once. Entries expire after JWT_TOKEN_VERSION_TIMEOUT: a
+request that read the old version just before a revocation may still
+cache it, but only for that long.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 TokenError)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from reviews.models import User
+
+VERSION_CLAIM = 'ver'
+VERSIONS_CACHE_ALIAS = 'token_versions'
+TOKEN_VERSION_KEY = 'token-version:{}'
+REVOKED = -1
+
+
+class RoleAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Request user built from token claims, the row is loaded on demand."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_user(self):
+        return self.role == User.USER
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+    @cached_property
+    def db_user(self):
+        return User.objects.get(pk=self.id)
+
+
+def get_user(user):
+    """The `User` row behind a request user, for writes and profile views."""
+    if isinstance(user, RoleTokenUser):
+        return user.db_user
+    return user
+
+
+class TokenLRU:
+    """Validated tokens by signature, least recently used evicted first."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        signature = raw_token.rsplit(b'.', 1)[-1]
+        with self.lock:
+            token = self.tokens.get(signature)
+            if token is None:
+                return None
+            self.tokens.move_to_end(signature)
+        # The signature alone is not a credential: only the exact token
+        # it was computed for may reuse the cached payload.
+        if token.token != raw_token:
+            return None
+        return token
+
+    def put(self, raw_token, token):
+        signature = raw_token.rsplit(b'.', 1)[-1]
+        with self.lock:
+            self.tokens[signature] = token
+            self.tokens.move_to_end(signature)
+            while len(self.tokens) > self.maxsize:
+                self.tokens.popitem(last=False)
+
+    def discard(self, raw_token):
+        with self.lock:
+            self.tokens.pop(raw_token.rsplit(b'.', 1)[-1], None)
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+    def __len__(self):
+        return len(self.tokens)
+
+
+token_cache = TokenLRU(getattr(settings, 'JWT_TOKEN_CACHE_SIZE', 1024))
+
+
+def get_versions_cache():
+    return caches[VERSIONS_CACHE_ALIAS]
+
+
+def get_token_version(user_id):
+    cache = get_versions_cache()
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Always from the primary: a lagging replica could bring back
+        # a revoked version.
+        version = User.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            version = REVOKED
+        # add(): a version cached meanwhile is at least as fresh.
+        cache.add(key, version, timeout=getattr(
+            settings, 'JWT_TOKEN_VERSION_TIMEOUT', 60
+        ))
+    return version
+
+
+def forget_token_version(user_id):
+    get_versions_cache().delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def revoke_tokens(queryset):
+    """Invalidates every token issued so far to the given users."""
+    user_ids = list(queryset.values_list('pk', flat=True))
+    User.objects.filter(pk__in=user_ids).update(
+        token_version=F('token_version') + 1
+    )
+    keys = [TOKEN_VERSION_KEY.format(user_id) for user_id in user_ids]
+    # Dropped now and once more after commit, like for a saved user.
+    get_versions_cache().delete_many(keys)
+    transaction.on_commit(
+        lambda: get_versions_cache().delete_many(keys), using=queryset.db
+    )
+    return len(user_ids)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates tokens with role claims without a database query.
+    Tokens issued before role claims were added fall back to the
+    regular user lookup.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = token_cache.get(raw_token)
+        if token is not None:
+            # Cached tokens were valid when decoded, not necessarily now.
+            try:
+                token.check_exp(current_time=aware_utcnow())
+                return token
+            except TokenError:
+                token_cache.discard(raw_token)
+        token = super().get_validated_token(raw_token)
+        token_cache.put(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = api_settings.TOKEN_USER_CLASS(validated_token)
+        if get_token_version(user.id) != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                _('Token has been revoked'), code='token_revoked'
+            )
+        return user
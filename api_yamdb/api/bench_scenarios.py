@@ -0,0 +1,315 @@
+"""
+Request mixes of the `bench_api` command.
+
+A scenario is a generator of `Request`s for one load thread; responses
+are sent back into it, so it can follow up on objects it created. The
+scenarios work on the catalog already in the database (for example from
+`generate_dataset`) plus users and objects of their own, all named with
+the `bench-` prefix and removed by `BenchData.cleanup()`.
+"""
+import itertools
+import json
+import math
+import random
+import threading
+
+from rest_framework.settings import api_settings
+from reviews.models import Category, Genre, OutgoingEmail, Review, Title, User
+
+from .authentication import RoleAccessToken
+from .benchmarking import Request
+
+PREFIX = 'bench-'
+CONFIRMATION_CODE = 'bench-code'
+TEXT = 'Нагрузочный тест: отзыв о произведении, ничего особенного.'
+
+
+class BenchData:
+    """Users with tokens and the catalog ids the scenarios request."""
+
+    def __init__(self, users=20, titles=500):
+        self.user_count = users
+        self.title_count = titles
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def next_number(self):
+        with self.lock:
+            return next(self.counter)
+
+    def setup(self):
+        self.cleanup()
+        self.titles = list(
+            Title.objects.order_by('-reviews_count', 'id')
+            .values_list('id', flat=True)[:self.title_count]
+        )
+        if not self.titles:
+            raise ValueError(
+                'No titles in the database, fill it with generate_dataset'
+            )
+        reviews = dict(
+            Review.objects.filter(title_id__in=self.titles)
+            .order_by('-id').values_list('title_id', 'id')
+        )
+        self.reviews = [
+            (title, reviews[title]) for title in self.titles
+            if title in reviews
+        ]
+        if not self.reviews:
+            raise ValueError('No reviews of the titles in the database')
+        self.categories = list(
+            Category.objects.values_list('slug', flat=True)[:20]
+        )
+        self.genres = list(Genre.objects.values_list('slug', flat=True)[:20])
+        # The first pages of the catalog, most visitors stop there.
+        self.pages = min(10, math.ceil(
+            Title.objects.count() / api_settings.PAGE_SIZE
+        ))
+        self.years = sorted(set(
+            Title.objects.filter(id__in=self.titles)
+            .values_list('year', flat=True)
+        ))
+
+        admin = User.objects.create_user(
+            username=f'{PREFIX}admin', email=f'{PREFIX}admin@example.com',
+            role=User.ADMIN, confirmation_code=CONFIRMATION_CODE,
+        )
+        self.admin_token = str(RoleAccessToken.for_user(admin))
+        self.users = []
+        for number in range(self.user_count):
+            user = User.objects.create_user(
+                username=f'{PREFIX}user-{number}',
+                email=f'{PREFIX}user-{number}@example.com',
+                confirmation_code=CONFIRMATION_CODE,
+            )
+            self.users.append(
+                (user.username, str(RoleAccessToken.for_user(user)))
+            )
+
+    def cleanup(self):
+        """Removes everything the scenarios created."""
+        User.objects.filter(username__startswith=PREFIX).delete()
+        Title.objects.filter(name__startswith=PREFIX).delete()
+        Category.objects.filter(slug__startswith=PREFIX).delete()
+        Genre.objects.filter(slug__startswith=PREFIX).delete()
+        OutgoingEmail.objects.filter(to_email__startswith=PREFIX).delete()
+
+    def popular_title(self, rng):
+        # Skewed towards the head of the list, the most reviewed titles.
+        return self.titles[int(len(self.titles) * rng.random() ** 3)]
+
+    def popular_review(self, rng):
+        return self.reviews[int(len(self.reviews) * rng.random() ** 3)]
+
+    def review_pair(self):
+        """A user and a title the user has not reviewed yet."""
+        number = self.next_number()
+        username, token = self.users[number % len(self.users)]
+        title = self.titles[number // len(self.users) % len(self.titles)]
+        return token, title
+
+
+def api(method, route, path, token=None, data=None, variant=None):
+    """A request to /api/v1/, labelled by method and route name."""
+    headers = {}
+    body = None
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    if data is not None:
+        body = json.dumps(data).encode()
+        headers['Content-Type'] = 'application/json'
+    label = f'{method} {route}'
+    if variant:
+        label = f'{label} ({variant})'
+    return Request(method, f'/api/v1/{path}', body, headers, label)
+
+
+def created_id(response, key='id'):
+    status, body = response
+    return json.loads(body)[key] if status == 201 else None
+
+
+def anonymous_browsing(data, worker, rng):
+    """Catalog pages, filters, titles and their reviews, no token."""
+    while True:
+        roll = rng.random()
+        title = data.popular_title(rng)
+        if roll < 0.35:
+            yield api('GET', 'titles-list',
+                      f'titles/?page={rng.randint(1, data.pages)}')
+        elif roll < 0.5:
+            query = rng.choice((
+                f'genre={rng.choice(data.genres)}',
+                f'category={rng.choice(data.categories)}',
+                f'year={rng.choice(data.years)}',
+            ))
+            yield api('GET', 'titles-list', f'titles/?{query}',
+                      variant='filtered')
+        elif roll < 0.55:
+            yield api('GET', 'titles-facets', 'titles/facets/?' + rng.choice((
+                '', f'category={rng.choice(data.categories)}',
+                f'genre={rng.choice(data.genres)}',
+            )))
+        elif roll < 0.6:
+            yield api('GET', 'leaderboards-list', 'leaderboards/{}/?{}'.format(
+                rng.choice(('top', 'trending')), rng.choice((
+                    '', f'category={rng.choice(data.categories)}',
+                    f'genre={rng.choice(data.genres)}',
+                ))
+            ))
+        elif roll < 0.7:
+            yield api('GET', 'titles-detail', f'titles/{title}/')
+        elif roll < 0.9:
+            yield api('GET', 'reviews-list', f'titles/{title}/reviews/')
+        elif roll < 0.95:
+            yield api('GET', 'categories-list', 'categories/')
+        else:
+            yield api('GET', 'genres-list', 'genres/')
+
+
+def review_posting(data, worker, rng):
+    """Users reading a title and its reviews, then reviewing it."""
+    while True:
+        token, title = data.review_pair()
+        yield api('GET', 'titles-detail', f'titles/{title}/', token)
+        yield api('GET', 'reviews-list', f'titles/{title}/reviews/', token)
+        review = created_id((yield api(
+            'POST', 'reviews-list', f'titles/{title}/reviews/', token,
+            {'text': TEXT, 'score': rng.randint(1, 10)}
+        )))
+        if review is not None and rng.random() < 0.3:
+            yield api(
+                'PATCH', 'reviews-detail',
+                f'titles/{title}/reviews/{review}/', token,
+                {'score': rng.randint(1, 10)}
+            )
+
+
+def comment_threads(data, worker, rng):
+    """Users reading the comments of popular reviews and replying."""
+    while True:
+        title, review = data.popular_review(rng)
+        username, token = rng.choice(data.users)
+        path = f'titles/{title}/reviews/{review}/comments/'
+        yield api('GET', 'comments-list', path, token)
+        comment = created_id((yield api(
+            'POST', 'comments-list', path, token, {'text': TEXT}
+        )))
+        if comment is None:
+            continue
+        yield api('GET', 'comments-detail', f'{path}{comment}/', token)
+        if rng.random() < 0.2:
+            yield api('PATCH', 'comments-detail', f'{path}{comment}/', token,
+                      {'text': f'{TEXT} Дополнено.'})
+
+
+def all_routes(data, worker, rng):
+    """Every route of the API in turn, creating what it deletes."""
+    admin = data.admin_token
+    username, token = data.users[worker % len(data.users)]
+    while True:
+        number = data.next_number()
+        name = f'{PREFIX}{worker}-{number}'
+        title = data.popular_title(rng)
+
+        yield api('GET', 'api-root', '', token)
+        yield api('GET', 'users-list', 'users/', admin)
+        yield api('GET', 'users-detail', f'users/{username}/', admin)
+        yield api('GET', 'users-users-own-profile', 'users/me/', token)
+        yield api('PATCH', 'users-users-own-profile', 'users/me/', token,
+                  {'bio': f'Обновлено {number}'})
+        yield api('POST', 'users-list', 'users/', admin,
+                  {'username': name, 'email': f'{name}@example.com'})
+        yield api('PATCH', 'users-detail', f'users/{name}/', admin,
+                  {'bio': 'Создан тестом'})
+        yield api('DELETE', 'users-detail', f'users/{name}/', admin)
+
+        for route in ('categories', 'genres'):
+            yield api('GET', f'{route}-list', f'{route}/')
+            yield api('POST', f'{route}-list', f'{route}/', admin,
+                      {'name': name, 'slug': name})
+            yield api('DELETE', f'{route}-detail', f'{route}/{name}/', admin)
+
+        yield api('GET', 'titles-list', 'titles/')
+        yield api('GET', 'titles-facets', 'titles/facets/')
+        yield api('GET', 'leaderboards-list', 'leaderboards/top/')
+        yield api('GET', 'titles-detail', f'titles/{title}/')
+        own_title = created_id((yield api(
+            'POST', 'titles-list', 'titles/', admin, {
+                'name': name, 'year': 2000, 'description': TEXT,
+                'category': rng.choice(data.categories),
+                'genre': [rng.choice(data.genres)],
+            }
+        )))
+        if own_title is not None:
+            yield from review_thread(own_title, name, admin, token, rng)
+
+        yield api('GET', 'reviews-list', f'titles/{title}/reviews/')
+        yield Request(
+            'POST', '/api/v1/auth/signup/',
+            json.dumps({
+                'username': name, 'email': f'{name}@example.com'
+            }).encode(),
+            {'Content-Type': 'application/json'}, 'POST register'
+        )
+        yield Request(
+            'POST', '/api/v1/auth/token/',
+            json.dumps({
+                'username': username, 'confirmation_code': CONFIRMATION_CODE
+            }).encode(),
+            {'Content-Type': 'application/json'}, 'POST token'
+        )
+
+
+def review_thread(title, name, admin, token, rng):
+    """Reviews and comments routes on a fresh title, then its removal."""
+    yield api('PATCH', 'titles-detail', f'titles/{title}/', admin,
+              {'name': f'{name} (изменено)'})
+    reviews = f'titles/{title}/reviews/'
+    review = created_id((yield api(
+        'POST', 'reviews-list', reviews, token,
+        {'text': TEXT, 'score': rng.randint(1, 10)}
+    )))
+    if review is not None:
+        yield api('GET', 'reviews-detail', f'{reviews}{review}/')
+        yield api('PATCH', 'reviews-detail', f'{reviews}{review}/', token,
+                  {'score': rng.randint(1, 10)})
+        comments = f'{reviews}{review}/comments/'
+        yield api('GET', 'comments-list', comments)
+        comment = created_id((yield api(
+            'POST', 'comments-list', comments, token, {'text': TEXT}
+        )))
+        if comment is not None:
+            yield api('GET', 'comments-detail', f'{comments}{comment}/')
+            yield api('PATCH', 'comments-detail', f'{comments}{comment}/',
+                      token, {'text': f'{TEXT} Дополнено.'})
+            yield api('DELETE', 'comments-detail', f'{comments}{comment}/',
+                      token)
+        yield api('DELETE', 'reviews-detail', f'{reviews}{review}/', token)
+    yield api('DELETE', 'titles-detail', f'titles/{title}/', admin)
+
+
+SCENARIOS = {
+    'anonymous_browsing': anonymous_browsing,
+    'review_posting': review_posting,
+    'comment_threads': comment_threads,
+    'all_routes': all_routes,
+}
+
+
+def scenario_source(name, data, seed=0):
+    """Load source of a scenario, with a seeded generator per thread."""
+    def source(worker):
+        return SCENARIOS[name](
+            data, worker, random.Random(f'{seed}:{name}:{worker}')
+        )
+    return source
+
+
+def route_names():
+    """Names of the routes of router_v1 and auth_v1."""
+    from .urls import auth_v1, router_v1
+
+    return {url.name for url in router_v1.urls} | {
+        url.name for url in auth_v1
+    }
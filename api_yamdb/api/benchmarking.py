@@ -0,0 +1,287 @@
+"""
+Helpers of the benchmark commands: an HTTP load generator with latency
+percentiles and a context manager running a server in a subprocess.
+"""
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Environment of benchmarked servers: no rate limits, and no response
+# cache unless the cache itself is measured.
+THROTTLING_OFF = {
+    f'THROTTLE_{scope}_RATE': '' for scope in ('AUTH', 'WRITES', 'ANON_READS')
+}
+RESPONSE_CACHE_OFF = {
+    'API_CACHE_BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted `values`, `q` in 0..100."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles in milliseconds."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(
+            sum(latencies) / len(latencies) * 1000, 2
+        ) if latencies else 0.0,
+        **{
+            f'p{q}_ms': round(percentile(latencies, q) * 1000, 2)
+            for q in (50, 95, 99)
+        },
+    }
+
+
+class Request(namedtuple('Request', 'method url body headers label')):
+    """A request of a load source; `label` groups latencies."""
+
+    def __new__(cls, method, url, body=None, headers=None, label=None):
+        return super().__new__(
+            cls, method, url, body, headers or {},
+            label or f'{method} {url}'
+        )
+
+
+def round_robin(urls):
+    """Load source requesting GET `urls` in turn, from an offset."""
+    def source(offset):
+        requests = [Request('GET', url, label=url) for url in urls]
+        index = offset
+        while True:
+            yield requests[index % len(requests)]
+            index += 1
+    return source
+
+
+class LoadGenerator:
+    """
+    Sends requests from `concurrency` threads, each with its own
+    keep-alive connection, for `duration` seconds or until every thread
+    made `requests` requests. By default the threads request `urls`
+    round-robin. A `source` instead is called with the thread number and
+    returns a generator of `Request`s; each response is sent back into
+    it as a `(status, body)` pair, so later requests can use it.
+    """
+
+    def __init__(self, base_url, urls=(), concurrency=8, duration=None,
+                 requests=None, headers=None, source=None):
+        self.base = urlsplit(base_url)
+        self.source = source or round_robin(list(urls))
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.headers = headers or {}
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def connect(self):
+        return http.client.HTTPConnection(
+            self.base.hostname, self.base.port, timeout=30
+        )
+
+    def worker(self, offset, deadline):
+        connection = self.connect()
+        latencies, errors = {}, {}
+        source = self.source(offset)
+        request = next(source)
+        count = 0
+        while True:
+            if self.requests is not None and count >= self.requests:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            count += 1
+            started = time.perf_counter()
+            try:
+                connection.request(
+                    request.method, request.url, body=request.body,
+                    headers={**self.headers, **request.headers}
+                )
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                errors[request.label] = errors.get(request.label, 0) + 1
+                connection.close()
+                connection = self.connect()
+                request = source.send((None, b''))
+                continue
+            latencies.setdefault(request.label, []).append(
+                time.perf_counter() - started
+            )
+            if response.status >= 400:
+                errors[request.label] = errors.get(request.label, 0) + 1
+            if response.will_close:
+                connection.close()
+                connection = self.connect()
+            request = source.send((response.status, body))
+        connection.close()
+        source.close()
+        with self.lock:
+            for label, values in latencies.items():
+                self.latencies.setdefault(label, []).extend(values)
+            for label, value in errors.items():
+                self.errors[label] = self.errors.get(label, 0) + value
+
+    def run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else None
+        threads = [
+            threading.Thread(target=self.worker, args=(i, deadline))
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        summary = summarize(
+            [value for values in self.latencies.values() for value in values],
+            elapsed, sum(self.errors.values())
+        )
+        summary['endpoints'] = {
+            label: summarize(
+                self.latencies.get(label, []), elapsed,
+                self.errors.get(label, 0)
+            )
+            for label in sorted({*self.latencies, *self.errors})
+        }
+        return summary
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f'Nothing listens on {host}:{port}')
+
+
+@contextmanager
+def server_process(command, port, host='127.0.0.1', cwd=None, env=None):
+    """Runs a server command, yields its base URL once it accepts."""
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        command, cwd=cwd, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=log,
+    )
+    try:
+        try:
+            wait_for_port(host, port)
+        except TimeoutError:
+            process.kill()
+            process.wait()
+            log.seek(0)
+            raise RuntimeError(
+                f'{" ".join(command)} did not start: '
+                f'{log.read().decode()[-2000:]}'
+            )
+        yield f'http://{host}:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+
+
+def gunicorn_command(app, port, workers, worker_class=None):
+    # gunicorn 20.0 has no __main__ module, run its console script.
+    executable = os.path.join(os.path.dirname(sys.executable), 'gunicorn')
+    command = [
+        executable if os.path.exists(executable) else 'gunicorn', app,
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+    ]
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    return command
+
+
+def write_results(path, results):
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(results, fp, ensure_ascii=False, indent=2)
+
+
+def benchmark_server(command, port, urls, concurrency, duration, warmup=0,
+                     env=None, cwd=None):
+    """Starts a server, loads it with `urls`, returns the summary."""
+    with server_process(command, port, cwd=cwd, env=env) as base_url:
+        return load(base_url, urls, concurrency, duration, warmup)
+
+
+def load(base_url, urls=(), concurrency=8, duration=10, warmup=0,
+         source=None):
+    """Runs the load after an unmeasured warmup, returns the summary."""
+    if warmup:
+        LoadGenerator(
+            base_url, urls, concurrency, duration=warmup, source=source
+        ).run()
+    return LoadGenerator(
+        base_url, urls, concurrency, duration=duration, source=source
+    ).run()
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def compare(baseline, results, threshold, metric='p95_ms', min_requests=20):
+    """
+    Regressions of `results` against `baseline`, both by scenario:
+    `metric` of a scenario or of its endpoints grown by more than
+    `threshold` percent, or throughput dropped by more than that.
+    Endpoints with fewer than `min_requests` requests are too noisy and
+    skipped. Returns (name, metric, before, after) tuples.
+    """
+    regressions = []
+    limit = 1 + threshold / 100
+    for scenario, after in results.items():
+        before = baseline.get(scenario)
+        if before is None:
+            continue
+        if after['rps'] * limit < before['rps']:
+            regressions.append((scenario, 'rps', before['rps'], after['rps']))
+        pairs = [(scenario, before, after)] + [
+            (f'{scenario}: {label}', before['endpoints'][label], summary)
+            for label, summary in after.get('endpoints', {}).items()
+            if label in before.get('endpoints', {})
+            and min(
+                summary['requests'], before['endpoints'][label]['requests']
+            ) >= min_requests
+        ]
+        for name, old, new in pairs:
+            if new[metric] > old[metric] * limit:
+                regressions.append((name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def format_summary(name, summary):
+    return (
+        '{name}: {rps} req/s, p50 {p50_ms} ms, p99 {p99_ms} ms, '
+        '{errors} errors'.format(name=name, **summary)
+    )
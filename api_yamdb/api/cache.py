@@ -0,0 +1,160 @@
+"""
+Full-response cache for anonymous reads.
+
+Cache keys embed a version counter of every model a response depends on.
+Writes bump the counters (see api.signals), so stale entries are never
+read again and simply age out by TTL or by the backend's MAX_ENTRIES cull.
+An entry keeps the compressed bodies of the response as well, filled in
+per encoding on first use.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import permissions
+
+from .compression import compress_response
+from .metrics import timed
+from .replica import read_from_primary
+
+CACHE_ALIAS = 'api'
+VERSION_KEY = 'version:{}'
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag', 'Last-Modified')
+
+
+class CacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_versions(labels):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from a timestamp rather than zero: a culled counter
+            # must not come back with a value used by older entries.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(label):
+    cache = get_cache()
+    key = VERSION_KEY.format(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def normalize_query_string(query_dict):
+    return urlencode(sorted(query_dict.lists()), doseq=True)
+
+
+class CachedResponseMixin:
+    """
+    Serves safe anonymous requests from the response cache.
+
+    Set `cache_dependencies` to the labels of every model the viewset
+    output is built from.
+    """
+    cache_dependencies = ()
+
+    def get_response_cache_key(self, request):
+        if (request.method not in permissions.SAFE_METHODS
+                or 'HTTP_AUTHORIZATION' in request.META):
+            return None
+        versions = get_versions(self.cache_dependencies)
+        raw_key = '|'.join((
+            request.method,
+            request.path,
+            normalize_query_string(request.GET),
+            request.META.get('HTTP_ACCEPT', ''),
+            *map(str, versions),
+        ))
+        return 'response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+    def throttles_allow(self, request, *args, **kwargs):
+        # Cache hits skip DRF's request checks. Throttles see the client
+        # as DRF authenticates it, not as the session middleware does.
+        # Throttled requests fall through to the view, which repeats the
+        # check and answers 429.
+        request = self.initialize_request(request, *args, **kwargs)
+        return all(
+            throttle.allow_request(request, self)
+            for throttle in self.get_throttles()
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = get_cache()
+        cached = cache.get(key)
+        if cached is not None and self.throttles_allow(
+                request, *args, **kwargs):
+            stats.hit()
+            not_modified = get_conditional_response(
+                request, etag=cached['headers'].get('ETag')
+            )
+            if not_modified is not None:
+                return not_modified
+            response = HttpResponse(cached['content'])
+            for header, value in cached['headers'].items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            encoded = cached.setdefault('encoded', {})
+            known = len(encoded)
+            compress_response(request, response, encoded)
+            if len(encoded) != known:
+                cache.set(key, cached)
+            return response
+
+        stats.miss()
+        # The entry is served to every anonymous client, including those
+        # pinned to the primary after a write.
+        read_from_primary()
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            if hasattr(response, 'render'):
+                with timed('render'):
+                    response.render()
+            cached = {
+                'content': response.content,
+                'headers': {
+                    header: response[header]
+                    for header in CACHED_HEADERS if response.has_header(header)
+                },
+                'encoded': {},
+            }
+            compress_response(request, response, cached['encoded'])
+            cache.set(key, cached)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,57 @@
+"""
+File-based cache with increments that are atomic across processes.
+
+FileBasedCache.incr() reads the value and writes it back, so two workers
+bumping the same version counter at once (see api.cache) can both write
+the same number and lose a bump. Here the read and the write happen under
+an exclusive lock on a file next to the entries, taken by every process
+using the same LOCATION: the workers of a host and containers sharing
+the directory as a volume. Keys are spread over LOCK_SHARDS lock files,
+so increments of different counters (throttling counts one per request)
+rarely wait for each other.
+
+FileBasedCache.incr() also writes the new value with the default timeout,
+so counters stored without expiry, like the versions, would expire and
+be re-seeded. Here an increment keeps the expiry of the entry.
+"""
+import fcntl
+import os
+import pickle
+import time
+import zlib
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+LOCK_SHARDS = 64
+
+
+class AtomicFileBasedCache(FileBasedCache):
+
+    def lock_path(self, key, version=None):
+        name = os.path.basename(self._key_to_file(key, version))
+        shard = int(name[:8], 16) % LOCK_SHARDS
+        return os.path.join(self._dir, f'incr-{shard}.lock')
+
+    def read_entry(self, key, version=None):
+        """Expiry time (None for never) and value of a live entry."""
+        try:
+            with open(self._key_to_file(key, version), 'rb') as fp:
+                expires = pickle.load(fp)
+                if expires is None or expires >= time.time():
+                    return expires, pickle.loads(zlib.decompress(fp.read()))
+        except (FileNotFoundError, EOFError):
+            pass
+        raise ValueError(f"Key '{key}' not found")
+
+    def incr(self, key, delta=1, version=None):
+        self._createdir()
+        with open(self.lock_path(key, version), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                expires, value = self.read_entry(key, version)
+                value += delta
+                timeout = None if expires is None else expires - time.time()
+                self.set(key, value, timeout=timeout, version=version)
+                return value
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,122 @@
+"""
+Response compression.
+
+Bodies of at least COMPRESSION_MIN_SIZE bytes are compressed with brotli
+(when the `brotli` package is installed) or gzip, whichever the client
+prefers among those it accepts. CachedResponseMixin keeps the compressed
+bodies in the cache entry next to the plain one, so a cached page is
+compressed once per encoding, not on every hit; CompressionMiddleware
+handles the other responses.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def compress_brotli(content):
+    return brotli.compress(
+        content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+    )
+
+
+# Preferred first when the client accepts several with the same q.
+ENCODERS = {'gzip': compress_string}
+if brotli is not None:
+    ENCODERS = {'br': compress_brotli, **ENCODERS}
+
+
+def accepted_encodings(header):
+    """Encodings of an Accept-Encoding header by q value, best first."""
+    accepted = []
+    for position, item in enumerate(header.split(',')):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append((-quality, position, coding.lower()))
+    return [coding for _, _, coding in sorted(accepted)]
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    for coding in accepted:
+        if coding in ENCODERS:
+            return coding
+    if '*' in accepted:
+        return next(iter(ENCODERS))
+    return None
+
+
+def compress_response(request, response, encoded=None):
+    """
+    Compresses the body of `response` in place for `request`. `encoded`
+    maps encodings to bodies compressed earlier and receives new ones.
+    """
+    if (response.streaming or response.has_header('Content-Encoding')
+            or getattr(response, 'compression_checked', False)
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE):
+        return response
+    response.compression_checked = True
+    patch_vary_headers(response, ('Accept-Encoding',))
+    coding = choose_encoding(request)
+    if coding is None:
+        return response
+    content = encoded.get(coding) if encoded is not None else None
+    if content is None:
+        content = ENCODERS[coding](response.content)
+        if encoded is not None:
+            encoded[coding] = content
+    # Only when it is actually shorter, like GZipMiddleware.
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    # A strong ETag must not match the plain and compressed bodies both.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = coding
+    return response
+
+
+class CompressionMiddleware:
+    """
+    Put it after MetricsMiddleware, which should see the compressed size,
+    and before the middleware that builds responses.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes Django await the middleware, like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # Off the event loop: compressing a large body takes a while.
+        return await sync_to_async(
+            compress_response, thread_sensitive=False
+        )(request, response)
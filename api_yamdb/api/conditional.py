@@ -0,0 +1,72 @@
+"""
+Conditional GET for list and retrieve actions.
+
+Validators are derived from cheap per-collection version stamps instead of
+the response body, so a matching `If-None-Match` or `If-Modified-Since`
+turns into a 304 before the queryset is evaluated or serialized.
+"""
+import abc
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_versions, normalize_query_string
+from .replica import read_from_primary
+
+
+class ConditionalGetMixin(abc.ABC):
+    """
+    Implement `get_version_stamp()` returning the parts that change
+    whenever the output changes, and a last modification time or None.
+    """
+
+    @abc.abstractmethod
+    def get_version_stamp(self):
+        """Runs before the view: raise Http404 for missing parents."""
+
+    def get_validators(self, request):
+        parts, last_modified = self.get_version_stamp()
+        raw = '|'.join((
+            request.path,
+            normalize_query_string(request.query_params),
+            request.META.get('HTTP_ACCEPT', ''),
+            *map(str, parts),
+        ))
+        etag = 'W/' + quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+        return etag, last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CacheVersionConditionalMixin(ConditionalGetMixin):
+    """
+    Stamps from the response cache version counters, no database hit.
+    The counters move with the primary, so the body is read from it too:
+    a lagging replica would pair the new ETag with an old body.
+    """
+
+    def get_version_stamp(self):
+        read_from_primary()
+        return get_versions(self.cache_dependencies), None
@@ -0,0 +1,109 @@
+"""
+Facet counts of the title catalog.
+
+For every facet (category, genre, decade) the counts are taken under all
+filters of the request except the facet's own, so picking a category
+still shows how many titles the other categories have. A facet with no
+other filters is read from the precomputed TitleFacetCount table; with
+filters it is counted by a GROUP BY over the filtered titles.
+"""
+from django.db.models import Count
+from rest_framework import serializers
+from reviews.models import Category, Genre, GenreTitle, Title, TitleFacetCount
+
+from .lookup_tables import get_table
+
+# Output facet: counted facet and the filter parameters it ignores.
+FACETS = {
+    'category': (TitleFacetCount.CATEGORY, ('category',)),
+    'genre': (TitleFacetCount.GENRE, ('genre',)),
+    'decade': (TitleFacetCount.YEAR, ('year', 'year_min', 'year_max')),
+}
+
+
+def precomputed(facet):
+    return dict(
+        TitleFacetCount.objects.filter(facet=facet).values_list(
+            'value', 'count'
+        )
+    )
+
+
+def counted(facet, titles):
+    if facet == TitleFacetCount.GENRE:
+        rows = GenreTitle.objects.filter(title__in=titles).values_list(
+            'genre_id'
+        )
+    elif facet == TitleFacetCount.CATEGORY:
+        rows = titles.exclude(category=None).values_list('category_id')
+    else:
+        rows = titles.values_list('year')
+    return dict(rows.order_by().annotate(Count('id')))
+
+
+def lookup_counts(model, counts):
+    return [
+        {'name': obj.name, 'slug': obj.slug, 'count': counts.get(obj.pk, 0)}
+        for obj in get_table(model).snapshot().objects
+    ]
+
+
+def decade_counts(year_counts):
+    decades = {}
+    for year, count in year_counts.items():
+        decades[year // 10 * 10] = decades.get(year // 10 * 10, 0) + count
+    return [
+        {'decade': decade, 'count': count}
+        for decade, count in sorted(decades.items()) if count
+    ]
+
+
+class TitleFacets:
+    """Facet counts for the query parameters of a request."""
+
+    def __init__(self, request, queryset, filterset_class):
+        self.request = request
+        self.queryset = queryset
+        self.filterset_class = filterset_class
+
+    def filtered(self, ignored=()):
+        """
+        Filtered titles as a subquery, or None when no filter is set.
+        """
+        data = self.request.query_params.copy()
+        for param in ignored:
+            data.pop(param, None)
+        if not any(
+            data.get(name) not in (None, '')
+            for name in self.filterset_class.base_filters
+        ):
+            return None
+        filterset = self.filterset_class(
+            data, queryset=self.queryset, request=self.request
+        )
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        # Search annotates and orders, the counts need plain ids.
+        return Title.objects.filter(
+            pk__in=filterset.qs.order_by().values('pk')
+        )
+
+    def counts(self, name):
+        facet, ignored = FACETS[name]
+        titles = self.filtered(ignored)
+        if titles is None:
+            return precomputed(facet)
+        return counted(facet, titles)
+
+    @property
+    def data(self):
+        titles = self.filtered()
+        total = titles.count() if titles is not None else sum(
+            precomputed(TitleFacetCount.YEAR).values()
+        )
+        return {
+            'count': total,
+            'category': lookup_counts(Category, self.counts('category')),
+            'genre': lookup_counts(Genre, self.counts('genre')),
+            'decade': decade_counts(self.counts('decade')),
+        }
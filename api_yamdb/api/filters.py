@@ -1,25 +1,46 @@
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+
+from .lookup_tables import get_table
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
     year = filters.NumberFilter(
         field_name='year',
-        lookup_expr='icontains'
+        lookup_expr='exact'
     )
+    year_min = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
+    )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    def filter_category(self, queryset, name, value):
+        # Slugs resolve in memory, so the filter needs no join.
+        category = get_table(Category).snapshot().by_slug.get(value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.pk)
+
+    def filter_genre(self, queryset, name, value):
+        genre = get_table(Genre).snapshot().by_slug.get(value)
+        if genre is None:
+            return queryset.none()
+        return queryset.filter(genre=genre.pk)
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
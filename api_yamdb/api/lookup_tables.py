@@ -0,0 +1,115 @@
+"""
+Process-local copies of the Category and Genre tables.
+
+The tables are small and change rarely, yet every title write resolves
+their slugs and every catalog filter joins them. A LookupTable keeps all
+rows of its model in memory, tagged with the version counter of the model
+in the API cache (see api.cache), which api.signals bump on every write
+and import. Each use reads the counter, a single cache get, and reloads
+the table from the primary database when another worker moved it.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.encoding import smart_str
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.response import Response
+from reviews.models import Category, Genre
+
+from .cache import get_versions
+
+
+class Snapshot:
+    __slots__ = ('version', 'objects', 'by_slug')
+
+    def __init__(self, version, objects):
+        self.version = version
+        self.objects = objects
+        self.by_slug = {}
+        for obj in objects:
+            # Genre slugs are only unique through the API; the first wins.
+            self.by_slug.setdefault(obj.slug, obj)
+
+
+class LookupTable:
+
+    def __init__(self, model):
+        self.model = model
+        self.label = model._meta.label
+        self.lock = threading.Lock()
+        self.current = None
+
+    def snapshot(self):
+        """All rows, ordered like the model, as of the current version."""
+        version = get_versions([self.label])[0]
+        current = self.current
+        if current is not None and current.version == version:
+            return current
+        with self.lock:
+            if self.current is None or self.current.version != version:
+                # Rows read after the version: a write in between bumps
+                # it again on commit, and the next use reloads.
+                self.current = Snapshot(version, tuple(
+                    self.model.objects.using(DEFAULT_DB_ALIAS).all()
+                ))
+            return self.current
+
+    def clear(self):
+        with self.lock:
+            self.current = None
+
+
+TABLES = {model: LookupTable(model) for model in (Category, Genre)}
+
+
+def get_table(model):
+    return TABLES[model]
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField resolving slugs in the lookup table of `model`
+    instead of a query per value.
+    """
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        kwargs.setdefault('queryset', model.objects.all())
+        super().__init__(slug_field='slug', **kwargs)
+
+    @cached_property
+    def snapshot(self):
+        # Fields live as long as their serializer, one request.
+        return get_table(self.model).snapshot()
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail('invalid')
+        obj = self.snapshot.by_slug.get(str(data))
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        return obj
+
+
+class LookupTableListMixin:
+    """
+    Lists the model from its lookup table; searches still go to the
+    database.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if any(
+            getattr(backend, 'search_param', None) in request.query_params
+            for backend in self.filter_backends
+        ):
+            return super().list(request, *args, **kwargs)
+        objects = get_table(self.queryset.model).snapshot().objects
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(objects, many=True).data)
@@ -0,0 +1,111 @@
+from typing import Any, Optional
+
+from api.bench_scenarios import SCENARIOS, BenchData, scenario_source
+from api.benchmarking import (RESPONSE_CACHE_OFF, THROTTLING_OFF, compare,
+                              format_summary, gunicorn_command, load,
+                              read_results, server_process, write_results)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = '''
+    End-to-end benchmark of the API: runs the request mixes of
+    api.bench_scenarios against a gunicorn server on the configured
+    database (seed it with generate_dataset first; SQLite works) and
+    reports throughput and p50/p95/p99 latency by scenario and endpoint.
+    With --baseline the results are compared with an earlier --json file
+    and the command fails when they regress by more than --threshold.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                            default=list(SCENARIOS))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds of load per scenario.')
+        parser.add_argument('--warmup', type=float, default=1)
+        parser.add_argument('--port', type=int, default=8785)
+        parser.add_argument('--users', type=int, default=20,
+                            help='Benchmark users sending the writes.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--response-cache', action='store_true',
+                            help='Keep the anonymous response cache on.')
+        parser.add_argument('--json', help='Write the results to a file.')
+        parser.add_argument('--baseline',
+                            help='Results file to compare with.')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='Allowed regression, percent.')
+        parser.add_argument('--metric', default='p95_ms',
+                            choices=('p50_ms', 'p95_ms', 'p99_ms',
+                                     'mean_ms'))
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        baseline = (
+            read_results(options['baseline'])['results']
+            if options['baseline'] else None
+        )
+        data = BenchData(users=options['users'])
+        try:
+            data.setup()
+        except ValueError as error:
+            raise CommandError(error)
+        env = dict(THROTTLING_OFF)
+        if not options['response_cache']:
+            env.update(RESPONSE_CACHE_OFF)
+        command = gunicorn_command(
+            'api_yamdb.wsgi:application', options['port'], options['workers']
+        )
+        results = {}
+        try:
+            with server_process(
+                command, options['port'], cwd=settings.BASE_DIR, env=env
+            ) as base_url:
+                for name in options['scenarios']:
+                    results[name] = load(
+                        base_url,
+                        concurrency=options['concurrency'],
+                        duration=options['duration'],
+                        warmup=options['warmup'],
+                        source=scenario_source(name, data, options['seed']),
+                    )
+                    self.report(name, results[name])
+        finally:
+            data.cleanup()
+
+        if options['json']:
+            write_results(options['json'], {
+                'database': connection.vendor,
+                'workers': options['workers'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'seed': options['seed'],
+                'results': results,
+            })
+        if baseline is not None:
+            regressions = compare(
+                baseline, results, options['threshold'], options['metric']
+            )
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: {metric} {before} -> {after}'
+                ))
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} regressions over '
+                    f'{options["threshold"]}%'
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def report(self, name, summary):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            format_summary(name, summary)
+        ))
+        for label, endpoint in summary['endpoints'].items():
+            self.stdout.write(
+                '  {label:<42} {requests:>6} req  p50 {p50_ms:>7} ms  '
+                'p95 {p95_ms:>7} ms  p99 {p99_ms:>7} ms  '
+                '{errors} errors'.format(label=label, **endpoint)
+            )
@@ -0,0 +1,52 @@
+from typing import Any, Optional
+
+from api.benchmarking import (RESPONSE_CACHE_OFF, THROTTLING_OFF,
+                              benchmark_server, format_summary,
+                              gunicorn_command, write_results)
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+MODES = {
+    'direct': {'DB_POOL': ''},
+    'pooled': {'DB_POOL': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = '''
+    Load test of the connection pool: the same WSGI deployment with a new
+    database connection per request and with DB_POOL=1, on cheap
+    endpoints where the connection handshake dominates.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--warmup', type=float, default=1)
+        parser.add_argument('--port', type=int, default=8775)
+        parser.add_argument('--urls', nargs='+',
+                            default=['/api/v1/categories/'])
+        parser.add_argument('--json', help='Write the results to a file.')
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        results = {}
+        for offset, (name, env) in enumerate(MODES.items()):
+            port = options['port'] + offset
+            results[name] = benchmark_server(
+                gunicorn_command(
+                    'api_yamdb.wsgi:application', port, options['workers']
+                ),
+                port, options['urls'], options['concurrency'],
+                options['duration'], options['warmup'],
+                env={**THROTTLING_OFF, **RESPONSE_CACHE_OFF, **env},
+                cwd=settings.BASE_DIR,
+            )
+            self.stdout.write(format_summary(name, results[name]))
+        if options['json']:
+            write_results(options['json'], {
+                'workers': options['workers'],
+                'concurrency': options['concurrency'],
+                'urls': options['urls'],
+                'results': results,
+            })
@@ -0,0 +1,67 @@
+import statistics
+import time
+from contextlib import ExitStack
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, Title, User
+
+READ_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+
+class Command(BaseCommand):
+    help = '''
+    Number of queries and median time of every catalog read endpoint on
+    the current database, for the title with most reviews and its review
+    with most comments. The client is authenticated, so the response
+    cache is out of the way.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        title = Title.objects.order_by('-reviews_count', 'id').first()
+        review = Review.objects.filter(title=title).annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count', 'id').first()
+        if review is None:
+            raise CommandError(
+                'No reviews in the database, fill it with generate_dataset'
+            )
+        client = APIClient()
+        client.force_authenticate(User(username='bench'))
+        client.credentials(HTTP_AUTHORIZATION='Bearer bench')
+        for url in READ_URLS:
+            url = url.format(title=title.id, review=review.id)
+            with ExitStack() as stack:
+                # Reads may go to a replica, count the queries of all.
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(connection))
+                    for connection in connections.all()
+                ]
+                response = client.get(url)
+            queries = sum(len(capture) for capture in captured)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: {response.status_code}')
+            times = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                client.get(url)
+                times.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'{url:<48} {queries:3} queries '
+                f'{statistics.median(times) * 1000:8.2f} ms'
+            )
@@ -0,0 +1,82 @@
+import statistics
+import time
+from typing import Any, Optional
+
+from api.fast_serializers import (FastCommentSerializer, FastReviewSerializer,
+                                  FastTitleSerializer)
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from api.views import TitleViewSet
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+
+
+def render_model_page(serializer_class, queryset, size):
+    return JSONRenderer().render(
+        serializer_class(list(queryset[:size]), many=True).data
+    )
+
+
+def render_fast_page(serializer_class, queryset, size):
+    return JSONRenderer().render(serializer_class(
+        list(serializer_class.get_queryset(queryset)[:size])
+    ).data)
+
+
+class Command(BaseCommand):
+    help = '''
+    Microbenchmark of the list serializers: fetches, serializes and
+    renders a page of titles, reviews and comments from the current
+    database with the model serializers and with the fast ones, and
+    checks that both give the same bytes.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        title = Title.objects.order_by('-reviews_count').first()
+        review = Review.objects.annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count').first()
+        if title is None or review is None:
+            raise CommandError(
+                'No reviews in the database, fill it with generate_dataset'
+            )
+        cases = (
+            ('titles', TitleViewSet.queryset.all(),
+             TitleSerializer, FastTitleSerializer),
+            ('reviews', title.reviews.select_related('author'),
+             ReviewSerializer, FastReviewSerializer),
+            ('comments', review.comments.select_related('author'),
+             CommentSerializer, FastCommentSerializer),
+        )
+        size = options['page_size']
+        for name, queryset, model_class, fast_class in cases:
+            model = render_model_page(model_class, queryset, size)
+            if render_fast_page(fast_class, queryset, size) != model:
+                raise CommandError(f'{name}: the outputs differ')
+            model_ms = self.measure(
+                render_model_page, model_class, queryset, size,
+                options['repeat'],
+            )
+            fast_ms = self.measure(
+                render_fast_page, fast_class, queryset, size,
+                options['repeat'],
+            )
+            self.stdout.write(
+                f'{name:<9} model {model_ms:8.3f} ms  fast {fast_ms:8.3f} ms'
+                f'  x{model_ms / fast_ms:.1f}  ({len(model)} bytes)'
+            )
+
+    def measure(self, render, serializer_class, queryset, size, repeat):
+        """Median time of a page in milliseconds."""
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render(serializer_class, queryset, size)
+            times.append(time.perf_counter() - started)
+        return round(statistics.median(times) * 1000, 3)
@@ -0,0 +1,77 @@
+from typing import Any, Optional
+
+from api.benchmarking import (RESPONSE_CACHE_OFF, THROTTLING_OFF,
+                              benchmark_server, format_summary,
+                              gunicorn_command, write_results)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Review
+
+SERVERS = {
+    'wsgi': ('api_yamdb.wsgi:application', None),
+    'asgi': ('api_yamdb.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+
+class Command(BaseCommand):
+    help = '''
+    Compares the WSGI deployment (gunicorn sync workers) with the ASGI one
+    (gunicorn with uvicorn workers and async read views) at equal worker
+    counts: throughput and latency percentiles of the hot read endpoints.
+    Needs a database shared with the server processes and some data.
+    Throttling is off in the servers, the response cache only stays on
+    with --response-cache.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=SERVERS,
+                            default=list(SERVERS))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds of load per server.')
+        parser.add_argument('--warmup', type=float, default=1)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--urls', nargs='+',
+                            help='Paths to request, hot reads by default.')
+        parser.add_argument('--response-cache', action='store_true',
+                            help='Keep the anonymous response cache on.')
+        parser.add_argument('--json', help='Write the results to a file.')
+
+    def default_urls(self):
+        review = Review.objects.order_by('id').first()
+        if review is None:
+            raise CommandError('No reviews in the database to request')
+        title = f'/api/v1/titles/{review.title_id}/'
+        return [
+            '/api/v1/titles/',
+            title,
+            f'{title}reviews/',
+            f'{title}reviews/{review.id}/comments/',
+        ]
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        urls = options['urls'] or self.default_urls()
+        env = dict(THROTTLING_OFF)
+        if not options['response_cache']:
+            env.update(RESPONSE_CACHE_OFF)
+        results = {}
+        for offset, name in enumerate(options['servers']):
+            app, worker_class = SERVERS[name]
+            port = options['port'] + offset
+            command = gunicorn_command(
+                app, port, options['workers'], worker_class
+            )
+            results[name] = benchmark_server(
+                command, port, urls, options['concurrency'],
+                options['duration'], options['warmup'], env=env,
+                cwd=settings.BASE_DIR,
+            )
+            self.stdout.write(format_summary(name, results[name]))
+        if options['json']:
+            write_results(options['json'], {
+                'workers': options['workers'],
+                'concurrency': options['concurrency'],
+                'urls': urls,
+                'results': results,
+            })
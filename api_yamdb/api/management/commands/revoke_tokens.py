@@ -0,0 +1,36 @@
+from typing import Any, Optional
+
+from api.authentication import revoke_tokens
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import User
+
+
+class Command(BaseCommand):
+    help = '''
+    Invalidates access tokens issued so far to the given users,
+    or to everyone with --all. Users have to request a new token.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', type=str)
+        parser.add_argument('--all', action='store_true',
+                            help='Revoke the tokens of every user.')
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['all']:
+            users = User.objects.all()
+        elif options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(
+                users.values_list('username', flat=True)
+            )
+            if missing:
+                raise CommandError(
+                    f'Unknown users: {", ".join(sorted(missing))}'
+                )
+        else:
+            raise CommandError('Pass usernames or --all')
+        revoked = revoke_tokens(users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Revoked tokens of {revoked} users'
+        ))
@@ -0,0 +1,48 @@
+from typing import Any, Optional
+
+from api.slow_queries import read_log
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = '''
+    Prints the latest slow queries from the slow-query log of all
+    workers, newest first.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20,
+                            help='How many queries to print.')
+        parser.add_argument('--min-ms', type=float, default=0,
+                            help='Skip queries faster than this.')
+        parser.add_argument('--view', type=str,
+                            help='Only queries of this view name.')
+        parser.add_argument('--no-plan', action='store_true',
+                            help='Do not print the EXPLAIN plans.')
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        shown = 0
+        for capture in read_log():
+            if shown >= options['limit']:
+                break
+            if capture['duration_ms'] < options['min_ms']:
+                continue
+            if options['view'] and capture['view'] != options['view']:
+                continue
+            shown += 1
+            self.stdout.write(self.style.WARNING(
+                f'{capture["time"]}  {capture["duration_ms"]} ms  '
+                f'{capture["view"] or "-"}  {capture["database"]}'
+            ))
+            self.stdout.write(capture['sql'])
+            if capture['params']:
+                self.stdout.write(f'params: {capture["params"]}')
+            for frame in capture['stack']:
+                self.stdout.write(f'  at {frame}')
+            if capture['plan'] and not options['no_plan']:
+                self.stdout.write('plan:')
+                for line in capture['plan'].splitlines():
+                    self.stdout.write(f'  {line}')
+            self.stdout.write('')
+        if not shown:
+            self.stdout.write('No slow queries logged')
@@ -0,0 +1,445 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware samples METRICS_SAMPLE_RATE of the requests. For a
+sampled request it records the SQL query count and time (an execute
+wrapper installed on every connection), the time spent in serializers
+and in rendering, and the response size. They go back to the client in
+a `Server-Timing` header and into histograms by endpoint. Requests that
+are not sampled only bump a counter; the execute wrapper and the timers
+return right away for them.
+
+`/metrics` serves the histograms in the Prometheus text format to
+holders of METRICS_TOKEN. Every worker writes its registry to a file in
+METRICS_DIR each METRICS_FLUSH_INTERVAL seconds, and a scrape merges the
+files of all live workers of the host and drops those of exited ones.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Histograms by view and method: name -> (help, buckets).
+HISTOGRAMS = {
+    'yamdb_request_duration_seconds': (
+        'Time from the first to the last middleware', TIME_BUCKETS
+    ),
+    'yamdb_request_sql_queries': ('SQL queries per request', QUERY_BUCKETS),
+    'yamdb_request_sql_duration_seconds': (
+        'Time spent in SQL queries', TIME_BUCKETS
+    ),
+    'yamdb_request_serializer_duration_seconds': (
+        'Time spent in serializers, including the queries they run',
+        TIME_BUCKETS
+    ),
+    'yamdb_request_render_duration_seconds': (
+        'Time spent rendering the response', TIME_BUCKETS
+    ),
+    'yamdb_response_size_bytes': ('Response body size', SIZE_BUCKETS),
+}
+# Counters of all requests, sampled or not, by view, method and status.
+COUNTERS = {
+    'yamdb_requests_total': 'Requests served',
+}
+UNMATCHED = '<unmatched>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    __slots__ = ('sql_count', 'times', 'active')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.times = {'sql': 0.0, 'serializer': 0.0, 'render': 0.0}
+        self.active = set()
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def current():
+    """Metrics of the sampled request being served, or None."""
+    return _current.get()
+
+
+class StageTimer:
+    """
+    Adds the time of the block to a stage of the current request.
+    Nested blocks of the same stage are only counted once.
+    """
+    __slots__ = ('stage', 'state', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.state = _current.get()
+        if self.state is not None and self.stage in self.state.active:
+            self.state = None
+        if self.state is not None:
+            self.state.active.add(self.stage)
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.state is not None:
+            self.state.times[self.stage] += (
+                time.perf_counter() - self.started
+            )
+            self.state.active.discard(self.stage)
+
+
+def timed(stage):
+    return StageTimer(stage)
+
+
+def sql_timer(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.sql_count += 1
+        state.times['sql'] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_sql_timer(sender, connection, **kwargs):
+    # Wrappers outlive reconnects of the same connection object.
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
+
+
+def pid_alive(name):
+    """Whether the worker a registry file is named after still runs."""
+    if not name.isdigit() or int(name) == 0:
+        return True
+    try:
+        os.kill(int(name), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, only owned by another user.
+        pass
+    return True
+
+
+class Registry:
+    """Histograms and counters of one process."""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.series = {}
+        self.dirty = False
+        self.flusher = None
+
+    def get_series(self, name, labels, size):
+        key = (name, labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * size
+        return series
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        with self.lock:
+            # Bucket counts (the last one is +Inf), then the sum.
+            series = self.get_series(name, labels, len(buckets) + 2)
+            series[bisect_left(buckets, value)] += 1
+            series[-1] += value
+            self.changed()
+
+    def inc(self, name, labels):
+        with self.lock:
+            self.get_series(name, labels, 1)[0] += 1
+            self.changed()
+
+    def changed(self):
+        self.dirty = True
+        if self.directory is not None and self.flusher is None:
+            self.flusher = threading.Thread(
+                target=self.run_flusher, name='metrics-flush', daemon=True
+            )
+            self.flusher.start()
+
+    def snapshot(self):
+        with self.lock:
+            self.dirty = False
+            return [
+                [name, list(labels), list(series)]
+                for (name, labels), series in self.series.items()
+            ]
+
+    @property
+    def path(self):
+        return self.directory / f'{os.getpid()}.json'
+
+    def flush(self):
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        with self.flush_lock:
+            with open(temporary, 'w', encoding='utf-8') as fp:
+                json.dump(self.snapshot(), fp, separators=(',', ':'))
+            os.replace(temporary, self.path)
+
+    def run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self.dirty:
+                self.flush()
+
+    def collect(self):
+        """Series of every worker of the host: {(name, labels): values}."""
+        if self.directory is None:
+            return {
+                (name, tuple(labels)): series
+                for name, labels, series in self.snapshot()
+            }
+        self.flush()
+        merged = {}
+        for path in self.directory.glob('*.json'):
+            if not pid_alive(path.stem):
+                # Left by a worker that exited or was recycled.
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding='utf-8') as fp:
+                    snapshot = json.load(fp)
+            except (OSError, ValueError):
+                continue
+            for name, labels, series in snapshot:
+                key = (name, tuple(labels))
+                if key in merged:
+                    merged[key] = [a + b for a, b in zip(merged[key], series)]
+                else:
+                    merged[key] = series
+        return merged
+
+
+_registry = None
+_registry_pid = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry, _registry_pid
+    with _registry_lock:
+        # A forked worker starts with an empty registry of its own.
+        if _registry is None or _registry_pid != os.getpid():
+            _registry = Registry(
+                getattr(settings, 'METRICS_DIR', None),
+                getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0),
+            )
+            _registry_pid = os.getpid()
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_registry(setting, **kwargs):
+    global _registry
+    if setting in ('METRICS_DIR', 'METRICS_FLUSH_INTERVAL'):
+        with _registry_lock:
+            _registry = None
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNMATCHED
+
+
+def server_timing(state, total):
+    return ', '.join((
+        'db;dur={:.3f};desc="{} queries"'.format(
+            state.times['sql'] * 1000, state.sql_count
+        ),
+        'serialize;dur={:.3f}'.format(state.times['serializer'] * 1000),
+        'render;dur={:.3f}'.format(state.times['render'] * 1000),
+        'total;dur={:.3f}'.format(total * 1000),
+    ))
+
+
+class MetricsMiddleware:
+    """
+    Samples requests into the metrics registry. Keep it first in
+    MIDDLEWARE, so the duration covers the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes Django await the middleware, like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = self.start()
+        if state is None:
+            return self.count(request, self.get_response(request))
+        token = _current.set(state)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, state, started)
+
+    async def __acall__(self, request):
+        state = self.start()
+        if state is None:
+            return self.count(request, await self.get_response(request))
+        token = _current.set(state)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, state, started)
+
+    def start(self):
+        """Metrics of a sampled request, None if it is not sampled."""
+        rate = settings.METRICS_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        return RequestMetrics()
+
+    def count(self, request, response):
+        get_registry().inc('yamdb_requests_total', (
+            view_name(request), request.method, str(response.status_code),
+        ))
+        return response
+
+    def finish(self, request, response, state, started):
+        total = time.perf_counter() - started
+        self.record(request, response, state, total)
+        response['Server-Timing'] = server_timing(state, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Render here to time it; Django skips rendered responses.
+        with timed('render'):
+            response.render()
+        return response
+
+    def record(self, request, response, state, total):
+        registry = get_registry()
+        labels = (view_name(request), request.method)
+        registry.inc('yamdb_requests_total', (*labels, str(
+            response.status_code
+        )))
+        registry.observe('yamdb_request_duration_seconds', labels, total)
+        registry.observe(
+            'yamdb_request_sql_queries', labels, state.sql_count
+        )
+        for stage in ('sql', 'serializer', 'render'):
+            registry.observe(
+                f'yamdb_request_{stage}_duration_seconds', labels,
+                state.times[stage]
+            )
+        if not response.streaming:
+            registry.observe(
+                'yamdb_response_size_bytes', labels, len(response.content)
+            )
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def format_labels(names, values, extra=''):
+    pairs = [
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def exposition(series):
+    """Series from Registry.collect() in the Prometheus text format."""
+    lines = []
+    by_name = {}
+    for (name, labels), values in sorted(series.items()):
+        by_name.setdefault(name, []).append((labels, values))
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for labels, values in by_name.get(name, ()):
+            lines.append('{}{} {}'.format(
+                name, format_labels(('view', 'method', 'status'), labels),
+                format_number(values[0]),
+            ))
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, values in by_name.get(name, ()):
+            label_names = ('view', 'method')
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    name,
+                    format_labels(
+                        label_names, labels, f'le="{format_number(bound)}"'
+                        if bound != '+Inf' else 'le="+Inf"'
+                    ),
+                    cumulative,
+                ))
+            lines.append('{}_sum{} {}'.format(
+                name, format_labels(label_names, labels),
+                format_number(values[-1]),
+            ))
+            lines.append('{}_count{} {}'.format(
+                name, format_labels(label_names, labels), cumulative
+            ))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, requires `Authorization: Bearer <token>`
+    with METRICS_TOKEN; without the setting it is closed.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        exposition(get_registry().collect()), content_type=CONTENT_TYPE
+    )
@@ -0,0 +1,46 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key. Unlike `pub_date`, which is
+    rewritten on every edit, `id` never changes, so cursors stay valid.
+    """
+    ordering = 'id'
+
+
+class PositionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the leaderboard position: every page is an
+    index range scan, however deep.
+    """
+    ordering = 'position'
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. A request with a `cursor` query
+    parameter (empty for the first page) switches to opaque keyset cursors,
+    which need neither `COUNT(*)` nor `OFFSET` scans.
+    """
+    cursor_pagination_class = IdCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_paginator = self.cursor_pagination_class()
+        if cursor_paginator.cursor_query_param in request.query_params:
+            self.cursor_paginator = cursor_paginator
+            return cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
@@ -0,0 +1,79 @@
+"""
+JSON rendering and parsing with orjson.
+
+orjson encodes the dicts, lists, strings and numbers of API responses
+several times faster than the json module. The renderer produces the same
+bytes as DRF's JSONRenderer for them and leaves everything else to it:
+indented output, non-compact or ASCII-only settings, and values orjson
+cannot encode. Without the orjson package, or with FAST_JSON off, both
+classes behave exactly like DRF's.
+"""
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# DRF formats datetimes itself ('Z' for UTC) and knows lazy strings,
+# decimals and querysets; orjson hands those to its default().
+OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+) if orjson is not None else 0
+UTF8 = ('utf-8', 'utf8')
+
+
+def enabled():
+    return orjson is not None and getattr(settings, 'FAST_JSON', True)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            enabled() and self.compact and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.use_orjson(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(
+                data, default=encoders.JSONEncoder().default, option=OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Escaped like DRF does, to keep the output a JavaScript subset.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not enabled() or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower() not in UTF8:
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
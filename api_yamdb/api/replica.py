@@ -0,0 +1,152 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+ReplicaMiddleware lets safe requests to views with `read_from_replica`
+read from one of settings.DATABASE_REPLICAS; everything else, and every
+write, goes to the primary. A request that wrote to the database pins
+its client to the primary for REPLICA_STICKY_SECONDS, so the client reads
+its own writes despite replication lag. Clients with a token are pinned
+in the `replica_pins` cache, shared by the workers; anonymous ones, which
+may all come through the same proxy address, get a signed cookie.
+
+Responses stored in the response cache are served to every anonymous
+client, so cache misses read from the primary (see read_from_primary).
+So do responses with an ETag from the version counters: the counters
+follow the primary and must not label a body from a lagging replica.
+"""
+import asyncio
+import contextvars
+import hashlib
+import math
+import random
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import permissions
+
+PINS_CACHE_ALIAS = 'replica_pins'
+PIN_KEY = 'replica-pin:{}'
+PIN_COOKIE = 'replica_pin'
+PIN_COOKIE_SALT = 'api.replica'
+
+
+class RequestState:
+    __slots__ = ('use_replica', 'wrote', 'replica')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+        # One replica per request, so validators computed from the
+        # database match the body.
+        self.replica = None
+
+
+_state = contextvars.ContextVar('replica_request_state', default=None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica:
+            return None
+        if state.replica is None:
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+def read_from_primary():
+    """Sends the remaining reads of the current request to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def client_key(request):
+    """Pin key of a client with a token, None for anonymous clients."""
+    ident = request.META.get('HTTP_AUTHORIZATION')
+    if not ident:
+        return None
+    return PIN_KEY.format(hashlib.md5(ident.encode()).hexdigest())
+
+
+def pin_to_primary(request, response):
+    seconds = settings.REPLICA_STICKY_SECONDS
+    key = client_key(request)
+    if key is not None:
+        caches[PINS_CACHE_ALIAS].set(key, True, timeout=seconds)
+    else:
+        response.set_signed_cookie(
+            PIN_COOKIE, '1', salt=PIN_COOKIE_SALT,
+            max_age=math.ceil(seconds), httponly=True, samesite='Lax',
+        )
+
+
+def is_pinned(request):
+    key = client_key(request)
+    if key is not None:
+        return bool(caches[PINS_CACHE_ALIAS].get(key))
+    try:
+        return bool(request.get_signed_cookie(
+            PIN_COOKIE, salt=PIN_COOKIE_SALT,
+            max_age=settings.REPLICA_STICKY_SECONDS,
+        ))
+    except (KeyError, signing.BadSignature):
+        return False
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes Django await the middleware, like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state = RequestState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            await sync_to_async(pin_to_primary)(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        _state.get().use_replica = bool(
+            settings.DATABASE_REPLICAS
+            and request.method in permissions.SAFE_METHODS
+            and getattr(view_class, 'read_from_replica', False)
+            and not is_pinned(request)
+        )
@@ -1,11 +1,68 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.utils import timezone
-from rest_framework import serializers
+from rest_framework import permissions, serializers
 from rest_framework.validators import UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
+from .lookup_tables import CachedSlugRelatedField
+from .metrics import timed
+
+
+class TimedSerializerMixin:
+    """Counts to_representation into the serializer time of a request."""
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_sparse_fields(request, names):
+    """
+    Names out of `names` a safe request asks for with `?fields=` and
+    `?exclude=` (comma separated), in their order; None for all of them.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    params = request.query_params
+    if 'fields' not in params and 'exclude' not in params:
+        return None
+    requested = split_names(params.get('fields', ''))
+    excluded = split_names(params.get('exclude', ''))
+    errors = {}
+    for param, values in (('fields', requested), ('exclude', excluded)):
+        unknown = [name for name in values if name not in names]
+        if unknown:
+            errors[param] = [f'Неизвестные поля: {", ".join(unknown)}']
+    if errors:
+        raise serializers.ValidationError(errors)
+    return tuple(
+        name for name in names
+        if (not requested or name in requested) and name not in excluded
+    )
+
+
+class SparseFieldsMixin:
+    """
+    Leaves out the fields a safe request did not ask for, see
+    get_sparse_fields(). Nested serializers always show all fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = get_sparse_fields(
+            self.context.get('request'), self.Meta.fields
+        )
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                     serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=150,
         validators=(
@@ -21,7 +78,8 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
-class UserEditSerializer(serializers.ModelSerializer):
+class UserEditSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                         serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=150,
         validators=(
@@ -38,7 +96,8 @@ class UserEditSerializer(serializers.ModelSerializer):
         model = User
 
 
-class RegisterDataSerializer(serializers.ModelSerializer):
+class RegisterDataSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=150,
         validators=(UnicodeUsernameValidator(),),
@@ -79,7 +138,8 @@ class TokenSerializer(serializers.Serializer):
         model = User
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, TimedSerializerMixin,
+                         serializers.ModelSerializer):
     name = serializers.CharField(max_length=256)
     slug = serializers.SlugField(
         max_length=50,
@@ -91,7 +151,8 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                      serializers.ModelSerializer):
     name = serializers.CharField(max_length=256)
     slug = serializers.SlugField(
         max_length=50,
@@ -103,13 +164,9 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
-class TitleCreateSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Category.objects.all(),
-    )
-    genre = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Genre.objects.all(), many=True
-    )
+class TitleCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    category = CachedSlugRelatedField(Category)
+    genre = CachedSlugRelatedField(Genre, many=True)
 
     class Meta:
         model = Title
@@ -126,10 +183,11 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                      serializers.ModelSerializer):
     category = CategorySerializer()
     genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
@@ -138,7 +196,8 @@ class TitleSerializer(serializers.ModelSerializer):
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -161,16 +220,17 @@ class ReviewSerializer(serializers.ModelSerializer):
             return data
 
         title_id = self.context['view'].kwargs.get('title_id')
-        author = self.context['request'].user
+        author_id = self.context['request'].user.id
         if Review.objects.filter(
-                author=author, title=title_id).exists():
+                author_id=author_id, title=title_id).exists():
             raise serializers.ValidationError(
                 'Отзыв можно оставить только один раз!'
             )
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import (Category, Genre, GenreTitle, Review, Title,
+                            TitleRanking, User)
+from reviews.signals import rows_imported
+
+from .authentication import forget_token_version
+from .cache import bump_version
+
+CACHE_VERSIONED_MODELS = (
+    Category, Genre, GenreTitle, Review, Title, TitleRanking,
+)
+
+# Usernames of review and comment authors, see api.views.collection_stamp.
+# Only renames bump it, not signups or other profile changes.
+USERNAMES_VERSION = 'reviews.User.username'
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(rows_imported)
+def bump_cache_version(sender, using=None, **kwargs):
+    if sender in CACHE_VERSIONED_MODELS:
+        bump_version_twice(sender._meta.label, using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_genre_title_version(sender, action, using=None, **kwargs):
+    if action.startswith('post_'):
+        bump_version_twice(GenreTitle._meta.label, using)
+
+
+def bump_version_twice(label, using):
+    # Bumped now and once more after commit, so that a reader between the
+    # two cannot keep the rows the transaction is about to replace under
+    # the new version (see api.lookup_tables).
+    bump_version(label)
+    transaction.on_commit(lambda: bump_version(label), using=using)
+
+
+@receiver(pre_save, sender=User)
+def bump_usernames_version(sender, instance, raw, using, **kwargs):
+    loaded = getattr(instance, '_loaded_username', None)
+    if not raw and loaded is not None and loaded != instance.username:
+        bump_version_twice(USERNAMES_VERSION, using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reload_token_version(sender, instance, using, **kwargs):
+    # Dropped now and once more after commit, so that a concurrent request
+    # cannot cache the version the transaction is about to replace.
+    # Deleted users have no row and their tokens are rejected.
+    forget_token_version(instance.pk)
+    transaction.on_commit(
+        lambda: forget_token_version(instance.pk), using=using
+    )
@@ -0,0 +1,298 @@
+"""
+Slow-query capture.
+
+An execute wrapper installed on every connection times each statement.
+Statements slower than SLOW_QUERY_THRESHOLD_MS are captured with their
+parameters, the view of the request (see SlowQueryMiddleware), a summary
+of the project frames of the stack and, for SELECT statements, the plan
+from EXPLAIN. With SLOW_QUERY_EXPLAIN_ANALYZE on PostgreSQL the plan
+comes from EXPLAIN ANALYZE, which runs the query a second time.
+Statements on SLOW_QUERY_REDACT_TABLES (users and their emails) are kept
+without parameters and plan.
+
+Captures are kept in a ring buffer of the process (the admin endpoint
+`status/slow-queries/`) and appended as JSON lines to the rotating
+SLOW_QUERY_LOG file shared by all workers (the `slow_queries` command).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+STACK_DEPTH = 8
+MAX_PARAM_LENGTH = 200
+REDACTED = '<redacted>'
+
+_request = contextvars.ContextVar('slow_query_request', default=None)
+# Set while the wrapper runs its own EXPLAIN.
+_explaining = contextvars.ContextVar('slow_query_explaining', default=False)
+
+
+def get_setting(name, default):
+    return getattr(settings, f'SLOW_QUERY_{name}', default)
+
+
+class CaptureBuffer:
+    """The latest captures of the process."""
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.captures = deque(maxlen=size)
+
+    def append(self, capture):
+        with self.lock:
+            self.captures.append(capture)
+
+    def latest(self, limit=None):
+        with self.lock:
+            captures = list(self.captures)
+        captures.reverse()
+        return captures[:limit] if limit else captures
+
+    def clear(self):
+        with self.lock:
+            self.captures.clear()
+
+
+_buffer = None
+_log = None
+_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _lock:
+        if _buffer is None:
+            _buffer = CaptureBuffer(get_setting('BUFFER_SIZE', 100))
+    return _buffer
+
+
+def get_log():
+    """Logger writing to SLOW_QUERY_LOG, or None if the log is off."""
+    global _log
+    with _lock:
+        if _log is None:
+            config = get_setting('LOG', None)
+            _log = logging.getLogger(__name__)
+            _log.propagate = False
+            _log.setLevel(logging.INFO)
+            for handler in list(_log.handlers):
+                _log.removeHandler(handler)
+                handler.close()
+            if config:
+                path = Path(config['PATH'])
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _log.addHandler(RotatingFileHandler(
+                    path,
+                    maxBytes=config.get('MAX_BYTES', 10 * 1024 * 1024),
+                    backupCount=config.get('BACKUP_COUNT', 3),
+                    encoding='utf-8',
+                ))
+    return _log if _log.handlers else None
+
+
+@receiver(setting_changed)
+def reset_capture(setting, **kwargs):
+    global _buffer, _log
+    if setting == 'SLOW_QUERY_BUFFER_SIZE':
+        with _lock:
+            _buffer = None
+    elif setting == 'SLOW_QUERY_LOG':
+        with _lock:
+            if _log is not None:
+                for handler in list(_log.handlers):
+                    _log.removeHandler(handler)
+                    handler.close()
+            _log = None
+
+
+def read_log(limit=None):
+    """Captures of all workers from the log and its backups, newest first."""
+    config = get_setting('LOG', None)
+    if not config:
+        return []
+    path = Path(config['PATH'])
+    paths = [path] + [
+        path.with_name(f'{path.name}.{i}')
+        for i in range(1, config.get('BACKUP_COUNT', 3) + 1)
+    ]
+    captures = []
+    for log_path in paths:
+        try:
+            with open(log_path, encoding='utf-8') as fp:
+                lines = fp.readlines()
+        except FileNotFoundError:
+            continue
+        for line in reversed(lines):
+            try:
+                captures.append(json.loads(line))
+            except ValueError:
+                continue
+            if limit and len(captures) >= limit:
+                return captures
+    return captures
+
+
+def format_param(value):
+    text = repr(value)
+    if len(text) > MAX_PARAM_LENGTH:
+        text = text[:MAX_PARAM_LENGTH] + '...'
+    return text
+
+
+def format_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: format_param(value) for name, value in params.items()}
+    return [format_param(value) for value in params]
+
+
+def redacted(sql):
+    """Whether the statement touches a table of SLOW_QUERY_REDACT_TABLES."""
+    return any(
+        re.search(rf'\b{re.escape(table)}\b', sql)
+        for table in get_setting('REDACT_TABLES', ())
+    )
+
+
+def redact_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: REDACTED for name in params}
+    return [REDACTED] * len(params)
+
+
+def stack_summary():
+    """Project frames leading to the query, innermost last."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return frames[-STACK_DEPTH:]
+
+
+def explain(connection, sql, params):
+    if sql.lstrip()[:6].upper() != 'SELECT':
+        return None
+    options = {}
+    if get_setting('EXPLAIN_ANALYZE', False):
+        options['analyze'] = True
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+    except ValueError:
+        # The backend does not know ANALYZE.
+        prefix = connection.ops.explain_query_prefix()
+    token = _explaining.set(True)
+    try:
+        # A failed EXPLAIN must not break the transaction of the request.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+    except Exception as error:
+        return f'EXPLAIN failed: {error}'
+    finally:
+        _explaining.reset(token)
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None) if request else None
+    return match.view_name if match is not None else None
+
+
+def capture(connection, sql, params, many, duration):
+    request = _request.get()
+    # Plans show the parameters as literals, so they go as well.
+    secret = redacted(sql)
+    record = {
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'database': connection.alias,
+        'sql': sql,
+        'params': (
+            None if many
+            else redact_params(params) if secret
+            else format_params(params)
+        ),
+        'many': many,
+        'view': view_name(request),
+        'path': request.path if request is not None else None,
+        'stack': stack_summary(),
+        'plan': (
+            explain(connection, sql, params)
+            if not many and not secret and get_setting('EXPLAIN', True)
+            else None
+        ),
+    }
+    get_buffer().append(record)
+    log = get_log()
+    if log is not None:
+        log.info(json.dumps(record, ensure_ascii=False, default=str))
+    return record
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    threshold = get_setting('THRESHOLD_MS', None)
+    if threshold is None or _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration * 1000 >= threshold:
+        capture(context['connection'], sql, params, many, duration)
+    return result
+
+
+@receiver(connection_created)
+def install_slow_query_wrapper(sender, connection, **kwargs):
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+class SlowQueryMiddleware:
+    """Makes the request known to the captures of its queries."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes Django await the middleware, like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
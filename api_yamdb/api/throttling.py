@@ -0,0 +1,277 @@
+"""
+Request throttling with sliding-window counters.
+
+Each scope allows `num_requests` per `duration`. The rate of the current
+window is estimated as `previous * (1 - elapsed) + current`, where
+`elapsed` is the share of the current fixed window that has passed; only
+admitted requests are counted.
+
+Counters live in a store shared by all workers of a host, configured by
+the THROTTLE_STORE setting:
+
+* `CacheCounterStore` - a Django cache alias with atomic `incr`, the
+  default: the `throttle` alias, files on the host or memcached and
+  redis for several hosts;
+* `FileCounterStore` - flock-protected shard files in a local directory;
+  every request rewrites a whole shard under the lock;
+* `LocalCounterStore` - process memory, for tests and development.
+
+Throttles only look at the request line, headers and token claims, so
+rejected requests never reach the database.
+"""
+import abc
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class CounterStore(abc.ABC):
+    """
+    Keeps `(window, current, previous)` counters by key.
+    Subclasses implement `update`, which applies a function to the
+    counters of a key atomically across all processes using the store.
+    """
+
+    @abc.abstractmethod
+    def update(self, key, duration, func):
+        """Replaces the counters of `key` with `func(counters)`."""
+
+    def hit(self, key, limit, duration):
+        """
+        Counts a request if it fits into the limit.
+        Returns whether it was admitted and, if not, seconds to wait.
+        """
+        now = time.time()
+        window = int(now // duration)
+        elapsed = now / duration - window
+        result = {}
+
+        def count(counters):
+            start, current, previous = counters or (window, 0, 0)
+            if start != window:
+                previous = current if start == window - 1 else 0
+                current = 0
+            estimate = previous * (1 - elapsed) + current
+            result['allowed'] = estimate + 1 <= limit
+            if result['allowed']:
+                current += 1
+            else:
+                # The next window starts from zero at the latest, or
+                # earlier if enough of the previous one slides out.
+                result['wait'] = duration * (1 - elapsed)
+                if previous and current < limit:
+                    result['wait'] = min(
+                        result['wait'],
+                        duration * (estimate + 1 - limit) / previous
+                    )
+            return window, current, previous
+
+        self.update(key, duration, count)
+        return result['allowed'], result.get('wait')
+
+    def clear(self):
+        pass
+
+
+class LocalCounterStore(CounterStore):
+    """Counters of the current process only."""
+
+    def __init__(self, **options):
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def update(self, key, duration, func):
+        with self.lock:
+            counters = self.counters.get(key)
+            self.counters[key] = func(counters and counters[:3]) + (
+                time.time() + 2 * duration,
+            )
+            if len(self.counters) > 10000:
+                self.prune()
+
+    def prune(self):
+        now = time.time()
+        for key in [
+            key for key, counters in self.counters.items()
+            if counters[3] < now
+        ]:
+            del self.counters[key]
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class FileCounterStore(CounterStore):
+    """
+    Counters in JSON shard files under LOCATION, shared by every process
+    on the host. A shard is locked with flock for one read-modify-write;
+    expired counters are dropped on write, so shards stay small.
+    """
+
+    def __init__(self, location, shards=64, **options):
+        self.location = Path(location)
+        self.shards = shards
+        self.location.mkdir(parents=True, exist_ok=True)
+
+    def shard_path(self, key):
+        shard = zlib.crc32(key.encode()) % self.shards
+        return self.location / f'{shard}.json'
+
+    def update(self, key, duration, func):
+        now = time.time()
+        fd = os.open(self.shard_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                content = fp.read()
+                counters = json.loads(content) if content else {}
+                record = counters.get(key)
+                counters[key] = [
+                    *func(record and tuple(record[:3])), now + 2 * duration
+                ]
+                counters = {
+                    name: record for name, record in counters.items()
+                    if record[3] >= now
+                }
+                fp.seek(0)
+                fp.truncate()
+                json.dump(counters, fp, separators=(',', ':'))
+                fp.flush()
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def clear(self):
+        for path in self.location.glob('*.json'):
+            path.unlink()
+
+
+class CacheCounterStore(CounterStore):
+    """
+    Counters in a Django cache alias with atomic `incr`, one entry per
+    key and fixed window. The check and the increment are separate
+    operations, so concurrent requests may overshoot the limit slightly.
+    """
+
+    def __init__(self, alias='throttle', **options):
+        self.alias = alias
+
+    def update(self, key, duration, func):
+        cache = caches[self.alias]
+        window = int(time.time() // duration)
+        current_key = f'throttle:{key}:{window}'
+        previous_key = f'throttle:{key}:{window - 1}'
+        values = cache.get_many([current_key, previous_key])
+        counters = (
+            window, values.get(current_key, 0), values.get(previous_key, 0)
+        )
+        _, current, _ = func(counters)
+        if current > counters[1]:
+            cache.add(current_key, 0, timeout=math.ceil(2 * duration))
+            cache.incr(current_key)
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = dict(getattr(settings, 'THROTTLE_STORE', {}))
+            backend = import_string(
+                config.pop('BACKEND', 'api.throttling.LocalCounterStore')
+            )
+            options = {name.lower(): value for name, value in config.items()}
+            _store = backend(**options)
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting == 'THROTTLE_STORE':
+        with _store_lock:
+            _store = None
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle counting in the shared store instead of keeping
+    a request history in the cache.
+    """
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def applies(self, request):
+        return True
+
+    def get_cache_key(self, request, view):
+        if not self.applies(request):
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_seconds = get_store().hit(
+            self.key, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthRateThrottle(SlidingWindowThrottle):
+    """Signup and token requests, per client address."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:ip:{self.get_ident(request)}'
+
+
+class WriteRateThrottle(SlidingWindowThrottle):
+    """Unsafe requests, per user or per address for anonymous ones."""
+    scope = 'writes'
+
+    def applies(self, request):
+        return request.method not in permissions.SAFE_METHODS
+
+
+class AnonReadRateThrottle(SlidingWindowThrottle):
+    """Safe requests without credentials, per client address."""
+    scope = 'anon_reads'
+
+    def applies(self, request):
+        return (
+            request.method in permissions.SAFE_METHODS
+            and not request.user.is_authenticated
+        )
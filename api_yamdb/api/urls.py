@@ -1,17 +1,25 @@
-from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from django.urls import include, path, re_path
 
+from .async_views import AsyncReadRouter
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet, get_jwt_token,
-                    register)
+                    LeaderboardViewSet, ReviewViewSet, TitleViewSet,
+                    UserViewSet, db_pool_status, export_table, get_jwt_token,
+                    register, slow_query_log)
 
 app_name = 'api'
 
-router_v1 = DefaultRouter()
+router_v1 = AsyncReadRouter(async_routes=(
+    ('titles', False), ('titles', True), ('reviews', False),
+    ('comments', False),
+))
 router_v1.register(r'users', UserViewSet, basename='users')
 router_v1.register('titles', TitleViewSet, basename='titles')
 router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
+router_v1.register(
+    r'leaderboards/(?P<board>top|trending)', LeaderboardViewSet,
+    basename='leaderboards'
+)
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -29,7 +37,13 @@ auth_v1 = [
 
 urls_v1 = [
     path('', include(router_v1.urls)),
-    path('auth/', include(auth_v1))
+    path('auth/', include(auth_v1)),
+    re_path(
+        r'^export/(?P<table>\w+)\.(?P<fmt>csv|ndjson)(?P<compressed>\.gz)?$',
+        export_table, name='export'
+    ),
+    path('status/db-pool/', db_pool_status, name='db-pool-status'),
+    path('status/slow-queries/', slow_query_log, name='slow-queries'),
 ]
 
 urlpatterns = [
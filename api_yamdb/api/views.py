@@ -1,27 +1,46 @@
-from django.conf import settings
+import os
+
+from dbpool.base import pool_stats
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.db.models import Count, Max, Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import filters, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from django.utils.functional import cached_property
+from rest_framework import filters, mixins, permissions, status
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
+from reviews import outbox
+from reviews.exporting import iter_export, iter_gzip
+from reviews.importing import TABLES_BY_NAME
+from reviews.models import Category, Genre, Review, Title, TitleRanking, User
 
+from . import slow_queries
+from .authentication import RoleAccessToken, get_user
+from .cache import CachedResponseMixin, get_versions
+from .conditional import CacheVersionConditionalMixin, ConditionalGetMixin
+from .facets import TitleFacets
+from .fast_serializers import (FastCommentSerializer, FastListMixin,
+                               FastRankingSerializer, FastReviewSerializer,
+                               FastTitleSerializer)
 from .filters import TitleFilter
+from .lookup_tables import LookupTableListMixin, get_table
+from .pagination import PageNumberOrCursorPagination, PositionCursorPagination
 from .permissions import (AdminModeratorAuthorOrReadOnly, AdminOnly,
                           AdminOrReadOnly)
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, RegisterDataSerializer,
                           ReviewSerializer, TitleCreateSerializer,
                           TitleSerializer, TokenSerializer, UserEditSerializer,
-                          UserSerializer)
-from .viewsets import CreateListDestroyViewSet
+                          UserSerializer, get_sparse_fields)
+from .signals import USERNAMES_VERSION
+from .throttling import AuthRateThrottle
+from .viewsets import CreateListDestroyViewSet, SparseQuerysetMixin
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseQuerysetMixin, ModelViewSet):
     lookup_field = 'username'
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -41,7 +60,7 @@ class UserViewSet(ModelViewSet):
         serializer_class=UserEditSerializer,
     )
     def users_own_profile(self, request):
-        user = request.user
+        user = get_user(request.user)
         if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -58,17 +77,16 @@ class UserViewSet(ModelViewSet):
 
 
 def send_email(data):
-    email = EmailMessage(
+    outbox.enqueue(
         subject=data['mail_subject'],
         body=data['email_info'],
-        from_email=settings.EMAIL_ADMIN,
-        to=[data['to_email']]
+        to_email=data['to_email'],
     )
-    email.send()
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthRateThrottle])
 def register(request):
     serializer = RegisterDataSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -91,6 +109,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthRateThrottle])
 def get_jwt_token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -102,14 +121,95 @@ def get_jwt_token(request):
     if user.confirmation_code == serializer.validated_data.get(
             'confirmation_code'
     ):
-        token = RefreshToken.for_user(user).access_token
+        token = RoleAccessToken.for_user(user)
         return Response({'token': str(token)},
                         status=status.HTTP_201_CREATED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@api_view(['GET'])
+@permission_classes([AdminOnly])
+def export_table(request, table, fmt, compressed=None):
+    if table not in TABLES_BY_NAME:
+        raise Http404
+    chunks = iter_export(table, fmt)
+    if compressed:
+        response = StreamingHttpResponse(
+            iter_gzip(chunks), content_type='application/gzip'
+        )
+    else:
+        response = StreamingHttpResponse(
+            (chunk.encode() for chunk in chunks),
+            content_type=EXPORT_CONTENT_TYPES[fmt]
+        )
+    filename = f'{table}.{fmt}{compressed or ""}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AdminOnly])
+def db_pool_status(request):
+    """Connection pool counters of the worker serving the request."""
+    return Response({'pid': os.getpid(), 'pools': pool_stats()})
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([AdminOnly])
+def slow_query_log(request):
+    """
+    Slow queries captured by the worker serving the request, newest
+    first; `?limit=` caps their number. DELETE clears the buffer.
+    """
+    buffer = slow_queries.get_buffer()
+    if request.method == 'DELETE':
+        buffer.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    try:
+        limit = int(request.query_params.get('limit', 0)) or None
+    except ValueError:
+        limit = None
+    return Response({
+        'pid': os.getpid(),
+        'threshold_ms': slow_queries.get_setting('THRESHOLD_MS', None),
+        'queries': buffer.latest(limit),
+    })
+
+
+def collection_stamp(parents, related, pk=None):
+    """
+    Row count and latest pub_date of the `related` rows of the parent in
+    `parents`, or of the row `pk` among them; 404 without the parent. The
+    count catches deletions that leave the latest pub_date unchanged, the
+    usernames version catches renames of the authors shown. No
+    Last-Modified: neither deletions nor renames would move it.
+    """
+    only = Q(**{f'{related}__pk': pk}) if pk is not None else None
+    stamp = parents.annotate(
+        last_modified=Max(f'{related}__pub_date', filter=only),
+        count=Count(related, filter=only),
+    ).values('count', 'last_modified').first()
+    if stamp is None:
+        raise Http404
+    return (
+        (stamp['count'], stamp['last_modified'],
+         *get_versions([USERNAMES_VERSION])),
+        None,
+    )
+
+
+class CategoryViewSet(CachedResponseMixin, CacheVersionConditionalMixin,
+                      LookupTableListMixin, SparseQuerysetMixin,
+                      CreateListDestroyViewSet):
+    read_from_replica = True
+    cache_dependencies = ('reviews.Category',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnly,)
@@ -118,7 +218,11 @@ class CategoryViewSet(CreateListDestroyViewSet):
     search_fields = ('name',)
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(CachedResponseMixin, CacheVersionConditionalMixin,
+                   LookupTableListMixin, SparseQuerysetMixin,
+                   CreateListDestroyViewSet):
+    read_from_replica = True
+    cache_dependencies = ('reviews.Genre',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly,)
@@ -127,40 +231,115 @@ class GenreViewSet(CreateListDestroyViewSet):
     search_fields = ('name',)
 
 
-class TitleViewSet(ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('id').all()
+class TitleViewSet(CachedResponseMixin, CacheVersionConditionalMixin,
+                   FastListMixin, SparseQuerysetMixin, ModelViewSet):
+    read_from_replica = True
+    cache_dependencies = (
+        'reviews.Title', 'reviews.Category', 'reviews.Genre',
+        'reviews.GenreTitle', 'reviews.Review',
+    )
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('id')
     serializer_class = TitleSerializer
+    fast_serializer_class = FastTitleSerializer
     permission_classes = (AdminOrReadOnly,)
     filterset_class = TitleFilter
+    pagination_class = PageNumberOrCursorPagination
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH',):
             return TitleCreateSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        return Response(TitleFacets(
+            request, self.get_queryset(), self.filterset_class
+        ).data)
 
-class ReviewViewSet(ModelViewSet):
+
+class LeaderboardViewSet(CachedResponseMixin, FastListMixin,
+                         mixins.ListModelMixin, GenericViewSet):
+    """
+    Top or trending titles (the `board` of the URL) from the rankings of
+    reviews.leaderboards; `?category=` or `?genre=` (slugs) narrow the
+    board to a category or a genre.
+    """
+    read_from_replica = True
+    cache_dependencies = (
+        'reviews.TitleRanking', 'reviews.Title', 'reviews.Category',
+        'reviews.Genre', 'reviews.GenreTitle', 'reviews.Review',
+    )
+    fast_serializer_class = FastRankingSerializer
+    permission_classes = (AdminOrReadOnly,)
+    filter_backends = ()
+    pagination_class = PositionCursorPagination
+
+    @cached_property
+    def sparse_fields(self):
+        return get_sparse_fields(
+            self.request, tuple(FastRankingSerializer.lookups)
+        )
+
+    def get_queryset(self):
+        scope, scope_id = TitleRanking.ALL, 0
+        params = self.request.query_params
+        scoped = [
+            (name, model) for name, model in (
+                (TitleRanking.CATEGORY, Category),
+                (TitleRanking.GENRE, Genre),
+            ) if params.get(name)
+        ]
+        if len(scoped) > 1:
+            raise ValidationError(
+                {'genre': ['Укажите либо категорию, либо жанр']}
+            )
+        for name, model in scoped:
+            obj = get_table(model).snapshot().by_slug.get(params[name])
+            if obj is None:
+                return TitleRanking.objects.none()
+            scope, scope_id = name, obj.pk
+        return TitleRanking.objects.filter(
+            board=self.kwargs['board'], scope=scope, scope_id=scope_id
+        )
+
+
+class ReviewViewSet(ConditionalGetMixin, FastListMixin, SparseQuerysetMixin,
+                    ModelViewSet):
+    read_from_replica = True
     serializer_class = ReviewSerializer
+    fast_serializer_class = FastReviewSerializer
     permission_classes = (AdminModeratorAuthorOrReadOnly, )
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
         title = get_object_or_404(
             Title,
             id=self.kwargs.get('title_id')
         )
-        return title.reviews.all()
+        return title.reviews.select_related('author')
+
+    def get_version_stamp(self):
+        return collection_stamp(
+            Title.objects.filter(pk=self.kwargs.get('title_id')),
+            'reviews', self.kwargs.get('pk')
+        )
 
     def perform_create(self, serializer):
         title = get_object_or_404(
             Title,
             id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=get_user(self.request.user), title=title)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, FastListMixin, SparseQuerysetMixin,
+                     ModelViewSet):
+    read_from_replica = True
     serializer_class = CommentSerializer
+    fast_serializer_class = FastCommentSerializer
     permission_classes = (AdminModeratorAuthorOrReadOnly, )
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
         review = get_object_or_404(
@@ -168,7 +347,16 @@ class CommentViewSet(ModelViewSet):
             id=self.kwargs.get('review_id'),
             title__id=self.kwargs.get('title_id')
         )
-        return review.comments.all()
+        return review.comments.select_related('author')
+
+    def get_version_stamp(self):
+        return collection_stamp(
+            Review.objects.filter(
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            ),
+            'comments', self.kwargs.get('pk')
+        )
 
     def perform_create(self, serializer):
         review = get_object_or_404(
@@ -176,4 +364,4 @@ class CommentViewSet(ModelViewSet):
             id=self.kwargs.get('review_id'),
             title__id=self.kwargs.get('title_id')
         )
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=get_user(self.request.user), review=review)
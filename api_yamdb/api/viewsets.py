@@ -1,6 +1,9 @@
+from django.utils.functional import cached_property
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 
+from .serializers import get_sparse_fields
+
 
 class CreateListDestroyViewSet(mixins.CreateModelMixin,
                                mixins.ListModelMixin,
@@ -12,3 +15,47 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     To use it, override the class and set the `.queryset` and
     `.serializer_class` attributes.
     """
+
+
+def narrow_queryset(queryset, fields):
+    """
+    Defers the columns of the model that no field out of `fields` shows
+    and drops the joins and prefetches of the relations left out. Fields
+    of the serializer are named after the model fields they show.
+    """
+    if fields is None:
+        return queryset
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        related = [name for name in select_related if name in fields]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if getattr(lookup, 'prefetch_through', lookup).split('__')[0]
+        in fields
+    ]
+    queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+    return queryset.defer(*(
+        field.name for field in queryset.model._meta.concrete_fields
+        if not field.primary_key and field.name not in fields
+    ))
+
+
+class SparseQuerysetMixin:
+    """
+    Reads only what the `?fields=` and `?exclude=` parameters of a safe
+    request leave in the output of the serializer (see SparseFieldsMixin).
+    """
+
+    @cached_property
+    def sparse_fields(self):
+        return get_sparse_fields(
+            self.request, self.get_serializer_class().Meta.fields
+        )
+
+    def filter_queryset(self, queryset):
+        return narrow_queryset(
+            super().filter_queryset(queryset), self.sparse_fields
+        )
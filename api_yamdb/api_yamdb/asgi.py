@@ -0,0 +1,9 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Route the hot read endpoints to coroutine views, see api.async_views.
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
+
+application = get_asgi_application()
@@ -26,6 +26,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replica.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -56,6 +60,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Set by asgi.py: serve the hot read endpoints with coroutine views.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', '') == '1'
+
 
 DATABASES = {
     'default': {
@@ -68,6 +75,105 @@ DATABASES = {
     }
 }
 
+# DB_POOL=1 switches to the pooling wrapper of the same backend, see dbpool.
+if os.getenv('DB_POOL', '') == '1':
+    DATABASES['default']['ENGINE'] = DATABASES['default']['ENGINE'].replace(
+        'django.db.backends.', 'dbpool.'
+    )
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        'HEALTH_CHECK_INTERVAL': float(
+            os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)
+        ),
+    }
+
+# Read replicas of the primary, e.g. DB_REPLICA_HOSTS=replica1,replica2.
+# Safe requests of the catalog views read from them, see api.replica.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['api.replica.ReplicaRouter']
+# Clients read from the primary for this long after writing.
+REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Anonymous read responses, see api.cache. The file-based backend is
+    # shared by all gunicorn workers on a host, so a write in one worker
+    # invalidates the responses cached by the others. Another backend must
+    # be shared by the workers as well and increment atomically.
+    'api': {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND', 'api.cache_backends.AtomicFileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'API_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'api')
+        ),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Current token versions of the users, see api.authentication. Kept
+    # apart from the responses, so their churn does not cull them.
+    'token_versions': {
+        'BACKEND': os.getenv(
+            'TOKEN_VERSIONS_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'TOKEN_VERSIONS_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'token_versions')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('TOKEN_VERSIONS_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Throttling counters, see api.throttling. Shared by the workers of a
+    # host and incremented atomically; point it at memcached or redis to
+    # share the limits between hosts.
+    'throttle': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND', 'api.cache_backends.AtomicFileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'THROTTLE_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'throttle')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('THROTTLE_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Clients with a token that wrote recently, see api.replica. Kept apart
+    # from the responses, so their churn does not cull the pins.
+    'replica_pins': {
+        'BACKEND': os.getenv(
+            'REPLICA_PINS_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'REPLICA_PINS_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'replica_pins')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('REPLICA_PINS_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,17 +214,49 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_ADMIN = 'admin@ya.ru'
 
+# Signup emails go through the outbox (reviews.outbox). They are delivered
+# by `manage.py deliver_emails --loop` or, with EMAIL_OUTBOX_THREADS > 0,
+# by background threads of the web process.
+EMAIL_OUTBOX_THREADS = int(os.getenv('EMAIL_OUTBOX_THREADS', 0))
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteRateThrottle',
+        'api.throttling.AnonReadRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': os.getenv('THROTTLE_AUTH_RATE', '10/min') or None,
+        'writes': os.getenv('THROTTLE_WRITES_RATE', '60/min') or None,
+        'anon_reads': os.getenv('THROTTLE_ANON_READS_RATE', '300/min') or None,
+    },
+    # Client addresses for throttling come from the last X-Forwarded-For
+    # entry, set by nginx (infra/nginx/default.conf); earlier entries are
+    # client-controlled.
+    'NUM_PROXIES': 1,
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
 }
@@ -126,4 +264,67 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'api.authentication.RoleTokenUser',
 }
+
+# Throttling counters shared by the workers, see api.throttling.
+THROTTLE_STORE = {
+    'BACKEND': os.getenv(
+        'THROTTLE_STORE_BACKEND', 'api.throttling.CacheCounterStore'
+    ),
+    'ALIAS': os.getenv('THROTTLE_STORE_ALIAS', 'throttle'),
+}
+
+# Decoded access tokens kept in memory by each process.
+JWT_TOKEN_CACHE_SIZE = int(os.getenv('JWT_TOKEN_CACHE_SIZE', 1024))
+# Seconds a token version stays cached: the longest a revoked token can
+# still pass if a concurrent request cached the old version.
+JWT_TOKEN_VERSION_TIMEOUT = int(os.getenv('JWT_TOKEN_VERSION_TIMEOUT', 60))
+
+# Request metrics, see api.metrics: the share of requests measured (0 turns
+# measuring off), the directory where workers share their histograms (one
+# per host: files are named by PID and dropped once the process is gone) and
+# the token required by /metrics (empty - the endpoint is closed).
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1))
+METRICS_DIR = os.getenv('METRICS_DIR', BASE_DIR / 'cache' / 'metrics')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Slow-query capture, see api.slow_queries. Queries slower than the
+# threshold (milliseconds, empty - off) are kept with their EXPLAIN plan in
+# a buffer of each worker and in a rotating log shared by the workers.
+SLOW_QUERY_THRESHOLD_MS = (
+    float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    if os.getenv('SLOW_QUERY_THRESHOLD_MS', '200') else None
+)
+SLOW_QUERY_EXPLAIN = True
+# EXPLAIN ANALYZE runs every captured SELECT a second time inside the
+# request, which doubles the latency of the requests that are already slow.
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', '') == '1'
+# Emails and confirmation codes: captured without parameters and plan.
+SLOW_QUERY_REDACT_TABLES = ['reviews_user', 'reviews_outgoingemail']
+SLOW_QUERY_BUFFER_SIZE = 100
+SLOW_QUERY_LOG = {
+    'PATH': os.getenv(
+        'SLOW_QUERY_LOG_PATH', BASE_DIR / 'logs' / 'slow_queries.log'
+    ),
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 3,
+}
+
+# JSON through orjson when it is installed, see api.renderers.
+FAST_JSON = os.getenv('FAST_JSON', '1') == '1'
+
+# Responses from this size (bytes) on are compressed with brotli, when the
+# package is installed, or gzip; see api.compression.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Title leaderboards, see reviews.leaderboards. Rebuilt every
+# LEADERBOARD_REFRESH_INTERVAL seconds by `refresh_leaderboards --loop`.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_MIN_REVIEWS = 10
+LEADERBOARD_TRENDING_DAYS = 7
+LEADERBOARD_REFRESH_INTERVAL = int(
+    os.getenv('LEADERBOARD_REFRESH_INTERVAL', 600)
+)
@@ -0,0 +1,9 @@
+"""
+Connection-pooling database backends.
+
+`dbpool.postgresql` and `dbpool.sqlite3` wrap Django's backends of the
+same name: closing a connection at the end of a request returns it to a
+per-process pool (dbpool.pool.ConnectionPool) instead of closing it, and
+the next request checks it out without a new handshake. The pool is set
+up by the POOL dict of the database settings.
+"""
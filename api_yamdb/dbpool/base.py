@@ -0,0 +1,112 @@
+import os
+import threading
+
+from .pool import ConnectionPool
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5.0,
+    'MAX_LIFETIME': 1800.0,
+    'HEALTH_CHECK_INTERVAL': 30.0,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(key, factory):
+    """The pool of `key` in this process; forked workers start empty."""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def pool_stats():
+    """Counters of the pools of this process by database alias."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {
+        f'{alias}:{name}' if name else alias: pool.as_dict()
+        for (alias, name), pool in pools
+    }
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Takes connections from a pool in get_new_connection() and gives them
+    back in _close(). Django closes connections at the end of requests,
+    so keep CONN_MAX_AGE at 0 and size the pool with POOL instead.
+    """
+    pool_check_sql = 'SELECT 1'
+
+    def pool_key(self):
+        # Test databases and the maintenance database of PostgreSQL share
+        # the alias but not the name.
+        return self.alias, self.settings_dict['NAME']
+
+    def get_connection_pool(self, conn_params):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(self.pool_key(), lambda: ConnectionPool(
+            connect=lambda: super(
+                PooledDatabaseWrapperMixin, self
+            ).get_new_connection(conn_params),
+            check=self.check_pooled_connection,
+            reset=self.reset_pooled_connection,
+            close=lambda raw: raw.close(),
+            min_size=options['MIN_SIZE'],
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            max_lifetime=options['MAX_LIFETIME'],
+            health_check_interval=options['HEALTH_CHECK_INTERVAL'],
+        ))
+
+    def get_new_connection(self, conn_params):
+        pool = self.connection_pool = self.get_connection_pool(conn_params)
+        if pool.size < pool.min_size:
+            pool.fill()
+        return pool.checkout()
+
+    def check_pooled_connection(self, raw):
+        cursor = raw.cursor()
+        try:
+            cursor.execute(self.pool_check_sql)
+        finally:
+            cursor.close()
+
+    def reset_pooled_connection(self, raw):
+        """
+        Ends whatever transaction a returned connection was left in.
+        Drivers without `in_transaction` are rolled back unconditionally,
+        which DB-API allows outside of a transaction too.
+        """
+        if getattr(raw, 'in_transaction', True):
+            raw.rollback()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = getattr(self, 'connection_pool', None)
+        # A connection closed inside atomic() stays referenced by this
+        # wrapper until the block exits, it cannot go back to the pool.
+        broken = self.in_atomic_block or (
+            self.errors_occurred and not self.is_usable()
+        )
+        with self.wrap_database_errors:
+            if pool is None:
+                return super()._close()
+            pool.checkin(self.connection, discard=broken)
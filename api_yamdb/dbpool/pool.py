@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class PoolStats:
+    """Counters of one pool, updated under the pool lock."""
+    FIELDS = (
+        'checkouts', 'waits', 'wait_time', 'timeouts', 'created', 'closed',
+        'expired', 'health_check_failures', 'discarded',
+    )
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class PooledConnection:
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections of one process.
+
+    `connect` opens a raw connection, `check` raises if a connection is
+    broken, `reset` brings a returned connection back to a clean state and
+    `close` closes it. Checkouts reuse the most recently returned
+    connection, health-check connections idle for `health_check_interval`
+    seconds, replace connections older than `max_lifetime` and wait up to
+    `timeout` seconds when `max_size` connections are in use.
+    """
+
+    def __init__(self, connect, check, reset, close, min_size=0,
+                 max_size=10, timeout=5.0, max_lifetime=None,
+                 health_check_interval=30.0):
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.close_raw = close
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.in_use = {}
+        self.size = 0
+        self.stats = PoolStats()
+
+    def is_expired(self, entry, now):
+        return (
+            self.max_lifetime is not None
+            and now - entry.created_at >= self.max_lifetime
+        )
+
+    def checkout(self):
+        while True:
+            entry = self.acquire()
+            if entry is None:
+                return self.open()
+            now = time.monotonic()
+            if now - entry.last_used < self.health_check_interval:
+                return self.lend(entry)
+            try:
+                self.check(entry.raw)
+            except Exception:
+                with self.condition:
+                    self.stats.health_check_failures += 1
+                self.discard(entry)
+                continue
+            return self.lend(entry)
+
+    def acquire(self):
+        """An idle connection, or None when a new one may be opened."""
+        deadline = None
+        waited = False
+        with self.condition:
+            self.stats.checkouts += 1
+            started = time.monotonic()
+            while True:
+                while self.idle:
+                    entry = self.idle.pop()
+                    if self.is_expired(entry, time.monotonic()):
+                        self.stats.expired += 1
+                        self.size -= 1
+                        self.close_entry(entry)
+                        continue
+                    self.record_wait(waited, started)
+                    return entry
+                if self.size < self.max_size:
+                    self.size += 1
+                    self.record_wait(waited, started)
+                    return None
+                if deadline is None:
+                    deadline = started + self.timeout
+                    waited = True
+                    self.stats.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available within '
+                        f'{self.timeout}s ({self.max_size} in use)'
+                    )
+                self.condition.wait(remaining)
+
+    def record_wait(self, waited, started):
+        if waited:
+            self.stats.wait_time += time.monotonic() - started
+
+    def open(self):
+        try:
+            raw = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        entry = PooledConnection(raw)
+        with self.condition:
+            self.stats.created += 1
+        return self.lend(entry)
+
+    def lend(self, entry):
+        with self.condition:
+            self.in_use[id(entry.raw)] = entry
+        return entry.raw
+
+    def checkin(self, raw, discard=False):
+        """Returns a connection taken by checkout()."""
+        with self.condition:
+            entry = self.in_use.pop(id(raw), None)
+        if entry is None:
+            self.close_raw(raw)
+            return
+        if not discard:
+            try:
+                self.reset(raw)
+            except Exception:
+                discard = True
+        now = time.monotonic()
+        if discard or self.is_expired(entry, now):
+            if not discard:
+                with self.condition:
+                    self.stats.expired += 1
+            self.discard(entry)
+            return
+        entry.last_used = now
+        with self.condition:
+            self.idle.append(entry)
+            self.condition.notify()
+
+    def discard(self, entry):
+        with self.condition:
+            self.size -= 1
+            self.stats.discarded += 1
+            self.condition.notify()
+        self.close_entry(entry)
+
+    def close_entry(self, entry):
+        # May run under the lock (the condition wraps an RLock): closing
+        # a connection only sends a terminate message.
+        try:
+            self.close_raw(entry.raw)
+        except Exception:
+            pass
+        with self.condition:
+            self.stats.closed += 1
+
+    def fill(self):
+        """Opens connections up to `min_size`."""
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            raw = self.open()
+            self.checkin(raw)
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+            self.size -= len(idle)
+        for entry in idle:
+            self.close_entry(entry)
+
+    def as_dict(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': len(self.in_use),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self.stats.as_dict(),
+            }
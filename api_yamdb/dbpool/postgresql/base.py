@@ -0,0 +1,26 @@
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from ..base import PooledDatabaseWrapperMixin
+from .creation import DatabaseCreation
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        # Set by Django on fresh connections only, see the base class.
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def reset_pooled_connection(self, raw):
+        if raw.closed:
+            raise extensions.OperationalError('connection is closed')
+        status = raw.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            raise extensions.OperationalError('connection is broken')
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            raw.rollback()
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from ..base import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep DROP DATABASE from running.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,9 @@
+# Read by gunicorn from the working directory.
+
+
+def post_worker_init(worker):
+    # Outbox threads belong to the worker processes: started in the
+    # master, they would not survive the fork. Messages left from before
+    # a restart go out without waiting for the next signup.
+    from reviews.outbox import start_worker
+    start_worker()
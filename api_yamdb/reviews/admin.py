@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Review, User
+from .models import OutgoingEmail, Review, User
 
 
 @admin.register(Review)
@@ -13,3 +13,12 @@ class ReviewAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'created',
+                    'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email',)
+    readonly_fields = ('attempts', 'last_error', 'created', 'sent_at')
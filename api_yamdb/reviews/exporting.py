@@ -0,0 +1,112 @@
+"""
+Streaming export of the catalog tables, the inverse of reviews.importing.
+
+Tables are walked in keyset batches over `id`, so memory use does not
+depend on table size, and written in the CSV layout `csv_to_db` reads
+or as newline-delimited JSON.
+"""
+import csv
+import datetime
+import gzip
+import io
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+
+from .importing import TABLES_BY_NAME
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision so exports round-trip exactly."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+encoder = ExportEncoder(ensure_ascii=False)
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (str, int, float)):
+        return value
+    return encoder.default(value)
+
+
+def iter_batches(table, chunk_size=DEFAULT_CHUNK_SIZE,
+                 using=DEFAULT_DB_ALIAS):
+    """Lists of value tuples in CSV column order, batch by batch."""
+    attnames = list(table.columns.values())
+    queryset = table.model.objects.using(using).order_by('id').values_list(
+        *attnames
+    )
+    id_index = attnames.index('id')
+    last_id = None
+    while True:
+        batch = queryset if last_id is None else queryset.filter(
+            id__gt=last_id
+        )
+        rows = list(batch[:chunk_size].iterator(chunk_size=chunk_size))
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][id_index]
+
+
+def iter_csv(table, **kwargs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(table.columns)
+    for rows in iter_batches(table, **kwargs):
+        writer.writerows(map(to_text, row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(table, **kwargs):
+    headers = list(table.columns)
+    for rows in iter_batches(table, **kwargs):
+        yield ''.join(
+            encoder.encode(dict(zip(headers, row))) + '\n' for row in rows
+        )
+
+
+def iter_export(name, fmt='csv', **kwargs):
+    """Text chunks of a table export."""
+    table = TABLES_BY_NAME[name]
+    if fmt == 'ndjson':
+        return iter_ndjson(table, **kwargs)
+    return iter_csv(table, **kwargs)
+
+
+def iter_gzip(chunks):
+    """Gzip-compresses a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_file(name, path, fmt='csv', compress=False, **kwargs):
+    """Writes a table export next to the other tables, returns its path."""
+    file_path = path / f'{name}.{fmt}{".gz" if compress else ""}'
+    if compress:
+        fp = gzip.open(file_path, 'wt', encoding='utf-8', newline='')
+    else:
+        fp = open(file_path, 'w', encoding='utf-8', newline='')
+    with fp:
+        for chunk in iter_export(name, fmt, **kwargs):
+            fp.write(chunk)
+    return file_path
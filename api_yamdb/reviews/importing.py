@@ -0,0 +1,500 @@
+"""
+Bulk loading of the catalog tables from CSV files.
+
+Every table is described by an `ImportTable`: the model, the mapping of
+CSV headers to model attributes and the parent tables its foreign keys
+point to. The layout matches the files read by `csv_to_db`.
+"""
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .signals import rows_imported
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class ImportTable:
+    def __init__(self, name, model, columns, foreign_keys=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.foreign_keys = foreign_keys or {}
+        self.fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        self.auto_fields = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+        ]
+
+    @property
+    def depends_on(self):
+        return set(self.foreign_keys.values())
+
+    def file_path(self, path):
+        return Path(path, f'{self.name}.csv')
+
+    def to_instance(self, row):
+        values = {}
+        for header, attname in self.columns.items():
+            if header not in row:
+                continue
+            value = row[header]
+            if value == '' and self.fields[attname].null:
+                value = None
+            values[attname] = value
+        for field in self.auto_fields:
+            # The import time stands in for missing dates.
+            if values.get(field.attname) in (None, ''):
+                values[field.attname] = timezone.now()
+        return self.model(**values)
+
+
+TABLES = (
+    ImportTable('users', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    ImportTable('category', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    ImportTable('genre', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    ImportTable('titles', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'description': 'description', 'category': 'category_id',
+    }, foreign_keys={'category_id': 'category'}),
+    ImportTable('genre_title', GenreTitle, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }, foreign_keys={'title_id': 'titles', 'genre_id': 'genre'}),
+    ImportTable('review', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }, foreign_keys={'title_id': 'titles', 'author_id': 'users'}),
+    ImportTable('comments', Comment, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }, foreign_keys={'review_id': 'review', 'author_id': 'users'}),
+)
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+def read_csv(file_path):
+    """Yields the rows of a CSV file one by one as dicts."""
+    with open(file_path, encoding='utf-8-sig', newline='') as fp:
+        yield from csv.DictReader(fp, delimiter=',', quotechar='"')
+
+
+def reset_sequences(model, using=DEFAULT_DB_ALIAS):
+    """Moves the id sequence past explicitly inserted ids."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class LoadResult:
+    """
+    Rows read from the source and rows actually inserted; the rest were
+    skipped for missing parents or ids already present.
+    """
+
+    def __init__(self, table, rows=0, inserted=0, elapsed=0.0):
+        self.table = table
+        self.rows = rows
+        self.inserted = inserted
+        self.elapsed = elapsed
+
+    @property
+    def skipped(self):
+        return self.rows - self.inserted
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else float('inf')
+
+    def __str__(self):
+        return (
+            f'{self.table}: {self.rows} rows in {self.elapsed:.2f}s '
+            f'({self.rows_per_second:.0f} rows/s), {self.inserted} '
+            f'inserted, {self.skipped} skipped'
+        )
+
+
+class InsertedRowCounter:
+    """
+    Execute wrapper adding up the rowcount of INSERT statements:
+    bulk_create with ignore_conflicts does not tell which rows went in.
+    """
+
+    def __init__(self):
+        self.inserted = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if sql.lstrip().upper().startswith('INSERT'):
+            self.inserted += max(context['cursor'].rowcount, 0)
+        return result
+
+
+class BulkLoader:
+    """
+    Streams rows into a table with batched `bulk_create` in a single
+    transaction. Foreign keys are checked against the ids of the parent
+    tables loaded into memory up front, rows with missing parents are
+    skipped. Existing ids are left untouched, so re-runs are idempotent.
+
+    `pub_date` keeps the value from the file, see PublicationDateField.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+
+    def load_parent_ids(self, table):
+        return {
+            attname: set(
+                TABLES_BY_NAME[parent].model.objects.using(self.using)
+                .values_list('id', flat=True).iterator()
+            )
+            for attname, parent in table.foreign_keys.items()
+        }
+
+    def valid_instances(self, table, rows, result):
+        parent_ids = self.load_parent_ids(table)
+        for row in rows:
+            result.rows += 1
+            instance = table.to_instance(row)
+            if all(
+                getattr(instance, attname) is None
+                or int(getattr(instance, attname)) in ids
+                for attname, ids in parent_ids.items()
+            ):
+                yield instance
+
+    def load(self, table, rows):
+        result = LoadResult(table.name)
+        started = time.monotonic()
+        manager = table.model._base_manager.db_manager(self.using)
+        counter = InsertedRowCounter()
+        with transaction.atomic(using=self.using):
+            instances = self.valid_instances(table, rows, result)
+            with connections[self.using].execute_wrapper(counter):
+                while True:
+                    batch = list(islice(instances, self.batch_size))
+                    if not batch:
+                        break
+                    manager.bulk_create(
+                        batch, batch_size=self.batch_size,
+                        ignore_conflicts=True,
+                    )
+            result.inserted = counter.inserted
+            reset_sequences(table.model, self.using)
+        result.elapsed = time.monotonic() - started
+        rows_imported.send(sender=table.model, using=self.using)
+        return result
+
+    def load_file(self, table, file_path):
+        return self.load(table, read_csv(file_path))
+
+    def load_files(self, names, path):
+        for name in names:
+            table = TABLES_BY_NAME[name]
+            yield self.load_file(table, table.file_path(path))
+
+
+class IteratorFile:
+    """Read-only file object over an iterator of strings, for COPY."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class CsvLineWriter:
+    def __init__(self):
+        self.line = None
+
+    def write(self, line):
+        self.line = line
+
+
+def csv_lines(headers, rows):
+    writer_target = CsvLineWriter()
+    writer = csv.writer(writer_target)
+    for row in rows:
+        writer.writerow(row.get(header, '') for header in headers)
+        yield writer_target.line
+
+
+class CopyLoader:
+    """
+    PostgreSQL loader: `COPY FROM STDIN` into an untyped temporary staging
+    table, then a single `INSERT ... SELECT` casting the values, dropping
+    rows whose parents do not exist and skipping ids already present.
+    Missing `auto_now` dates get the import time, as with BulkLoader.
+
+    Foreign keys are checked at commit (Django creates them DEFERRABLE).
+    With `rebuild_indexes` secondary indexes of the table are dropped for
+    the merge and recreated afterwards, which is faster for large loads.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, rebuild_indexes=False):
+        self.using = using
+        self.rebuild_indexes = rebuild_indexes
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def staging_table(self, table):
+        return f'staging_{table.model._meta.db_table}'
+
+    def column_expression(self, table, field, header):
+        connection = self.connection
+        value = f'staging.{connection.ops.quote_name(header)}'
+        if field in table.auto_fields:
+            # The import time stands in for missing dates, as in
+            # ImportTable.to_instance().
+            return (
+                f"COALESCE(NULLIF({value}, '')::"
+                f"{field.cast_db_type(connection)}, now())"
+            )
+        if field.null:
+            value = f"NULLIF({value}, '')"
+        elif field.empty_strings_allowed:
+            value = f"COALESCE({value}, '')"
+        return f'({value})::{field.cast_db_type(connection)}'
+
+    def merge_sql(self, table, headers):
+        """INSERT ... SELECT from staging, with params for absent fields."""
+        quote = self.connection.ops.quote_name
+        columns, values, params = [], [], []
+        for header in headers:
+            field = table.fields[table.columns[header]]
+            columns.append(quote(field.column))
+            values.append(self.column_expression(table, field, header))
+        for field in table.model._meta.concrete_fields:
+            if (
+                quote(field.column) in columns or field.null
+                or field.primary_key
+            ):
+                continue
+            columns.append(quote(field.column))
+            if field in table.auto_fields:
+                values.append('now()')
+                continue
+            if not field.has_default() and not field.empty_strings_allowed:
+                raise ValueError(
+                    f'{table.name}: missing required column for {field.name}'
+                )
+            values.append(f'%s::{field.cast_db_type(self.connection)}')
+            params.append(field.get_db_prep_save(
+                field.get_default(), self.connection
+            ))
+        conditions = []
+        for attname, parent in table.foreign_keys.items():
+            header = next(
+                header for header in headers
+                if table.columns[header] == attname
+            )
+            parent_table = TABLES_BY_NAME[parent].model._meta.db_table
+            conditions.append(
+                f"(NULLIF(staging.{quote(header)}, '') IS NULL OR "
+                f"NULLIF(staging.{quote(header)}, '')::bigint "
+                f"IN (SELECT id FROM {quote(parent_table)}))"
+            )
+        where = ' AND '.join(conditions) or 'TRUE'
+        sql = (
+            f'INSERT INTO {quote(table.model._meta.db_table)} '
+            f'({", ".join(columns)}) '
+            f'SELECT {", ".join(values)} '
+            f'FROM {quote(self.staging_table(table))} AS staging '
+            f'WHERE {where} ON CONFLICT DO NOTHING'
+        )
+        return sql, params
+
+    def secondary_indexes(self, cursor, table):
+        cursor.execute(
+            '''
+            SELECT index.relname, pg_get_indexdef(pg_index.indexrelid)
+            FROM pg_index
+            JOIN pg_class AS index ON index.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = %s::regclass
+              AND NOT pg_index.indisprimary
+              AND NOT pg_index.indisunique
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint
+                  WHERE pg_constraint.conindid = pg_index.indexrelid
+              )
+            ''',
+            (table.model._meta.db_table,)
+        )
+        return cursor.fetchall()
+
+    def copy(self, cursor, table, headers, fp):
+        quote = self.connection.ops.quote_name
+        staging = quote(self.staging_table(table))
+        unknown = set(headers) - set(table.columns)
+        if unknown:
+            raise ValueError(
+                f'{table.name}: unknown columns {", ".join(sorted(unknown))}'
+            )
+        column_list = ', '.join(f'{quote(header)} text' for header in headers)
+        cursor.execute(f'DROP TABLE IF EXISTS {staging}')
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {staging} ({column_list}) '
+            f'ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            f'COPY {staging} ({", ".join(map(quote, headers))}) '
+            f'FROM STDIN WITH (FORMAT csv)',
+            fp
+        )
+        return cursor.rowcount
+
+    def merge(self, cursor, table, headers):
+        quote = self.connection.ops.quote_name
+        sql, params = self.merge_sql(table, headers)
+        indexes = []
+        if self.rebuild_indexes:
+            indexes = self.secondary_indexes(cursor, table)
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {quote(name)}')
+        cursor.execute(sql, params)
+        inserted = cursor.rowcount
+        for _, definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(f'ANALYZE {quote(table.model._meta.db_table)}')
+        return inserted
+
+    def load_stream(self, table, headers, fp):
+        result = LoadResult(table.name)
+        started = time.monotonic()
+        with transaction.atomic(using=self.using):
+            with self.connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+                result.rows = self.copy(cursor, table, headers, fp)
+                result.inserted = self.merge(cursor, table, headers)
+            reset_sequences(table.model, self.using)
+        result.elapsed = time.monotonic() - started
+        rows_imported.send(sender=table.model, using=self.using)
+        return result
+
+    def load(self, table, rows, headers=None):
+        """Loads an iterable of dicts keyed by CSV headers."""
+        headers = list(headers or table.columns)
+        return self.load_stream(
+            table, headers, IteratorFile(csv_lines(headers, rows))
+        )
+
+    def load_file(self, table, file_path):
+        with open(file_path, encoding='utf-8-sig', newline='') as fp:
+            headers = next(csv.reader([fp.readline()]))
+            return self.load_stream(table, headers, fp)
+
+    def load_files(self, names, path):
+        for name in names:
+            table = TABLES_BY_NAME[name]
+            yield self.load_file(table, table.file_path(path))
+
+
+def get_loader(using=DEFAULT_DB_ALIAS, copy=False, **options):
+    """COPY on PostgreSQL when asked for, batched bulk_create otherwise."""
+    if copy and connections[using].vendor == 'postgresql':
+        return CopyLoader(
+            using=using, rebuild_indexes=options.get('rebuild_indexes', False)
+        )
+    return BulkLoader(
+        batch_size=options.get('batch_size', DEFAULT_BATCH_SIZE), using=using
+    )
+
+
+def dependency_waves(names):
+    """
+    Groups tables so that each group only depends on earlier groups,
+    following the foreign keys declared in TABLES.
+    """
+    order = [table.name for table in TABLES]
+    pending = set(names)
+    while pending:
+        wave = sorted(
+            (
+                name for name in pending
+                if not TABLES_BY_NAME[name].depends_on & pending
+            ),
+            key=order.index
+        )
+        if not wave:
+            raise ValueError(f'Circular dependency between {pending}')
+        yield wave
+        pending.difference_update(wave)
+
+
+def _load_file_in_worker(name, path, using, loader_options):
+    # Connections are not shared with the parent: it closes its own
+    # before forking, and each worker opens a fresh one here.
+    loader = get_loader(using=using, **loader_options)
+    table = TABLES_BY_NAME[name]
+    try:
+        return loader.load_file(table, table.file_path(path))
+    finally:
+        connections.close_all()
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+def load_files_parallel(names, path, workers, using=DEFAULT_DB_ALIAS,
+                        **loader_options):
+    """
+    Loads independent tables concurrently in worker processes, one
+    dependency wave after another. SQLite allows a single writer, so
+    there the tables are loaded one by one in this process.
+    """
+    if workers <= 1 or connections[using].vendor == 'sqlite':
+        loader = get_loader(using=using, **loader_options)
+        for wave in dependency_waves(names):
+            for name in wave:
+                table = TABLES_BY_NAME[name]
+                yield loader.load_file(table, table.file_path(path))
+        return
+
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_setup_worker
+    ) as executor:
+        for wave in dependency_waves(names):
+            futures = [
+                executor.submit(
+                    _load_file_in_worker, name, path, using, loader_options
+                )
+                for name in wave
+            ]
+            for future in as_completed(futures):
+                yield future.result()
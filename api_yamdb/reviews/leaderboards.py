@@ -0,0 +1,128 @@
+"""
+Title leaderboards, materialized in TitleRanking.
+
+The top board ranks titles by a Bayesian average: the mean score of a
+title pulled towards the mean score of all reviews by
+LEADERBOARD_MIN_REVIEWS virtual reviews, so that a single 10 does not
+outrank a hundred 9s. The trending board ranks titles by reviews per day
+over the last LEADERBOARD_TRENDING_DAYS (`pub_date` moves on edits, so
+edited reviews count as fresh). Each board keeps its best
+LEADERBOARD_SIZE titles overall, per category and per genre.
+
+Both scores shift with every review, and the trending window with time,
+so the boards are rebuilt as a whole by refresh(), run on a schedule by
+`manage.py refresh_leaderboards --loop`. Reads then take a page of the
+table by position.
+"""
+import datetime as dt
+import heapq
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import GenreTitle, Review, Title, TitleRanking
+from .signals import rows_imported
+
+DEFAULT_SIZE = 100
+DEFAULT_MIN_REVIEWS = 10
+DEFAULT_TRENDING_DAYS = 7
+
+
+def get_setting(name, default):
+    return getattr(settings, f'LEADERBOARD_{name}', default)
+
+
+def bayesian_average(score_sum, count, prior_mean, prior_count):
+    """Mean score with `prior_count` reviews of `prior_mean` added."""
+    return (score_sum + prior_mean * prior_count) / (count + prior_count)
+
+
+def top_scores(using, now=None):
+    titles = Title.objects.using(using).filter(reviews_count__gt=0)
+    totals = titles.aggregate(
+        score_sum=Sum('score_sum'), count=Sum('reviews_count')
+    )
+    if not totals['count']:
+        return {}
+    prior_mean = totals['score_sum'] / totals['count']
+    prior_count = get_setting('MIN_REVIEWS', DEFAULT_MIN_REVIEWS)
+    return {
+        title_id: bayesian_average(
+            score_sum, count, prior_mean, prior_count
+        )
+        for title_id, score_sum, count in titles.values_list(
+            'id', 'score_sum', 'reviews_count'
+        ).iterator()
+    }
+
+
+def trending_scores(using, now=None):
+    days = get_setting('TRENDING_DAYS', DEFAULT_TRENDING_DAYS)
+    since = (now or timezone.now()) - dt.timedelta(days=days)
+    recent = Review.objects.using(using).filter(
+        pub_date__gte=since
+    ).order_by().values_list('title_id').annotate(Count('id'))
+    return {title_id: count / days for title_id, count in recent}
+
+
+SCORES = {
+    TitleRanking.TOP: top_scores,
+    TitleRanking.TRENDING: trending_scores,
+}
+
+
+def scopes(using):
+    """Titles of every category and genre: (scope, scope_id) -> ids."""
+    members = {}
+    categories = Title.objects.using(using).exclude(
+        category=None
+    ).values_list('id', 'category_id')
+    genres = GenreTitle.objects.using(using).values_list(
+        'title_id', 'genre_id'
+    )
+    for scope, rows in (
+        (TitleRanking.CATEGORY, categories), (TitleRanking.GENRE, genres),
+    ):
+        for title_id, scope_id in rows.order_by().iterator():
+            members.setdefault((scope, scope_id), []).append(title_id)
+    return members
+
+
+def rank(board, scores, members, size):
+    members = {(TitleRanking.ALL, 0): scores, **members}
+    for (scope, scope_id), title_ids in members.items():
+        # Ties go to the older title, so positions are stable.
+        best = heapq.nlargest(
+            size, (pk for pk in title_ids if pk in scores),
+            key=lambda pk: (scores[pk], -pk)
+        )
+        for position, title_id in enumerate(best, 1):
+            yield TitleRanking(
+                board=board, scope=scope, scope_id=scope_id,
+                position=position, title_id=title_id,
+                score=scores[title_id],
+            )
+
+
+def refresh(boards=None, using=DEFAULT_DB_ALIAS, now=None):
+    """
+    Rebuilds `boards` (all by default) in one transaction.
+    Returns the number of ranked positions per board.
+    """
+    size = get_setting('SIZE', DEFAULT_SIZE)
+    members = scopes(using)
+    rankings = {
+        board: list(rank(board, SCORES[board](using, now), members, size))
+        for board in boards or SCORES
+    }
+    rows = TitleRanking.objects.using(using)
+    with transaction.atomic(using=using):
+        rows.filter(board__in=rankings).delete()
+        rows.bulk_create(
+            (row for board in rankings.values() for row in board),
+            batch_size=1000,
+        )
+        rows_imported.send(sender=TitleRanking, using=using)
+    return {board: len(ranking) for board, ranking in rankings.items()}
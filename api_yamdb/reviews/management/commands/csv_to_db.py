@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandParser
+from reviews.importing import (DEFAULT_BATCH_SIZE, BulkLoader,
+                               load_files_parallel)
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
@@ -145,17 +147,49 @@ class Command(BaseCommand):
     Fills db from csv.
     Add csv files in STATIC/data.
     Names must be similar to model names.
+    With --bulk rows are streamed and inserted in batches.
+    With --copy PostgreSQL loads them with COPY (bulk mode on SQLite),
+    --workers loads independent tables in parallel processes.
     '''
 
     def add_arguments(self, parser: CommandParser) -> None:
         choices = CsvToDb.get_avaiable_tables().append('all')
         parser.add_argument('tables', nargs='+', type=str,
                             choices=choices, default='all')
+        parser.add_argument('--path', type=Path,
+                            default=settings.BASE_DIR / 'static/data',
+                            help='Directory with csv files.')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Insert rows in batches with bulk_create.')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--copy', action='store_true',
+                            help='Load with PostgreSQL COPY via staging '
+                                 'tables.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes loading independent tables.')
+        parser.add_argument('--rebuild-indexes', action='store_true',
+                            help='Drop secondary indexes while merging '
+                                 'COPY data, recreate them afterwards.')
 
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
-        path = (settings.BASE_DIR / 'static/data')
+        path = options['path']
         if 'all' in options['tables']:
             tables = CsvToDb.get_avaiable_tables()
         else:
             tables = CsvToDb.sort_tables(options['tables'])
-        CsvToDb.parse_tables(tables, path)
+        if options['copy'] or options['workers'] > 1:
+            results = load_files_parallel(
+                tables, path, options['workers'],
+                copy=options['copy'],
+                batch_size=options['batch_size'],
+                rebuild_indexes=options['rebuild_indexes'],
+            )
+        elif options['bulk']:
+            loader = BulkLoader(batch_size=options['batch_size'])
+            results = loader.load_files(tables, path)
+        else:
+            CsvToDb.parse_tables(tables, path)
+            return
+        for result in results:
+            self.stdout.write(str(result))
@@ -0,0 +1,44 @@
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from reviews.exporting import DEFAULT_CHUNK_SIZE, FORMATS, export_file
+from reviews.importing import TABLES, TABLES_BY_NAME
+
+
+class Command(BaseCommand):
+    help = '''
+    Dumps db tables into files readable by csv_to_db.
+    Writes to STATIC/data unless --path is given.
+    '''
+    default_format = 'csv'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('tables', nargs='+', type=str,
+                            choices=[*TABLES_BY_NAME, 'all'])
+        parser.add_argument('--path', type=Path,
+                            default=settings.BASE_DIR / 'static/data')
+        parser.add_argument('--format', choices=FORMATS,
+                            default=self.default_format)
+        parser.add_argument('--gzip', action='store_true',
+                            help='Compress the files with gzip.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if 'all' in options['tables']:
+            tables = [table.name for table in TABLES]
+        else:
+            tables = options['tables']
+        options['path'].mkdir(parents=True, exist_ok=True)
+        for name in tables:
+            started = time.monotonic()
+            file_path = export_file(
+                name, options['path'], fmt=options['format'],
+                compress=options['gzip'], chunk_size=options['chunk_size']
+            )
+            self.stdout.write(
+                f'{name}: {file_path} in {time.monotonic() - started:.2f}s'
+            )
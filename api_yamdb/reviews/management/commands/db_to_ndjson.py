@@ -0,0 +1,9 @@
+from .db_to_csv import Command as DbToCsvCommand
+
+
+class Command(DbToCsvCommand):
+    help = '''
+    Dumps db tables as newline-delimited JSON.
+    Writes to STATIC/data unless --path is given.
+    '''
+    default_format = 'ndjson'
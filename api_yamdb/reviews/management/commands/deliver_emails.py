@@ -0,0 +1,50 @@
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews import outbox
+
+
+class Command(BaseCommand):
+    help = '''
+    Sends the emails waiting in the outbox.
+    With --loop keeps polling the outbox, with --status only reports
+    the queue depth.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=outbox.get_setting(
+                'BATCH_SIZE', outbox.DEFAULT_BATCH_SIZE
+            ),
+            help='Messages sent over one connection.'
+        )
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep delivering until interrupted.')
+        parser.add_argument(
+            '--interval', type=float,
+            default=outbox.get_setting('POLL_INTERVAL', 5),
+            help='Seconds between polls with --loop.'
+        )
+        parser.add_argument('--status', action='store_true',
+                            help='Only print the queue depth.')
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['status']:
+            depth = outbox.queue_depth()
+            self.stdout.write(
+                f'pending: {depth["pending"]}, failed: {depth["failed"]}, '
+                f'oldest pending: {depth["oldest_pending_age"]:.0f}s'
+            )
+            return
+        while True:
+            sent, failed = outbox.deliver_pending(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    f'Sent {sent} emails via {settings.EMAIL_BACKEND}, '
+                    f'{failed} failed'
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,79 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+from reviews.importing import (DEFAULT_BATCH_SIZE, TABLES_BY_NAME,
+                               dependency_waves, get_loader)
+from reviews.models import Title
+from reviews.synthetic import TABLE_NAMES, Dataset, top_share
+
+SIZE_OPTIONS = {
+    'users': 'users', 'categories': 'category', 'genres': 'genre',
+    'titles': 'titles', 'reviews': 'review', 'comments': 'comments',
+}
+
+
+class Command(BaseCommand):
+    help = '''
+    Fills db with a synthetic catalog for scale testing. Scale 1 is 10k
+    users, 1k titles, 100k reviews and 500k comments; the same --seed and
+    sizes always give the same rows. Rows go through the bulk loader,
+    or COPY on PostgreSQL with --copy, which is the way for big scales.
+    Run it on an empty database: rows with taken ids are skipped.
+    '''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('tables', nargs='*', type=str,
+                            choices=TABLE_NAMES + ['all'], default='all')
+        parser.add_argument('--scale', type=float, default=0.1,
+                            help='Multiplier of the default table sizes.')
+        parser.add_argument('--seed', type=int, default=0)
+        for option, table in SIZE_OPTIONS.items():
+            parser.add_argument(f'--{option}', type=int, dest=table,
+                                metavar='N',
+                                help=f'Exact size of {table}, overrides '
+                                     f'--scale.')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--copy', action='store_true',
+                            help='Load with PostgreSQL COPY via staging '
+                                 'tables.')
+        parser.add_argument('--rebuild-indexes', action='store_true',
+                            help='Drop secondary indexes while merging '
+                                 'COPY data, recreate them afterwards.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only print the row counts.')
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        dataset = Dataset(
+            seed=options['seed'], scale=options['scale'],
+            **{table: options[table] for table in SIZE_OPTIONS.values()}
+        )
+        counts = dataset.counts()
+        self.stdout.write(', '.join(
+            f'{name}: {counts[name]}' for name in TABLE_NAMES
+        ))
+        self.stdout.write(
+            'Top 10% of titles get {:.0%} of reviews and {:.0%} of '
+            'comments'.format(
+                top_share(dataset.reviews_per_title),
+                top_share(dataset.comments_per_title),
+            )
+        )
+        if options['dry_run']:
+            return
+        if 'all' in options['tables']:
+            names = TABLE_NAMES
+        else:
+            names = options['tables']
+        loader = get_loader(
+            copy=options['copy'], batch_size=options['batch_size'],
+            rebuild_indexes=options['rebuild_indexes'],
+        )
+        if Title.objects.exists():
+            self.stderr.write(self.style.WARNING(
+                'The database is not empty, rows with taken ids are skipped'
+            ))
+        for wave in dependency_waves(names):
+            for name in wave:
+                result = loader.load(TABLES_BY_NAME[name], dataset.rows(name))
+                self.stdout.write(str(result))
@@ -0,0 +1,17 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand
+from reviews.models import TitleFacetCount
+
+
+class Command(BaseCommand):
+    help = '''
+    Recomputes the title counts per category, genre and year behind
+    /api/v1/titles/facets/, for titles changed by bulk UPDATEs.
+    '''
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        counts = TitleFacetCount.objects.recalculate()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recalculated {counts} facet counts'
+        ))
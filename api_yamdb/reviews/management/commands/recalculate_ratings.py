@@ -0,0 +1,47 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = '''
+    Recomputes denormalized title ratings from reviews.
+    With --check only reports titles with stale aggregates.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Do not write anything, fail if aggregates are stale.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        stale = Title.objects.annotate(
+            actual_count=Count('reviews'),
+            actual_sum=Coalesce(Sum('reviews__score'), Value(0)),
+        ).exclude(
+            reviews_count=F('actual_count'),
+            score_sum=F('actual_sum'),
+        ).values_list('id', 'reviews_count', 'actual_count',
+                      'score_sum', 'actual_sum')
+
+        if options['check']:
+            stale = list(stale)
+            for title_id, count, actual_count, total, actual_sum in stale:
+                self.stdout.write(
+                    f'Title {title_id}: reviews_count {count} '
+                    f'(expected {actual_count}), score_sum {total} '
+                    f'(expected {actual_sum})'
+                )
+            if stale:
+                raise CommandError(f'{len(stale)} titles have stale ratings')
+            self.stdout.write(self.style.SUCCESS('All ratings are up to date'))
+            return
+
+        updated = Title.objects.recalculate_rating()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recalculated ratings for {updated} titles'
+        ))
@@ -0,0 +1,43 @@
+import time
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand
+from reviews import leaderboards
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    help = '''
+    Rebuilds the top and trending title leaderboards behind
+    /api/v1/leaderboards/. With --loop keeps rebuilding them every
+    --interval seconds.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board', action='append', dest='boards',
+            choices=[board for board, _ in TitleRanking.BOARDS],
+            help='Board to rebuild, may be repeated; all by default.'
+        )
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep rebuilding until interrupted.')
+        parser.add_argument(
+            '--interval', type=float,
+            default=leaderboards.get_setting('REFRESH_INTERVAL', 600),
+            help='Seconds between rebuilds with --loop.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        while True:
+            started = time.perf_counter()
+            counts = leaderboards.refresh(options['boards'])
+            self.stdout.write(self.style.SUCCESS(
+                'Refreshed leaderboards in '
+                f'{time.perf_counter() - started:.1f}s: ' + ', '.join(
+                    f'{board} {count} positions'
+                    for board, count in counts.items()
+                )
+            ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
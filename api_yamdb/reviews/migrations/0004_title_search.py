@@ -0,0 +1,46 @@
+from django.db import migrations
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE reviews_title ADD COLUMN search_vector tsvector '
+    f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED',
+    'CREATE INDEX title_search_vector_idx '
+    'ON reviews_title USING gin (search_vector)',
+    'CREATE INDEX title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+)
+
+BACKWARD_SQL = (
+    'DROP INDEX IF EXISTS title_name_trgm_idx',
+    'DROP INDEX IF EXISTS title_search_vector_idx',
+    'ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # The SQLite FTS5 index is maintained by reviews.search after
+        # every migrate instead, see setup_sqlite_fts().
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL), run_on_postgresql(BACKWARD_SQL)
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2 on 2026-10-17 06:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facet_counts(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    TitleFacetCount = apps.get_model('reviews', 'TitleFacetCount')
+    titles = Title.objects.order_by()
+    queries = (
+        ('category', titles.exclude(category=None).values_list('category_id')),
+        ('genre', GenreTitle.objects.order_by().values_list('genre_id')),
+        ('year', titles.values_list('year')),
+    )
+    TitleFacetCount.objects.bulk_create(
+        TitleFacetCount(facet=facet, value=value, count=count)
+        for facet, query in queries
+        for value, count in query.annotate(Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Категория'), ('genre', 'Жанр'), ('year', 'Год')], max_length=16, verbose_name='Фасет')),
+                ('value', models.IntegerField(help_text='id категории или жанра, год', verbose_name='Значение')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество произведений')),
+            ],
+            options={
+                'verbose_name': 'Счётчик фасета',
+                'verbose_name_plural': 'Счётчики фасетов',
+                'ordering': ('facet', 'value'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlefacetcount',
+            constraint=models.UniqueConstraint(fields=('facet', 'value'), name='unique_title_facet_value'),
+        ),
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
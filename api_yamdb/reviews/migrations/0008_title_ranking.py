@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-17 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_facet_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top', 'Лучшие'), ('trending', 'Популярные сейчас')], max_length=16, verbose_name='Рейтинг')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=16, verbose_name='Раздел')),
+                ('scope_id', models.IntegerField(help_text='id категории или жанра, 0 для всех произведений', verbose_name='id раздела')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка в рейтинге')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+                'ordering': ('board', 'scope', 'scope_id', 'position'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='titleranking',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('board', 'scope', 'scope_id', 'position'), name='unique_title_ranking_position'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# The name filter uses icontains, which PostgreSQL runs as
+# UPPER("name"::text) LIKE UPPER(%s): only an index on the same
+# expression serves it. The plain trigram index from 0004 stays for the
+# `%` operator of the full-text search.
+FORWARD_SQL = (
+    'CREATE INDEX title_name_upper_trgm_idx '
+    'ON reviews_title USING gin ((UPPER(name::text)) gin_trgm_ops)',
+)
+
+BACKWARD_SQL = (
+    'DROP INDEX IF EXISTS title_name_upper_trgm_idx',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ranking'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL), run_on_postgresql(BACKWARD_SQL)
+        ),
+    ]
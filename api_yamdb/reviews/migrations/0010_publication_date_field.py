@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-17 07:38
+
+from django.db import migrations
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_name_upper_trgm'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='pub_date',
+            field=reviews.models.PublicationDateField(auto_now=True, verbose_name='Опубликовано'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='pub_date',
+            field=reviews.models.PublicationDateField(auto_now=True, verbose_name='Опубликовано'),
+        ),
+    ]
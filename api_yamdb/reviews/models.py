@@ -1,6 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .search import get_search_backend
 
 
 class User(AbstractUser):
@@ -39,6 +43,38 @@ class User(AbstractUser):
         blank=True,
         verbose_name='Код для авторизации'
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
+
+    # Fields copied into access tokens as claims: changing any of them
+    # revokes the tokens issued before the change.
+    TOKEN_FIELDS = ('role', 'is_active', 'is_staff', 'is_superuser')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_state = instance.token_state()
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def token_state(self):
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_FIELDS
+        )
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_token_state', None)
+        if loaded is not None and loaded != self.token_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_token_state = self.token_state()
+        self._loaded_username = self.username
 
     @property
     def is_user(self):
@@ -113,6 +149,51 @@ class Genre(models.Model):
         return f'{self.name} | {self.slug}'
 
 
+class TitleQuerySet(models.QuerySet):
+    def search(self, query):
+        """Titles matching `query`, best matches first."""
+        return get_search_backend(self.db).search(self, query)
+
+    def recalculate_rating(self):
+        """
+        Recompute the denormalized rating fields from the reviews table.
+        Returns the number of updated titles.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        reviews_count = Coalesce(
+            Subquery(reviews.annotate(c=models.Count('id')).values('c')),
+            Value(0)
+        )
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(s=models.Sum('score')).values('s')),
+            Value(0)
+        )
+        return self.update(
+            reviews_count=reviews_count,
+            score_sum=score_sum,
+            rating=(
+                Cast(score_sum, FloatField())
+                / NullIf(reviews_count, Value(0))
+            ),
+        )
+
+    def add_score(self, score_delta, count_delta):
+        """
+        Shift the rating aggregates in place with a single UPDATE,
+        so concurrent reviews of the same title do not lose updates.
+        """
+        return self.update(
+            score_sum=F('score_sum') + score_delta,
+            reviews_count=F('reviews_count') + count_delta,
+            rating=(
+                Cast(F('score_sum') + score_delta, FloatField())
+                / NullIf(F('reviews_count') + count_delta, Value(0))
+            ),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(
         'Название произведения',
@@ -141,6 +222,40 @@ class Title(models.Model):
         Genre,
         through='GenreTitle',
         related_name='genre')
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'category_id' in instance.__dict__ and 'year' in instance.__dict__:
+            instance._loaded_facets = (instance.category_id, instance.year)
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Facet counts are updated by a post_save receiver, keep them in
+        # the same transaction as the title itself.
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     class Meta:
         ordering = ('id',)
@@ -155,6 +270,12 @@ class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_genre = instance.__dict__.get('genre_id')
+        return instance
+
     class Meta:
         ordering = ('id',)
         verbose_name = 'genre_title'
@@ -170,6 +291,19 @@ class GenreTitle(models.Model):
         return f'{self.genre} | {self.title}'
 
 
+class PublicationDateField(models.DateTimeField):
+    """
+    `auto_now` that keeps a date given for a new row, so bulk imports
+    keep the dates from the file; edits always move it.
+    """
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if add and value is not None:
+            return value
+        return super().pre_save(model_instance, add)
+
+
 class Review(models.Model):
     """
     Class representing a review on Title from auth users.
@@ -191,11 +325,29 @@ class Review(models.Model):
         validators=(MinValueValidator(1), MaxValueValidator(10)),
         verbose_name='Оценка'
     )
-    pub_date = models.DateTimeField(
+    pub_date = PublicationDateField(
         auto_now=True,
         verbose_name='Опубликовано'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Title rating aggregates are updated by a post_save receiver,
+        # keep them in the same transaction as the review itself.
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('id',)
         constraints = [
@@ -203,6 +355,10 @@ class Review(models.Model):
                 fields=('author', 'title'),
                 name='unique_review')
         ]
+        indexes = [
+            models.Index(fields=('title', 'id'), name='review_title_id_idx'),
+            models.Index(fields=('pub_date',), name='review_pub_date_idx'),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
@@ -227,15 +383,214 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Автор'
     )
-    pub_date = models.DateTimeField(
+    pub_date = PublicationDateField(
         auto_now=True,
         verbose_name='Опубликовано'
     )
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('review', 'id'), name='comment_review_id_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text
+
+
+class TitleFacetCountQuerySet(models.QuerySet):
+    def shift(self, facet, value, delta):
+        """Adds `delta` to a count in place, creating its row if needed."""
+        if value is None or not delta:
+            return
+        counts = self.filter(facet=facet, value=value)
+        if counts.update(count=F('count') + delta):
+            return
+        _, created = self.get_or_create(
+            facet=facet, value=value, defaults={'count': delta}
+        )
+        if not created:
+            counts.update(count=F('count') + delta)
+
+    def recalculate(self):
+        """
+        Recompute every count from the titles.
+        Returns the number of counts.
+        """
+        titles = Title.objects.using(self.db).order_by()
+        rows = [
+            *(
+                (self.model.CATEGORY, value, count)
+                for value, count in titles.exclude(category=None)
+                .values_list('category_id').annotate(Count('id'))
+            ),
+            *(
+                (self.model.GENRE, value, count)
+                for value, count in GenreTitle.objects.using(self.db)
+                .order_by().values_list('genre_id').annotate(Count('id'))
+            ),
+            *(
+                (self.model.YEAR, value, count)
+                for value, count in titles.values_list('year')
+                .annotate(Count('id'))
+            ),
+        ]
+        with transaction.atomic(using=self.db):
+            self.model.objects.using(self.db).all().delete()
+            self.bulk_create(
+                self.model(facet=facet, value=value, count=count)
+                for facet, value, count in rows
+            )
+        return len(rows)
+
+
+class TitleFacetCount(models.Model):
+    """
+    Number of titles per category, genre and year, kept up to date by
+    the receivers in reviews.signals.
+    """
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    YEAR = 'year'
+    FACETS = (
+        (CATEGORY, 'Категория'),
+        (GENRE, 'Жанр'),
+        (YEAR, 'Год'),
+    )
+
+    facet = models.CharField('Фасет', max_length=16, choices=FACETS)
+    value = models.IntegerField(
+        'Значение',
+        help_text='id категории или жанра, год'
+    )
+    count = models.IntegerField('Количество произведений', default=0)
+
+    objects = TitleFacetCountQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('facet', 'value')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('facet', 'value'),
+                name='unique_title_facet_value'
+            ),
+        )
+        verbose_name = 'Счётчик фасета'
+        verbose_name_plural = 'Счётчики фасетов'
+
+    def __str__(self):
+        return f'{self.facet} {self.value}: {self.count}'
+
+
+class TitleRanking(models.Model):
+    """
+    Position of a title on a leaderboard, see reviews.leaderboards.
+    Every board is ranked overall and per category and genre (`scope`,
+    `scope_id` is 0 for the overall ranking).
+    """
+    TOP = 'top'
+    TRENDING = 'trending'
+    BOARDS = (
+        (TOP, 'Лучшие'),
+        (TRENDING, 'Популярные сейчас'),
+    )
+    ALL = 'all'
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    SCOPES = (
+        (ALL, 'Все произведения'),
+        (CATEGORY, 'Категория'),
+        (GENRE, 'Жанр'),
+    )
+
+    board = models.CharField('Рейтинг', max_length=16, choices=BOARDS)
+    scope = models.CharField('Раздел', max_length=16, choices=SCOPES)
+    scope_id = models.IntegerField(
+        'id раздела',
+        help_text='id категории или жанра, 0 для всех произведений'
+    )
+    position = models.PositiveIntegerField('Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField('Оценка в рейтинге')
+
+    class Meta:
+        ordering = ('board', 'scope', 'scope_id', 'position')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('board', 'scope', 'scope_id', 'position'),
+                name='unique_title_ranking_position'
+            ),
+        )
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+
+    def __str__(self):
+        return f'{self.board} {self.scope} {self.scope_id}: {self.position}'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email waiting in the outbox, see reviews.outbox.
+    `send_after` is when the message is due: a worker that claims it
+    moves it forward by a lease, a failed attempt by the retry delay.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    to_email = models.EmailField(verbose_name='Получатель')
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True
+    )
+    send_after = models.DateTimeField(verbose_name='Отправить после')
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('status', 'send_after'),
+                name='outgoing_email_due_idx'
+            ),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to_email}'
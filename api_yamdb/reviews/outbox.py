@@ -0,0 +1,230 @@
+"""
+Persistent email outbox.
+
+Requests only store an `OutgoingEmail` row; delivery happens in the
+`deliver_emails` command or in the optional in-process `OutboxWorker`
+threads (EMAIL_OUTBOX_THREADS). Due messages are claimed in batches and
+sent over one backend connection. Failed messages are retried with an
+exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached.
+"""
+import datetime as dt
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+# A claimed message becomes due again if its worker dies before
+# reporting the outcome.
+CLAIM_LEASE = dt.timedelta(minutes=5)
+
+
+def get_setting(name, default):
+    return getattr(settings, f'EMAIL_OUTBOX_{name}', default)
+
+
+def enqueue(subject, body, to_email, from_email=None):
+    """Stores a message for delivery, wakes the in-process worker."""
+    message = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_ADMIN,
+        to_email=to_email,
+        send_after=timezone.now(),
+    )
+    if get_setting('THREADS', 0):
+        transaction.on_commit(get_worker().wake)
+    return message
+
+
+def retry_delay(attempts):
+    delay = get_setting('RETRY_DELAY', 30) * 2 ** (attempts - 1)
+    max_delay = get_setting('MAX_RETRY_DELAY', 3600)
+    return dt.timedelta(seconds=min(delay, max_delay))
+
+
+def claim_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Due messages for one delivery round. Their `send_after` moves forward
+    by the lease, so concurrent workers skip them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING, send_after__lte=now
+        ).order_by('send_after', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutgoingEmail.objects.filter(
+            pk__in=[message.pk for message in batch]
+        ).update(send_after=now + CLAIM_LEASE, attempts=F('attempts') + 1)
+    for message in batch:
+        message.attempts += 1
+    return batch
+
+
+def deliver_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """Sends one batch over a single connection, returns (sent, failed)."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    sent, failures = [], []
+    backend = get_connection()
+    try:
+        backend.open()
+    except Exception as error:
+        failures = [(message, error) for message in batch]
+    else:
+        try:
+            for message in batch:
+                email = EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=message.from_email,
+                    to=[message.to_email],
+                    connection=backend,
+                )
+                try:
+                    email.send()
+                except Exception as error:
+                    failures.append((message, error))
+                else:
+                    sent.append(message.pk)
+        finally:
+            backend.close()
+
+    now = timezone.now()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=now, last_error=''
+    )
+    max_attempts = get_setting('MAX_ATTEMPTS', 5)
+    for message, error in failures:
+        logger.warning('Could not send email %s: %s', message.pk, error)
+        if message.attempts >= max_attempts:
+            changes = {'status': OutgoingEmail.FAILED}
+        else:
+            changes = {'send_after': now + retry_delay(message.attempts)}
+        OutgoingEmail.objects.filter(pk=message.pk).update(
+            last_error=repr(error), **changes
+        )
+    return len(sent), len(failures)
+
+
+def deliver_pending(batch_size=DEFAULT_BATCH_SIZE):
+    """Delivers batches until nothing is due, returns (sent, failed)."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = deliver_batch(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if sent + failed < batch_size:
+            return total_sent, total_failed
+
+
+def queue_depth():
+    """Pending messages and the age of the oldest one, in seconds."""
+    stats = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).aggregate(pending=Count('id'), oldest=Min('created'))
+    oldest = stats['oldest']
+    return {
+        'pending': stats['pending'],
+        'failed': OutgoingEmail.objects.filter(
+            status=OutgoingEmail.FAILED
+        ).count(),
+        'oldest_pending_age': (
+            (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        ),
+    }
+
+
+class OutboxWorker:
+    """
+    Background threads delivering the outbox inside the web process.
+    They are started in each server worker (see gunicorn.conf.py) or on
+    the first enqueue, poll every EMAIL_OUTBOX_POLL_INTERVAL seconds and
+    are woken right after a message is enqueued. Threads do not survive
+    a fork, so a child process starts its own.
+    """
+
+    def __init__(self, threads, poll_interval, batch_size):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.event = threading.Event()
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.workers = []
+        self.pid = None
+
+    def start(self):
+        with self.lock:
+            if self.workers and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stopped.clear()
+            self.workers = [
+                threading.Thread(
+                    target=self.run, name=f'outbox-{i}', daemon=True
+                )
+                for i in range(self.threads)
+            ]
+            for worker in self.workers:
+                worker.start()
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        self.event.set()
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.join(timeout)
+
+    def wake(self):
+        self.start()
+        self.event.set()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.event.wait(self.poll_interval)
+            self.event.clear()
+            if self.stopped.is_set():
+                break
+            try:
+                deliver_pending(self.batch_size)
+            except Exception:
+                logger.exception('Email outbox delivery failed')
+            finally:
+                close_old_connections()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker(
+                threads=get_setting('THREADS', 0),
+                poll_interval=get_setting('POLL_INTERVAL', 5),
+                batch_size=get_setting('BATCH_SIZE', DEFAULT_BATCH_SIZE),
+            )
+    return _worker
+
+
+def start_worker():
+    """Starts the threads of this process if EMAIL_OUTBOX_THREADS is set."""
+    if get_setting('THREADS', 0):
+        get_worker().start()
@@ -0,0 +1,153 @@
+"""
+Full-text search over titles.
+
+PostgreSQL keeps a generated `search_vector` column (name weighted over
+description) with a GIN index next to a trigram index on `name`, both
+created by migration 0004; the `name` filter has its own trigram index on
+`UPPER(name)` from 0009. SQLite, used for local runs, gets an external
+content FTS5 table kept in sync by triggers. The triggers are recreated
+after every `migrate`, because SQLite rebuilds a table (dropping its
+triggers) whenever a migration alters it.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TITLE_TABLE = 'reviews_title'
+FTS_TABLE = 'reviews_title_fts'
+
+SQLITE_FTS_SETUP = (
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='{TITLE_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON {TITLE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON {TITLE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, description ON {TITLE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    ''',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+class IContainsTitleSearch:
+    """Unindexed fallback for databases without full-text support."""
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+
+
+class PostgresTitleSearch:
+    match_sql = (
+        f"{TITLE_TABLE}.search_vector @@ plainto_tsquery('simple', %s) "
+        f"OR {TITLE_TABLE}.name %% %s"
+    )
+    rank_sql = (
+        f"ts_rank({TITLE_TABLE}.search_vector, "
+        f"plainto_tsquery('simple', %s)) "
+        f"+ similarity({TITLE_TABLE}.name, %s)"
+    )
+
+    def search(self, queryset, query):
+        params = (query, query)
+        return queryset.filter(
+            RawSQL(self.match_sql, params, output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(self.rank_sql, params, FloatField())
+        ).order_by('-search_rank', 'id')
+
+
+class SqliteTitleSearch:
+    match_sql = (
+        f'{TITLE_TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s)'
+    )
+    # bm25() is lower for better matches, name hits weigh ten times more.
+    rank_sql = (
+        f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TITLE_TABLE}.id)'
+    )
+
+    @staticmethod
+    def to_fts_query(query):
+        """Every word of the query as a quoted prefix term, all required."""
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+    def search(self, queryset, query):
+        fts_query = self.to_fts_query(query)
+        if not fts_query:
+            return queryset.none()
+        params = (fts_query,)
+        return queryset.filter(
+            RawSQL(self.match_sql, params, output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(self.rank_sql, params, FloatField())
+        ).order_by('-search_rank', 'id')
+
+
+def has_sqlite_fts(connection):
+    if not hasattr(connection, 'title_fts_available'):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = %s",
+                (FTS_TABLE,)
+            )
+            connection.title_fts_available = cursor.fetchone() is not None
+    return connection.title_fts_available
+
+
+def get_search_backend(using):
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresTitleSearch()
+    if connection.vendor == 'sqlite' and has_sqlite_fts(connection):
+        return SqliteTitleSearch()
+    return IContainsTitleSearch()
+
+
+def setup_sqlite_fts(using, **kwargs):
+    """post_migrate receiver creating the FTS5 index and its triggers."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            (TITLE_TABLE,)
+        )
+        if cursor.fetchone() is None:
+            return
+        try:
+            for statement in SQLITE_FTS_SETUP:
+                cursor.execute(statement)
+        except OperationalError:
+            # SQLite built without FTS5, search falls back to icontains.
+            connection.title_fts_available = False
+            return
+    connection.title_fts_available = True
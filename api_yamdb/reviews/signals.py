@@ -0,0 +1,132 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Category, GenreTitle, Review, Title, TitleFacetCount
+
+# Sent after rows were written in bulk, bypassing model signals.
+rows_imported = Signal()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    score = int(instance.score)
+    old_title_id, old_score = getattr(
+        instance, '_loaded_rating', (None, None)
+    )
+    if created:
+        Title.objects.filter(pk=instance.title_id).add_score(score, 1)
+    elif old_title_id is None or old_score is None:
+        Title.objects.filter(
+            pk__in={instance.title_id, old_title_id} - {None}
+        ).recalculate_rating()
+    elif old_title_id != instance.title_id:
+        Title.objects.filter(pk=old_title_id).add_score(-int(old_score), -1)
+        Title.objects.filter(pk=instance.title_id).add_score(score, 1)
+    elif int(old_score) != score:
+        Title.objects.filter(pk=instance.title_id).add_score(
+            score - int(old_score), 0
+        )
+    instance._loaded_rating = (instance.title_id, score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    title_id, score = getattr(
+        instance, '_loaded_rating', (instance.title_id, instance.score)
+    )
+    if title_id is None or score is None:
+        Title.objects.filter(pk=instance.title_id).recalculate_rating()
+        return
+    Title.objects.filter(pk=title_id).add_score(-int(score), -1)
+
+
+@receiver(rows_imported, sender=Review)
+def update_rating_on_reviews_import(sender, using, **kwargs):
+    Title.objects.using(using).recalculate_rating()
+
+
+@receiver(post_save, sender=Title)
+def update_facets_on_title_save(sender, instance, created, raw, using,
+                                **kwargs):
+    if raw:
+        return
+    counts = TitleFacetCount.objects.using(using)
+    facets = (instance.category_id, instance.year)
+    loaded = getattr(instance, '_loaded_facets', None)
+    if created:
+        counts.shift(TitleFacetCount.CATEGORY, instance.category_id, 1)
+        counts.shift(TitleFacetCount.YEAR, instance.year, 1)
+    elif loaded is None:
+        counts.recalculate()
+    else:
+        for facet, old, new in zip(
+            (TitleFacetCount.CATEGORY, TitleFacetCount.YEAR), loaded, facets
+        ):
+            if old != new:
+                counts.shift(facet, old, -1)
+                counts.shift(facet, new, 1)
+    instance._loaded_facets = facets
+
+
+@receiver(post_delete, sender=Title)
+def update_facets_on_title_delete(sender, instance, using, **kwargs):
+    category_id, year = getattr(
+        instance, '_loaded_facets', (instance.category_id, instance.year)
+    )
+    counts = TitleFacetCount.objects.using(using)
+    counts.shift(TitleFacetCount.CATEGORY, category_id, -1)
+    counts.shift(TitleFacetCount.YEAR, year, -1)
+
+
+@receiver(post_delete, sender=Category)
+def drop_category_facet(sender, instance, using, **kwargs):
+    # Its titles were moved to no category by an UPDATE, without signals.
+    TitleFacetCount.objects.using(using).filter(
+        facet=TitleFacetCount.CATEGORY, value=instance.pk
+    ).delete()
+
+
+@receiver(post_save, sender=GenreTitle)
+def update_facets_on_genre_title_save(sender, instance, created, raw, using,
+                                      **kwargs):
+    if raw:
+        return
+    counts = TitleFacetCount.objects.using(using)
+    loaded = getattr(instance, '_loaded_genre', None)
+    if created:
+        counts.shift(TitleFacetCount.GENRE, instance.genre_id, 1)
+    elif loaded != instance.genre_id:
+        counts.shift(TitleFacetCount.GENRE, loaded, -1)
+        counts.shift(TitleFacetCount.GENRE, instance.genre_id, 1)
+    instance._loaded_genre = instance.genre_id
+
+
+@receiver(post_delete, sender=GenreTitle)
+def update_facets_on_genre_title_delete(sender, instance, using, **kwargs):
+    # Also covers remove(), clear() and cascades: with receivers connected
+    # the rows are deleted one by one, with signals.
+    TitleFacetCount.objects.using(using).shift(
+        TitleFacetCount.GENRE, instance.genre_id, -1
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_facets_on_genres_add(sender, instance, action, reverse, pk_set,
+                                using, **kwargs):
+    # add() and set() insert the rows with bulk_create, without post_save.
+    if action != 'post_add' or not pk_set:
+        return
+    counts = TitleFacetCount.objects.using(using)
+    if reverse:
+        counts.shift(TitleFacetCount.GENRE, instance.pk, len(pk_set))
+        return
+    for genre_id in pk_set:
+        counts.shift(TitleFacetCount.GENRE, genre_id, 1)
+
+
+@receiver(rows_imported, sender=Title)
+@receiver(rows_imported, sender=GenreTitle)
+def update_facets_on_import(sender, using, **kwargs):
+    TitleFacetCount.objects.using(using).recalculate()
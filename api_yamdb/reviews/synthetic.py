@@ -0,0 +1,247 @@
+"""
+Synthetic catalog data for scale testing.
+
+A `Dataset` is defined by its table sizes and a seed, and yields the rows
+of every table in the CSV layout of reviews.importing, so they go through
+the same bulk_create and COPY loaders as the files. Each table draws from
+its own random generator seeded by the dataset seed and the table name:
+the same seed and sizes give the same rows whichever tables are generated
+and in whatever order.
+
+Titles get a Zipf-like popularity. Reviews follow it mildly and comments
+steeply, so a few titles collect most of the discussion. Scores lean
+high, around a mean drawn per title.
+"""
+import datetime as dt
+import math
+import random
+
+from django.utils.functional import cached_property
+
+from .importing import TABLES
+
+# Table sizes at scale 1. Categories and genres do not grow with scale.
+BASE_SIZES = {
+    'users': 10000,
+    'category': 10,
+    'genre': 30,
+    'titles': 1000,
+    'review': 100000,
+    'comments': 500000,
+}
+FIXED_SIZES = ('category', 'genre')
+TABLE_NAMES = [table.name for table in TABLES]
+# Exponents of the title popularity, rank ** -exponent.
+REVIEWS_SKEW = 0.8
+COMMENTS_SKEW = 1.2
+START = dt.datetime(2015, 1, 1, tzinfo=dt.timezone.utc)
+SPAN = 8 * 365 * 24 * 3600
+LAST_YEAR = 2022
+
+WORDS = (
+    'фильм', 'книга', 'история', 'автор', 'герой', 'сюжет', 'финал',
+    'актёр', 'роль', 'музыка', 'сцена', 'мир', 'время', 'жизнь', 'любовь',
+    'война', 'город', 'дорога', 'тайна', 'мечта', 'отличный', 'скучный',
+    'странный', 'яркий', 'долгий', 'новый', 'старый', 'лучший', 'слабый',
+    'неожиданный', 'очень', 'снова', 'совсем', 'почти', 'всегда', 'смотреть',
+    'читать', 'слушать', 'советую', 'понравился', 'разочаровал',
+)
+CATEGORY_NAMES = (
+    'Фильм', 'Книга', 'Музыка', 'Сериал', 'Игра', 'Спектакль', 'Комикс',
+    'Мультфильм', 'Подкаст', 'Альбом',
+)
+GENRE_NAMES = (
+    'Драма', 'Комедия', 'Триллер', 'Фантастика', 'Фэнтези', 'Детектив',
+    'Ужасы', 'Мелодрама', 'Приключения', 'Вестерн', 'Боевик', 'Рок',
+    'Джаз', 'Классика', 'Поэзия', 'Роман', 'Сказка', 'Документальный',
+    'Биография', 'Мюзикл', 'Нуар', 'Антиутопия', 'Исторический', 'Военный',
+    'Спорт', 'Аниме', 'Семейный', 'Криминал', 'Поп', 'Хип-хоп',
+)
+
+
+def scaled_sizes(scale=1.0, **sizes):
+    """Table sizes at `scale`, explicit sizes win."""
+    result = {
+        name: size if name in FIXED_SIZES else max(1, round(size * scale))
+        for name, size in BASE_SIZES.items()
+    }
+    result.update(
+        (name, size) for name, size in sizes.items() if size is not None
+    )
+    return result
+
+
+def allocate(rng, total, weights, limit=None):
+    """
+    Splits `total` by `weights` into integers; fractions are rounded at
+    random, so the sum is `total` on average.
+    """
+    weight_sum = sum(weights)
+    counts = []
+    for weight in weights:
+        share = total * weight / weight_sum if weight_sum else 0
+        count = int(share) + (rng.random() < share - int(share))
+        counts.append(min(count, limit) if limit is not None else count)
+    return counts
+
+
+def pub_date(review_id):
+    """Publication time of a review, a pure function of its id."""
+    return START + dt.timedelta(seconds=review_id * 7919 % SPAN)
+
+
+class Dataset:
+    def __init__(self, seed=0, scale=1.0, **sizes):
+        self.seed = seed
+        self.sizes = scaled_sizes(scale, **sizes)
+
+    def rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def text(self, rng, low, high):
+        return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+    @cached_property
+    def popularity(self):
+        """Popularity rank of each title, 1 being the most popular."""
+        ranks = list(range(1, self.sizes['titles'] + 1))
+        self.rng('popularity').shuffle(ranks)
+        return ranks
+
+    @cached_property
+    def reviews_per_title(self):
+        return allocate(
+            self.rng('reviews-per-title'),
+            self.sizes['review'],
+            [rank ** -REVIEWS_SKEW for rank in self.popularity],
+            # An author reviews a title once.
+            limit=self.sizes['users'],
+        )
+
+    @cached_property
+    def comments_per_title(self):
+        return allocate(
+            self.rng('comments-per-title'),
+            self.sizes['comments'],
+            [
+                rank ** -COMMENTS_SKEW if reviews else 0
+                for rank, reviews in zip(
+                    self.popularity, self.reviews_per_title
+                )
+            ],
+        )
+
+    def counts(self):
+        """Rows each table gets, which may differ from the sizes."""
+        counts = dict(self.sizes)
+        counts['review'] = sum(self.reviews_per_title)
+        counts['comments'] = sum(self.comments_per_title)
+        counts['genre_title'] = sum(1 for _ in self.genre_title_rows())
+        return counts
+
+    def rows(self, name):
+        return getattr(self, f'{name}_rows')()
+
+    def users_rows(self):
+        rng = self.rng('users')
+        for user_id in range(1, self.sizes['users'] + 1):
+            yield {
+                'id': user_id,
+                'username': f'user{user_id}',
+                'email': f'user{user_id}@example.com',
+                'role': 'moderator' if rng.random() < 0.01 else 'user',
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def named_rows(self, names, prefix, count):
+        for row_id in range(1, count + 1):
+            if row_id <= len(names):
+                name = names[row_id - 1]
+            else:
+                name = f'{names[(row_id - 1) % len(names)]} {row_id}'
+            yield {'id': row_id, 'name': name, 'slug': f'{prefix}-{row_id}'}
+
+    def category_rows(self):
+        return self.named_rows(
+            CATEGORY_NAMES, 'category', self.sizes['category']
+        )
+
+    def genre_rows(self):
+        return self.named_rows(GENRE_NAMES, 'genre', self.sizes['genre'])
+
+    def titles_rows(self):
+        rng = self.rng('titles')
+        categories = range(1, self.sizes['category'] + 1)
+        # Lower ids are more common, like a few big categories.
+        category_weights = [1 / category for category in categories]
+        for title_id in range(1, self.sizes['titles'] + 1):
+            yield {
+                'id': title_id,
+                'name': f'{self.text(rng, 1, 4).capitalize()} {title_id}',
+                'year': max(1900, LAST_YEAR - int(rng.expovariate(1 / 15))),
+                'description': self.text(rng, 10, 30),
+                'category': rng.choices(categories, category_weights)[0],
+            }
+
+    def genre_title_rows(self):
+        rng = self.rng('genre_title')
+        genres = range(1, self.sizes['genre'] + 1)
+        row_id = 0
+        for title_id in range(1, self.sizes['titles'] + 1):
+            count = min(rng.choice((1, 1, 1, 2, 2, 3)), len(genres))
+            for genre_id in sorted(rng.sample(genres, count)):
+                row_id += 1
+                yield {'id': row_id, 'title_id': title_id,
+                       'genre_id': genre_id}
+
+    def review_rows(self):
+        rng = self.rng('review')
+        bias = self.rng('title-bias')
+        users = range(1, self.sizes['users'] + 1)
+        review_id = 0
+        for title_id, count in enumerate(self.reviews_per_title, start=1):
+            mean = min(9.5, max(2.0, bias.gauss(7.0, 1.3)))
+            for author_id in rng.sample(users, count):
+                review_id += 1
+                score = round(rng.gauss(mean, 1.7))
+                yield {
+                    'id': review_id,
+                    'title_id': title_id,
+                    'text': self.text(rng, 10, 60),
+                    'author': author_id,
+                    'score': min(10, max(1, score)),
+                    'pub_date': pub_date(review_id),
+                }
+
+    def comments_rows(self):
+        rng = self.rng('comments')
+        users = self.sizes['users']
+        first_review = 1
+        comment_id = 0
+        for reviews, comments in zip(
+            self.reviews_per_title, self.comments_per_title
+        ):
+            for _ in range(comments):
+                comment_id += 1
+                review_id = first_review + rng.randrange(reviews)
+                delay = min(rng.expovariate(1 / 3), 365)
+                yield {
+                    'id': comment_id,
+                    'review_id': review_id,
+                    'text': self.text(rng, 3, 20),
+                    'author': rng.randint(1, users),
+                    'pub_date': pub_date(review_id) + dt.timedelta(
+                        days=delay
+                    ),
+                }
+            first_review += reviews
+
+
+def top_share(counts, fraction=0.1):
+    """Share of the total held by the top `fraction` of the counts."""
+    counts = sorted(counts, reverse=True)
+    total = sum(counts)
+    top = counts[:max(1, math.ceil(len(counts) * fraction))]
+    return sum(top) / total if total else 0.0
@@ -6,4 +6,7 @@ sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_catalog',
+    'tests.fixtures.fixture_csv',
+    'tests.fixtures.fixture_data',
 ]
@@ -0,0 +1,67 @@
+import pytest
+
+CATALOG_SIZE = 12
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake',
+        password='1234567', role='admin'
+    )
+
+
+@pytest.fixture
+def catalog(admin, django_user_model):
+    """
+    Several pages worth of every object exposed by the API,
+    each title with a few genres and each review with comments.
+    """
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+
+    users = [
+        django_user_model.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        for i in range(CATALOG_SIZE)
+    ]
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(CATALOG_SIZE)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(CATALOG_SIZE)
+    ]
+    titles = [
+        Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i,
+            description='Описание', category=categories[i]
+        )
+        for i in range(CATALOG_SIZE)
+    ]
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genres[(i + shift) % CATALOG_SIZE])
+        for i, title in enumerate(titles)
+        for shift in range(3)
+    )
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text=f'Отзыв {i}',
+            score=i % 10 + 1
+        )
+        for i, author in enumerate(users)
+    ]
+    Comment.objects.bulk_create(
+        Comment(review=reviews[0], author=author, text=f'Комментарий {i}')
+        for i, author in enumerate(users)
+    )
+    return {
+        'title': titles[0],
+        'review': reviews[0],
+        'comment': reviews[0].comments.first(),
+        'category': categories[0],
+        'genre': genres[0],
+        'user': users[0],
+    }
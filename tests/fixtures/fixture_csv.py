@@ -0,0 +1,54 @@
+import csv
+
+import pytest
+
+CSV_DATA = {
+    'users': [
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        (100, 'bingobongo', 'bingobongo@yamdb.fake', 'user', '', '', ''),
+        (101, 'capt_obvious', 'capt_obvious@yamdb.fake', 'admin', '', '', ''),
+    ],
+    'category': [
+        ('id', 'name', 'slug'),
+        (1, 'Фильм', 'movie'),
+        (2, 'Книга', 'book'),
+    ],
+    'genre': [
+        ('id', 'name', 'slug'),
+        (1, 'Драма', 'drama'),
+        (2, 'Комедия', 'comedy'),
+    ],
+    'titles': [
+        ('id', 'name', 'year', 'category'),
+        (1, 'Побег из Шоушенка', 1994, 1),
+        (2, 'Крестный отец', 1972, 1),
+        (3, 'Гарри Поттер', 2001, 2),
+    ],
+    'genre_title': [
+        ('id', 'title_id', 'genre_id'),
+        (1, 1, 1),
+        (2, 2, 1),
+        (3, 2, 2),
+        (4, 3, 99),
+    ],
+    'review': [
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Ставлю десять', 100, 10, '2019-09-24T21:08:21.567Z'),
+        (2, 1, 'Не понравилось', 101, 1, '2019-09-24T21:08:21.567Z'),
+        (3, 2, 'Классика', 100, 9, '2019-09-24T21:08:21.567Z'),
+    ],
+    'comments': [
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Согласен', 101, '2019-09-24T21:08:21.567Z'),
+        (2, 2, 'Не согласен', 100, '2019-09-24T21:08:21.567Z'),
+    ],
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    for table, rows in CSV_DATA.items():
+        with open(tmp_path / f'{table}.csv', 'w', encoding='utf-8',
+                  newline='') as fp:
+            csv.writer(fp).writerows(rows)
+    return tmp_path
@@ -0,0 +1,86 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def api_cache(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        'api': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'api-tests',
+        },
+        'replica_pins': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'replica-pins-tests',
+        },
+        'token_versions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'token-versions-tests',
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle-tests',
+        },
+    }
+    for alias in ('api', 'replica_pins', 'token_versions', 'throttle'):
+        caches[alias].clear()
+    return caches['api']
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings):
+    from api.throttling import get_store
+
+    settings.THROTTLE_STORE = {
+        'BACKEND': 'api.throttling.LocalCounterStore',
+    }
+    return get_store()
+
+
+@pytest.fixture(autouse=True)
+def metrics_registry(settings):
+    from api.metrics import get_registry
+
+    settings.METRICS_DIR = None
+    return get_registry()
+
+
+@pytest.fixture(autouse=True)
+def slow_query_buffer(settings):
+    from api.slow_queries import get_buffer
+
+    settings.SLOW_QUERY_THRESHOLD_MS = None
+    settings.SLOW_QUERY_LOG = None
+    get_buffer().clear()
+    return get_buffer()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', password='1234567'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother', email='testuseranother@yamdb.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='films')
+
+
+@pytest.fixture
+def title(category):
+    from reviews.models import Title
+    return Title.objects.create(
+        name='Поворот туда', year=2000, description='Фильм',
+        category=category
+    )
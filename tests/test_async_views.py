@@ -0,0 +1,115 @@
+import asyncio
+import types
+
+import pytest
+from asgiref.sync import AsyncToSync, SyncToAsync, async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient
+from django.urls import include, path, resolve
+from rest_framework.test import APIClient
+
+from .test_stateless_auth import get_token
+
+ASYNC_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+
+@pytest.fixture
+def async_urlconf(settings):
+    from api.async_views import AsyncReadRouter
+    from api.urls import auth_v1, router_v1
+
+    settings.ASYNC_READ_VIEWS = True
+    router = AsyncReadRouter(async_routes=router_v1.async_routes)
+    router.registry = router_v1.registry
+    urlconf = types.ModuleType('async_urlconf')
+    urlconf.urlpatterns = [
+        path('api/v1/', include(router.urls)),
+        path('api/v1/auth/', include(auth_v1)),
+    ]
+    settings.ROOT_URLCONF = urlconf
+    return urlconf
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('url', ASYNC_URLS)
+def test_async_views_match_sync_ones(url, catalog, async_urlconf, settings):
+    url = url.format(title=catalog['title'].id, review=catalog['review'].id)
+    assert asyncio.iscoroutinefunction(resolve(url).func)
+
+    response = async_to_sync(AsyncClient().get)(url)
+
+    assert response.status_code == 200
+    settings.ROOT_URLCONF = 'api_yamdb.urls'
+    assert not asyncio.iscoroutinefunction(resolve(url).func)
+    assert response.json() == APIClient().get(url).json()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_keep_writes(async_urlconf, admin, category):
+    client = AsyncClient()
+    response = async_to_sync(client.post)(
+        '/api/v1/titles/',
+        {'name': 'Новое', 'year': 2000, 'category': category.slug},
+    )
+
+    assert response.status_code == 401, (
+        'Проверьте, что асинхронные представления проверяют права доступа'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_only_list_and_retrieve_are_async(async_urlconf, catalog, admin):
+    assert not asyncio.iscoroutinefunction(
+        resolve('/api/v1/titles/facets/').func
+    ), 'Проверьте, что дополнительные действия остаются синхронными'
+
+    token = get_token(admin)
+    response = async_to_sync(AsyncClient().post)(
+        f'/api/v1/titles/{catalog["title"].id}/reviews/',
+        {'text': 'Отзыв', 'score': 7},
+        content_type='application/json', authorization=f'Bearer {token}',
+    )
+
+    assert response.status_code == 201
+    assert response.json()['score'] == 7
+
+
+def middleware_chain(handler):
+    link = handler._middleware_chain
+    while link is not None:
+        yield link
+        link = getattr(link, '__wrapped__', None) or getattr(
+            link, 'get_response', None
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_middleware_chain_stays_async(catalog, settings):
+    from api.compression import CompressionMiddleware
+    from api.metrics import MetricsMiddleware
+    from api.replica import ReplicaMiddleware
+    from api.slow_queries import SlowQueryMiddleware
+
+    chain = list(middleware_chain(ASGIHandler()))
+
+    assert not [
+        link for link in chain if isinstance(link, (SyncToAsync, AsyncToSync))
+    ], 'Проверьте, что промежуточные слои не переключают запрос в поток'
+    assert {
+        MetricsMiddleware, SlowQueryMiddleware, CompressionMiddleware,
+        ReplicaMiddleware,
+    } <= {type(link) for link in chain}
+
+    settings.COMPRESSION_MIN_SIZE = 0
+    response = async_to_sync(AsyncClient().get)(
+        '/api/v1/categories/', accept_encoding='gzip'
+    )
+
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'db;' in response['Server-Timing']
@@ -0,0 +1,119 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def bench_data(title, admin):
+    from api.bench_scenarios import BenchData
+    from reviews.models import Genre, Review
+
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title.genre.add(genre)
+    Review.objects.create(title=title, author=admin, text='Отзыв', score=8)
+    data = BenchData(users=3)
+    data.setup()
+    yield data
+    data.cleanup()
+
+
+def drive(source, count):
+    """Runs a load source through the test client, returns responses."""
+    client = APIClient()
+    responses = []
+    request = next(source)
+    for _ in range(count):
+        response = client.generic(
+            request.method, request.url, data=request.body or b'',
+            content_type=request.headers.get(
+                'Content-Type', 'application/octet-stream'
+            ),
+            **{
+                f'HTTP_{name.upper()}': value
+                for name, value in request.headers.items()
+                if name != 'Content-Type'
+            }
+        )
+        responses.append((request.label, response.status_code))
+        request = source.send((response.status_code, response.content))
+    return responses
+
+
+def failed(responses):
+    return [(label, status) for label, status in responses if status >= 400]
+
+
+@pytest.mark.django_db
+class TestBenchScenarios:
+
+    def test_all_routes_covers_every_route(self, bench_data):
+        from api.bench_scenarios import (PREFIX, all_routes, route_names,
+                                         scenario_source)
+        from reviews.models import Category, Title, User
+
+        responses = drive(
+            scenario_source('all_routes', bench_data)(0), 80
+        )
+        assert failed(responses) == []
+        covered = {label.split()[1] for label, _ in responses}
+        assert route_names() <= covered, (
+            'Проверьте, что сценарий all_routes обходит все маршруты API'
+        )
+        assert all_routes.__name__ == 'all_routes'
+
+        bench_data.cleanup()
+        assert not User.objects.filter(username__startswith=PREFIX).exists()
+        assert not Title.objects.filter(name__startswith=PREFIX).exists()
+        assert not Category.objects.filter(slug__startswith=PREFIX).exists()
+
+    @pytest.mark.parametrize(
+        'scenario', ['anonymous_browsing', 'review_posting',
+                     'comment_threads']
+    )
+    def test_mixes_succeed(self, bench_data, scenario):
+        from api.bench_scenarios import scenario_source
+
+        responses = drive(scenario_source(scenario, bench_data)(0), 12)
+        assert failed(responses) == []
+
+    def test_setup_needs_data(self):
+        from api.bench_scenarios import BenchData
+
+        with pytest.raises(ValueError):
+            BenchData().setup()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_generator_sources(live_server, bench_data):
+    from api.bench_scenarios import scenario_source
+    from api.benchmarking import LoadGenerator
+
+    summary = LoadGenerator(
+        live_server.url, concurrency=1, requests=12,
+        source=scenario_source('review_posting', bench_data),
+    ).run()
+    assert summary['requests'] == 12
+    assert summary['errors'] == 0
+    assert set(summary['endpoints']) == {
+        'GET titles-detail', 'GET reviews-list', 'POST reviews-list',
+    } | ({'PATCH reviews-detail'} & set(summary['endpoints']))
+    assert sum(
+        endpoint['requests'] for endpoint in summary['endpoints'].values()
+    ) == 12
+
+
+def test_compare():
+    from api.benchmarking import compare
+
+    def summary(rps, p95, endpoint_p95):
+        return {'rps': rps, 'p95_ms': p95, 'endpoints': {
+            'GET titles-list': {'requests': 100, 'p95_ms': endpoint_p95},
+        }}
+
+    baseline = {'browse': summary(100, 10, 10)}
+    assert compare(baseline, {'browse': summary(95, 11, 11)}, 20) == []
+    assert compare(baseline, {'browse': summary(100, 10, 15)}, 20) == [
+        ('browse: GET titles-list', 'p95_ms', 10, 15),
+    ]
+    assert [name for name, metric, *_ in compare(
+        baseline, {'browse': summary(50, 10, 10)}, 20
+    )] == ['browse']
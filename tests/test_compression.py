@@ -0,0 +1,127 @@
+import gzip
+import json
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+SAMPLE = {
+    'results': [{
+        'id': 1,
+        'name': 'Произведение «Ёлка»     "кавычки" \\',
+        'rating': None,
+        'score': 7.25,
+        'genre': [{'name': 'Жанр', 'slug': 'genre'}],
+        'date': timezone.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                  tzinfo=timezone.utc),
+        'price': Decimal('1.50'),
+        'message': gettext_lazy('Not found.'),
+        1: 'ключ-число',
+    }],
+    'count': 10,
+}
+
+
+class TestFastJSON:
+
+    def test_same_bytes_as_drf(self):
+        from api.renderers import FastJSONRenderer
+
+        assert FastJSONRenderer().render(SAMPLE) == JSONRenderer().render(
+            SAMPLE
+        )
+
+    def test_values_orjson_cannot_encode_go_to_drf(self):
+        from api.renderers import FastJSONRenderer
+
+        data = {**SAMPLE, 'count': 10 ** 30}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_goes_to_drf(self):
+        from api.renderers import FastJSONRenderer
+
+        assert FastJSONRenderer().render(
+            SAMPLE, 'application/json; indent=4'
+        ) == JSONRenderer().render(SAMPLE, 'application/json; indent=4')
+
+    def test_parser(self):
+        from api.renderers import FastJSONParser
+
+        body = json.dumps({'text': 'Отзыв', 'score': 5}).encode()
+        assert FastJSONParser().parse(BytesIO(body)) == JSONParser().parse(
+            BytesIO(body)
+        )
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"text": NaN}'))
+
+    def test_off(self, settings):
+        from api.renderers import FastJSONRenderer
+
+        settings.FAST_JSON = False
+        assert FastJSONRenderer().render(SAMPLE) == JSONRenderer().render(
+            SAMPLE
+        )
+
+
+@pytest.mark.django_db
+class TestCompression:
+    url = '/api/v1/titles/'
+
+    def test_gzip(self, catalog):
+        plain = APIClient().get(self.url, HTTP_ACCEPT_ENCODING='identity')
+        compressed = APIClient().get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0.5, unknown'
+        )
+
+        assert 'Content-Encoding' not in plain
+        assert compressed['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in compressed['Vary']
+        assert gzip.decompress(compressed.content) == plain.content
+        assert int(compressed['Content-Length']) < len(plain.content)
+
+    def test_brotli(self, catalog):
+        brotli = pytest.importorskip('brotli')
+
+        response = APIClient().get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        assert response['Content-Encoding'] == 'br'
+        assert json.loads(brotli.decompress(response.content))['results']
+
+    def test_small_responses_are_not_compressed(self, catalog, settings):
+        settings.COMPRESSION_MIN_SIZE = 10 ** 6
+
+        response = APIClient().get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert 'Content-Encoding' not in response
+
+    def test_cache_keeps_compressed_body(self, catalog, monkeypatch):
+        from api import compression
+
+        calls = []
+
+        def counting(content):
+            calls.append(len(content))
+            return gzip.compress(content)
+
+        monkeypatch.setattr(compression, 'ENCODERS', {'gzip': counting})
+        responses = [
+            APIClient().get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            for _ in range(3)
+        ]
+
+        assert [response['X-Cache'] for response in responses] == [
+            'MISS', 'HIT', 'HIT'
+        ]
+        assert len(calls) == 1, (
+            'Проверьте, что кэшированный ответ не сжимается повторно'
+        )
+        assert len({response.content for response in responses}) == 1
+        assert all(
+            response['Content-Encoding'] == 'gzip' for response in responses
+        )
@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_reviews_etag(self, catalog, user):
+        from reviews.models import Review
+
+        client = APIClient()
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        response = client.get(url)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(queries) == 1, (
+            'Проверьте, что для ответа 304 выполняется только запрос версии'
+        )
+
+        Review.objects.create(
+            title=catalog['title'], author=user, text='Новый', score=5
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_no_last_modified(self, catalog):
+        client = APIClient()
+        url = (
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/'
+        )
+        response = client.get(url)
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что отзывы и комментарии отдаются без '
+            'Last-Modified: удаление и переименование его не меняют'
+        )
+
+    def test_signup_keeps_etag(self, catalog):
+        from reviews.models import User
+
+        client = APIClient()
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        etag = client.get(url)['ETag']
+
+        User.objects.create_user(username='newcomer', email='n@example.com')
+        author = catalog['review'].author
+        author.bio = 'Новое о себе'
+        author.save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что регистрация и правка профиля без смены имени '
+            'не меняют ETag отзывов'
+        )
+
+    def test_author_rename_changes_etag(self, catalog):
+        client = APIClient()
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        etag = client.get(url)['ETag']
+
+        author = catalog['review'].author
+        author.username = 'renamed'
+        author.save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет ETag'
+        )
+        assert 'renamed' in response.content.decode()
+
+    def test_missing_parent_is_404(self, catalog):
+        client = APIClient()
+        title, review = catalog['title'], catalog['review']
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        other = f'/api/v1/titles/{title.id + 1}/reviews/{review.id}/comments/'
+
+        assert client.get(other, HTTP_IF_NONE_MATCH='*').status_code == 404
+        title.delete()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{title.id}/reviews/', HTTP_IF_NONE_MATCH='*'
+        ).status_code == 404
+
+    def test_titles_etag_survives_response_cache(self, catalog, admin):
+        client = APIClient()
+        url = '/api/v1/titles/'
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(admin)
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что ETag работает и без кэша ответов'
+        )
+
+        catalog['title'].delete()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,136 @@
+import datetime as dt
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestBulkCsvImport:
+
+    def test_bulk_import(self, csv_dir):
+        from reviews.models import Comment, GenreTitle, Review, Title, User
+
+        call_command('csv_to_db', 'all', '--bulk', '--path', str(csv_dir))
+
+        assert User.objects.count() == 2
+        assert Title.objects.count() == 3
+        assert GenreTitle.objects.count() == 3, (
+            'Проверьте, что строки со ссылкой на несуществующий жанр пропущены'
+        )
+        assert Comment.objects.count() == 2
+        review = Review.objects.get(pk=1)
+        assert review.pub_date == dt.datetime(
+            2019, 9, 24, 21, 8, 21, 567000, tzinfo=dt.timezone.utc
+        ), 'Проверьте, что дата публикации берется из файла'
+        title = Title.objects.get(pk=1)
+        assert (title.rating, title.reviews_count) == (5.5, 2), (
+            'Проверьте, что рейтинги пересчитаны после импорта отзывов'
+        )
+        new_review = Review.objects.create(
+            title=title, author=User.objects.create(
+                username='new', email='new@yamdb.fake'
+            ), text='Новый', score=5
+        )
+        assert new_review.pk > 3
+
+    def test_bulk_import_is_idempotent(self, csv_dir):
+        from reviews.models import Comment, Review, Title
+
+        call_command('csv_to_db', 'all', '--bulk', '--path', str(csv_dir))
+        call_command('csv_to_db', 'all', '--bulk', '--path', str(csv_dir))
+
+        assert Review.objects.count() == 3
+        assert Comment.objects.count() == 2
+        assert Title.objects.get(pk=2).reviews_count == 1
+
+    def test_bulk_import_counts_inserted_rows(self, csv_dir):
+        from reviews.importing import TABLES_BY_NAME, BulkLoader, read_csv
+        from reviews.models import Review
+
+        call_command('csv_to_db', 'all', '--bulk', '--path', str(csv_dir))
+        Review.objects.filter(pk=3).delete()
+        table = TABLES_BY_NAME['review']
+        pub_date = Review._meta.get_field('pub_date')
+        auto_now = []
+
+        def rows():
+            for row in read_csv(table.file_path(csv_dir)):
+                auto_now.append(pub_date.auto_now)
+                yield row
+
+        result = BulkLoader().load(table, rows())
+
+        assert (result.rows, result.inserted, result.skipped) == (3, 1, 2), (
+            'Проверьте, что строки с занятыми id считаются пропущенными'
+        )
+        assert all(auto_now), (
+            'Проверьте, что импорт не отключает auto_now у полей модели'
+        )
+        review = Review.objects.get(pk=3)
+        assert review.pub_date.year == 2019
+        review.text = 'Изменён'
+        review.save()
+        assert Review.objects.get(pk=3).pub_date.year > 2019, (
+            'Проверьте, что правка отзыва по-прежнему обновляет pub_date'
+        )
+
+    def test_copy_import(self, csv_dir):
+        from django.db import connection
+        from reviews.models import Comment, Title
+
+        options = ['--copy', '--path', str(csv_dir)]
+        if connection.vendor == 'sqlite':
+            # Worker processes would commit outside the test transaction,
+            # SQLite runs them in-process, which exercises the fallback.
+            options += ['--workers', '3']
+        call_command('csv_to_db', 'all', *options)
+        call_command('csv_to_db', 'all', *options)
+
+        assert Comment.objects.count() == 2
+        assert Title.objects.get(pk=1).reviews_count == 2
+
+    def test_copy_fills_missing_dates(self, csv_dir):
+        from django.db import connection
+        from reviews.importing import TABLES_BY_NAME, CopyLoader
+        from reviews.models import Comment
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY есть только в PostgreSQL')
+        call_command('csv_to_db', 'all', '--copy', '--path', str(csv_dir))
+        table = TABLES_BY_NAME['comments']
+        loader = CopyLoader()
+
+        without_column = loader.load(table, [
+            {'id': 3, 'review_id': 1, 'text': 'Без даты', 'author': 100},
+        ], headers=['id', 'review_id', 'text', 'author'])
+        empty_value = loader.load(table, [
+            {'id': 4, 'review_id': 1, 'text': 'Пустая дата', 'author': 100,
+             'pub_date': ''},
+        ])
+
+        assert (without_column.inserted, empty_value.inserted) == (1, 1), (
+            'Проверьте, что COPY заполняет отсутствующую дату '
+            'временем импорта'
+        )
+        assert Comment.objects.filter(
+            pk__in=(3, 4), pub_date__isnull=False
+        ).count() == 2
+
+
+class TestImportOrder:
+
+    def test_dependency_waves(self):
+        from reviews.importing import dependency_waves
+
+        assert list(dependency_waves(
+            ['comments', 'review', 'titles', 'genre_title', 'genre',
+             'category', 'users']
+        )) == [
+            ['users', 'category', 'genre'],
+            ['titles'],
+            ['genre_title', 'review'],
+            ['comments'],
+        ]
+        assert list(dependency_waves(['comments', 'users'])) == [
+            ['users'], ['comments']
+        ]
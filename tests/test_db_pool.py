@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def make_pool(tmp_path, **options):
+    from dbpool.pool import ConnectionPool
+
+    def reset(raw):
+        if raw.in_transaction:
+            raw.rollback()
+
+    return ConnectionPool(
+        connect=lambda: sqlite3.connect(
+            tmp_path / 'pool.sqlite3', check_same_thread=False
+        ),
+        check=lambda raw: raw.execute('SELECT 1'),
+        reset=reset,
+        close=lambda raw: raw.close(),
+        **options
+    )
+
+
+class TestConnectionPool:
+
+    def test_connections_are_reused(self, tmp_path):
+        pool = make_pool(tmp_path)
+        first = pool.checkout()
+        pool.checkin(first)
+
+        assert pool.checkout() is first
+        assert pool.as_dict()['created'] == 1
+        assert pool.as_dict()['checkouts'] == 2
+
+    def test_checkout_waits_for_a_free_connection(self, tmp_path):
+        from dbpool.pool import PoolTimeout
+
+        pool = make_pool(tmp_path, max_size=1, timeout=0.05)
+        raw = pool.checkout()
+        with pytest.raises(PoolTimeout):
+            pool.checkout()
+
+        pool.timeout = 5
+        threading.Timer(0.05, pool.checkin, [raw]).start()
+        assert pool.checkout() is raw
+        stats = pool.as_dict()
+        assert (stats['waits'], stats['timeouts']) == (2, 1)
+        assert stats['wait_time'] > 0
+
+    def test_broken_connections_are_replaced(self, tmp_path):
+        pool = make_pool(tmp_path, health_check_interval=0)
+        raw = pool.checkout()
+        pool.checkin(raw)
+        raw.close()
+
+        replacement = pool.checkout()
+
+        assert replacement is not raw
+        replacement.execute('SELECT 1')
+        stats = pool.as_dict()
+        assert stats['health_check_failures'] == 1
+        assert (stats['created'], stats['closed'], stats['size']) == (2, 1, 1)
+
+    def test_max_lifetime(self, tmp_path):
+        pool = make_pool(tmp_path, max_lifetime=0)
+        raw = pool.checkout()
+        pool.checkin(raw)
+
+        assert pool.checkout() is not raw
+        assert pool.as_dict()['expired'] == 1
+
+    def test_returned_connections_are_rolled_back(self, tmp_path):
+        pool = make_pool(tmp_path)
+        raw = pool.checkout()
+        raw.execute('CREATE TABLE t (id INTEGER)')
+        raw.commit()
+        raw.execute('INSERT INTO t VALUES (1)')
+        pool.checkin(raw)
+
+        assert pool.checkout().execute('SELECT COUNT(*) FROM t').fetchone() == (
+            0,
+        )
+
+    def test_min_size(self, tmp_path):
+        pool = make_pool(tmp_path, min_size=3)
+        pool.fill()
+        assert pool.as_dict()['idle'] == 3
+
+
+@pytest.mark.django_db
+def test_database_wrapper_returns_connections_to_pool(tmp_path):
+    from dbpool.base import pool_stats
+    from dbpool.sqlite3.base import DatabaseWrapper
+    from django.db import connections
+
+    wrapper = DatabaseWrapper({
+        **connections['default'].settings_dict,
+        'ENGINE': 'dbpool.sqlite3',
+        'NAME': str(tmp_path / 'wrapper.sqlite3'),
+        'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 2},
+    }, alias='pooled')
+    with wrapper.cursor() as cursor:
+        cursor.execute('CREATE TABLE t (id INTEGER)')
+    raw = wrapper.connection
+    wrapper.close()
+
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM t')
+    assert wrapper.connection is raw
+    wrapper.close()
+    stats = pool_stats()[f'pooled:{tmp_path / "wrapper.sqlite3"}']
+    assert (stats['created'], stats['checkouts'], stats['idle']) == (1, 2, 1)
+
+
+def test_default_reset_rolls_back(tmp_path):
+    from dbpool.base import PooledDatabaseWrapperMixin
+
+    class Raw:
+        rolled_back = False
+
+        def rollback(self):
+            self.rolled_back = True
+
+    reset = PooledDatabaseWrapperMixin().reset_pooled_connection
+    raw = sqlite3.connect(tmp_path / 'reset.sqlite3')
+    raw.execute('CREATE TABLE t (id INTEGER)')
+    raw.commit()
+    raw.execute('INSERT INTO t VALUES (1)')
+    reset(raw)
+    other = Raw()
+    reset(other)
+
+    assert raw.execute('SELECT COUNT(*) FROM t').fetchone() == (0,)
+    assert other.rolled_back, (
+        'Проверьте, что соединения драйверов без in_transaction '
+        'откатываются всегда'
+    )
+
+
+@pytest.mark.django_db
+def test_pool_status_endpoint(admin, user):
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.get('/api/v1/status/db-pool/').status_code == 403
+
+    client.force_authenticate(admin)
+    response = client.get('/api/v1/status/db-pool/')
+    assert response.status_code == 200
+    assert set(response.json()) == {'pid', 'pools'}
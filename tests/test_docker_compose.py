@@ -1,6 +1,8 @@
 import os
 import re
 
+import pytest
+
 from .conftest import infra_dir_path, root_dir
 
 
@@ -27,3 +29,16 @@ class TestDockerfileCompose:
         assert re.search(r'image:\s+([a-zA-Z0-9]+)\/([a-zA-Z0-9_\.])+(\:[a-zA-Z0-9_-]+)?', docker_compose), (
             'Проверьте, что добавили сборку контейнера из образа на вашем DockerHub в файл docker-compose.yaml'
         )
+
+    def test_api_cache_is_shared(self):
+        yaml = pytest.importorskip('yaml')
+        with open(os.path.join(infra_dir_path, 'docker-compose.yaml')) as f:
+            services = yaml.safe_load(f)['services']
+
+        for name in ('web', 'mailer', 'leaderboards'):
+            assert 'api_cache_value:/app/cache/api/' in services[name].get(
+                'volumes', []
+            ), (
+                f'Проверьте, что сервис {name} использует общий с web '
+                'кэш ответов: иначе его изменения не сбрасывают кэш'
+            )
@@ -0,0 +1,159 @@
+import datetime as dt
+import time
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+class CountingBackend(EmailBackend):
+    """Counts opened connections, refuses addresses at broken.fake."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith('@broken.fake') for to in message.to):
+                raise ConnectionError('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def counting_backend(settings):
+    settings.EMAIL_BACKEND = 'tests.test_email_outbox.CountingBackend'
+    CountingBackend.opened = 0
+    return CountingBackend
+
+
+def signup(username, email):
+    return APIClient().post('/api/v1/auth/signup/', {
+        'username': username, 'email': email
+    })
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_only_enqueues(self):
+        from reviews.models import OutgoingEmail
+
+        response = signup('newuser', 'newuser@yamdb.fake')
+
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что письмо не отправляется во время запроса'
+        )
+        message = OutgoingEmail.objects.get()
+        assert message.to_email == 'newuser@yamdb.fake'
+        assert message.status == OutgoingEmail.PENDING
+
+    def test_worker_sends_batches_over_one_connection(self, counting_backend):
+        from reviews import outbox
+        from reviews.models import OutgoingEmail
+
+        for i in range(5):
+            signup(f'user{i}', f'user{i}@yamdb.fake')
+        assert outbox.queue_depth()['pending'] == 5
+
+        call_command('deliver_emails', '--batch-size', '10')
+
+        assert len(mail.outbox) == 5
+        assert counting_backend.opened == 1
+        assert outbox.queue_depth()['pending'] == 0
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+
+    def test_failed_delivery_is_retried_with_backoff(
+            self, counting_backend, settings):
+        from reviews import outbox
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        signup('good', 'good@yamdb.fake')
+        signup('bad', 'bad@broken.fake')
+
+        assert outbox.deliver_pending() == (1, 1)
+        failed = OutgoingEmail.objects.get(to_email='bad@broken.fake')
+        assert failed.status == OutgoingEmail.PENDING
+        assert failed.attempts == 1
+        assert failed.send_after > timezone.now() + dt.timedelta(seconds=20)
+        assert 'Mailbox unavailable' in failed.last_error
+        assert outbox.deliver_pending() == (0, 0), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+
+        OutgoingEmail.objects.filter(pk=failed.pk).update(
+            send_after=timezone.now()
+        )
+        assert outbox.deliver_pending() == (0, 1)
+        failed.refresh_from_db()
+        assert failed.status == OutgoingEmail.FAILED
+        assert outbox.queue_depth() == {
+            'pending': 0, 'failed': 1, 'oldest_pending_age': 0.0
+        }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_in_process_worker(settings, monkeypatch):
+    from reviews import outbox
+    from reviews.models import OutgoingEmail
+
+    settings.EMAIL_OUTBOX_THREADS = 2
+    # A long poll interval: delivery must come from the wake-up on enqueue.
+    worker = outbox.OutboxWorker(threads=2, poll_interval=60, batch_size=10)
+    monkeypatch.setattr(outbox, '_worker', worker)
+    try:
+        signup('threaded', 'threaded@yamdb.fake')
+        deadline = time.monotonic() + 5
+        while OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING
+        ).exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker.stop(timeout=5)
+
+    assert [message.to for message in mail.outbox] == [
+        ['threaded@yamdb.fake']
+    ]
+
+
+def test_forked_worker_starts_own_threads(settings, monkeypatch):
+    from reviews import outbox
+
+    settings.EMAIL_OUTBOX_THREADS = 2
+    worker = outbox.OutboxWorker(threads=2, poll_interval=60, batch_size=10)
+    monkeypatch.setattr(outbox, '_worker', worker)
+    try:
+        outbox.start_worker()
+        started = list(worker.workers)
+        outbox.start_worker()
+        assert worker.workers == started
+        # As a child sees the threads of the parent after a fork.
+        worker.pid = -1
+        outbox.start_worker()
+
+        assert worker.workers != started and len(worker.workers) == 2, (
+            'Проверьте, что после fork процесс запускает свои потоки'
+        )
+    finally:
+        worker.stop(timeout=5)
+        for thread in started:
+            thread.join(timeout=5)
+
+
+def test_outbox_threads_are_optional(settings, monkeypatch):
+    from reviews import outbox
+
+    worker = outbox.OutboxWorker(threads=2, poll_interval=60, batch_size=10)
+    monkeypatch.setattr(outbox, '_worker', worker)
+    settings.EMAIL_OUTBOX_THREADS = 0
+    outbox.start_worker()
+
+    assert worker.workers == []
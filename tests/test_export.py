@@ -0,0 +1,93 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+
+def snapshot():
+    from reviews.importing import TABLES
+    return {
+        table.name: list(table.model.objects.order_by('id').values_list(
+            *table.columns.values()
+        ))
+        for table in TABLES
+    }
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+
+    @pytest.mark.parametrize('options', [[], ['--gzip'], ['--chunk-size', '5']])
+    def test_csv_round_trip(self, catalog, tmp_path, options):
+        from reviews.importing import TABLES
+
+        call_command('db_to_csv', 'all', '--path', str(tmp_path), *options)
+        if '--gzip' in options:
+            for packed in tmp_path.glob('*.gz'):
+                packed.with_suffix('').write_bytes(
+                    gzip.decompress(packed.read_bytes())
+                )
+        expected = snapshot()
+        for table in reversed(TABLES):
+            table.model.objects.all().delete()
+
+        call_command('csv_to_db', 'all', '--bulk', '--path', str(tmp_path))
+
+        assert snapshot() == expected, (
+            'Проверьте, что выгрузка загружается обратно без потерь'
+        )
+
+    def test_ndjson(self, catalog, tmp_path):
+        from reviews.models import Comment
+
+        call_command('db_to_ndjson', 'comments', '--path', str(tmp_path))
+
+        lines = (tmp_path / 'comments.ndjson').read_text().splitlines()
+        rows = [json.loads(line) for line in lines]
+        assert [row['id'] for row in rows] == list(
+            Comment.objects.order_by('id').values_list('id', flat=True)
+        )
+        assert set(rows[0]) == {
+            'id', 'review_id', 'text', 'author', 'pub_date'
+        }
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    url = '/api/v1/export/titles.csv'
+
+    def test_admin_only(self, catalog):
+        client = APIClient()
+        assert client.get(self.url).status_code == 401
+        client.force_authenticate(catalog['user'])
+        assert client.get(self.url).status_code == 403
+
+    def test_streams_table(self, catalog, admin):
+        from reviews.models import Title
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,name,year,description,category'
+        assert len(lines) == Title.objects.count() + 1
+
+    def test_gzip(self, catalog, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/v1/export/genre_title.ndjson.gz')
+
+        assert response.status_code == 200
+        content = gzip.decompress(b''.join(response.streaming_content))
+        assert len(content.splitlines()) == 36
+
+    def test_unknown_table(self, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        assert client.get('/api/v1/export/secrets.csv').status_code == 404
@@ -0,0 +1,123 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def facet_counts():
+    from reviews.models import TitleFacetCount
+
+    return {
+        (row.facet, row.value): row.count
+        for row in TitleFacetCount.objects.exclude(count=0)
+    }
+
+
+def assert_counts_match_titles():
+    from reviews.models import TitleFacetCount
+
+    incremental = facet_counts()
+    TitleFacetCount.objects.recalculate()
+    assert incremental == facet_counts(), (
+        'Проверьте, что счётчики фасетов обновляются при изменениях'
+    )
+
+
+@pytest.mark.django_db
+class TestFacetCounts:
+
+    def test_incremental_updates(self, category):
+        from reviews.models import Category, Genre, GenreTitle, Title
+
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        other = Category.objects.create(name='Книга', slug='books')
+        first = Title.objects.create(
+            name='Первое', year=1999, description='', category=category
+        )
+        second = Title.objects.create(name='Второе', year=2005,
+                                      description='')
+        first.genre.add(drama, comedy)
+        comedy.genre.add(second)
+        assert_counts_match_titles()
+
+        first = Title.objects.get(pk=first.pk)
+        first.category = other
+        first.year = 2011
+        first.save()
+        second.genre.set([drama])
+        GenreTitle.objects.create(title=second, genre=comedy)
+        assert_counts_match_titles()
+
+        first.genre.remove(drama)
+        second.genre.clear()
+        comedy.delete()
+        other.delete()
+        assert_counts_match_titles()
+
+        second.delete()
+        Title.objects.get(pk=first.pk).delete()
+        assert facet_counts() == {}
+
+
+@pytest.mark.django_db
+class TestFacetsEndpoint:
+    url = '/api/v1/titles/facets/'
+
+    @pytest.fixture
+    def counted_catalog(self, catalog):
+        from reviews.models import TitleFacetCount
+
+        # The catalog fixture bulk-creates genres of titles, no signals.
+        TitleFacetCount.objects.recalculate()
+        return catalog
+
+    def get(self, params=''):
+        response = APIClient().get(f'{self.url}?{params}')
+        assert response.status_code == 200
+        return response.json()
+
+    def by_slug(self, items):
+        return {item['slug']: item['count'] for item in items}
+
+    def test_unfiltered_counts_are_precomputed(self, counted_catalog):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get()
+
+        assert data['count'] == 12
+        assert set(self.by_slug(data['category']).values()) == {1}
+        assert set(self.by_slug(data['genre']).values()) == {3}
+        assert data['decade'] == [
+            {'decade': 2000, 'count': 10}, {'decade': 2010, 'count': 2}
+        ]
+        assert not any(
+            'GROUP BY' in query['sql'] and 'reviews_title' in query['sql']
+            for query in queries.captured_queries
+        ), 'Проверьте, что без фильтров счётчики берутся из таблицы'
+
+    def test_facets_ignore_their_own_filter(self, counted_catalog):
+        data = self.get('category=category-0')
+        category = self.by_slug(data['category'])
+        genre = self.by_slug(data['genre'])
+
+        assert data['count'] == 1
+        assert category['category-0'] == category['category-5'] == 1
+        assert {slug for slug, count in genre.items() if count} == {
+            'genre-0', 'genre-1', 'genre-2'
+        }
+        assert data['decade'] == [{'decade': 2000, 'count': 1}]
+
+    def test_year_and_search_filters(self, counted_catalog):
+        data = self.get('year_min=2010&genre=genre-11')
+
+        assert data['count'] == 2
+        assert self.by_slug(data['genre'])['genre-0'] == 2
+        assert data['decade'] == [
+            {'decade': 2000, 'count': 1}, {'decade': 2010, 'count': 2}
+        ]
+        assert self.get('name=Произведение 1')['count'] == 3
+
+    def test_invalid_filter(self, counted_catalog):
+        response = APIClient().get(f'{self.url}?year=abc')
+
+        assert response.status_code == 400
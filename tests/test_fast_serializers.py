@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+LIST_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/titles/?cursor=',
+    '/api/v1/titles/?genre=genre-1',
+    '/api/v1/titles/?fields=id,name,rating',
+    '/api/v1/titles/?exclude=description,id&cursor=',
+    '/api/v1/titles/?fields=genre,category,year&exclude=year',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/?cursor=',
+    '/api/v1/titles/{title}/reviews/?fields=author,score',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/?exclude=text',
+    '/api/v1/titles/{title}/reviews/{review}/comments/?page=2',
+)
+
+
+@pytest.fixture
+def odd_titles(catalog):
+    """A title without a category and genres, and a fractional rating."""
+    from reviews.models import Title
+
+    title = catalog['title']
+    title.refresh_from_db()
+    assert title.rating != int(title.rating)
+    return Title.objects.create(
+        name='Без категории', year=1999, description='Без жанров'
+    )
+
+
+@pytest.mark.django_db
+class TestFastListSerializers:
+
+    def get(self, url, catalog):
+        caches['api'].clear()
+        response = APIClient().get(url.format(
+            title=catalog['title'].id, review=catalog['review'].id
+        ))
+        assert response.status_code == 200
+        return response.content
+
+    @pytest.mark.parametrize('url', LIST_URLS)
+    def test_output_matches_model_serializers(self, url, catalog,
+                                              odd_titles, monkeypatch):
+        from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+
+        fast = self.get(url, catalog)
+        for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet):
+            monkeypatch.setattr(viewset, 'fast_serializer_class', None)
+        model = self.get(url, catalog)
+
+        assert fast == model, (
+            'Проверьте, что быстрый сериализатор списка выдаёт те же байты, '
+            'что и сериализатор модели'
+        )
+
+    def test_time_zone_of_the_request(self, catalog, settings):
+        settings.TIME_ZONE = 'Asia/Vladivostok'
+        content = self.get('/api/v1/titles/{title}/reviews/', catalog)
+
+        assert b'+10:00' in content
+
+    def test_benchmark_command(self, catalog, capsys):
+        call_command('bench_serializers', '--repeat', '2')
+
+        output = capsys.readouterr().out
+        for name in ('titles', 'reviews', 'comments'):
+            assert name in output
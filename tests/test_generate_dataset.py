@@ -0,0 +1,96 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+SIZES = dict(users=50, category=3, genre=5, titles=20, review=200,
+             comments=600)
+
+
+def rows(dataset, name):
+    return list(dataset.rows(name))
+
+
+class TestDataset:
+
+    def test_deterministic(self):
+        from reviews.synthetic import Dataset
+
+        first = Dataset(seed=7, **SIZES)
+        second = Dataset(seed=7, **SIZES)
+        # Generation order does not change the rows.
+        first_comments = rows(first, 'comments')
+        second_reviews = rows(second, 'review')
+        assert rows(first, 'review') == second_reviews
+        assert rows(second, 'comments') == first_comments
+        assert rows(Dataset(seed=8, **SIZES), 'review') != rows(
+            first, 'review'
+        )
+
+    def test_distributions(self):
+        from reviews.synthetic import Dataset, top_share
+
+        dataset = Dataset(scale=0.1)
+        scores = [row['score'] for row in dataset.rows('review')]
+        assert sum(scores) / len(scores) > 6, (
+            'Проверьте, что оценки смещены к высоким'
+        )
+        assert min(scores) == 1 and max(scores) == 10
+        assert top_share(dataset.comments_per_title) > 0.5, (
+            'Проверьте, что комментарии сосредоточены у популярных '
+            'произведений'
+        )
+        assert top_share(dataset.comments_per_title) > top_share(
+            dataset.reviews_per_title
+        )
+
+    def test_reviews_respect_unique_author(self):
+        from reviews.synthetic import Dataset
+
+        dataset = Dataset(**{**SIZES, 'review': 5000})
+        pairs = [
+            (row['author'], row['title_id'])
+            for row in dataset.rows('review')
+        ]
+        assert len(pairs) == len(set(pairs))
+        assert max(dataset.reviews_per_title) <= SIZES['users']
+
+
+@pytest.mark.django_db
+class TestGenerateDatasetCommand:
+
+    def test_load(self, capsys):
+        from reviews.models import Comment, GenreTitle, Review, Title, User
+        from reviews.synthetic import Dataset
+
+        call_command(
+            'generate_dataset', '--seed', '3',
+            *[
+                f'--{option}={SIZES[table]}' for option, table in (
+                    ('users', 'users'), ('categories', 'category'),
+                    ('genres', 'genre'), ('titles', 'titles'),
+                    ('reviews', 'review'), ('comments', 'comments'),
+                )
+            ]
+        )
+        counts = Dataset(seed=3, **SIZES).counts()
+        assert User.objects.count() == counts['users']
+        assert Title.objects.count() == counts['titles']
+        assert GenreTitle.objects.count() == counts['genre_title']
+        assert Review.objects.count() == counts['review']
+        assert Comment.objects.count() == counts['comments']
+        assert 'comments: ' in capsys.readouterr().out
+
+        reviewed = Title.objects.annotate(
+            n=Count('reviews')
+        ).filter(n__gt=0)
+        assert all(
+            title.reviews_count == title.n and title.rating is not None
+            for title in reviewed
+        ), 'Проверьте, что рейтинги пересчитываются после загрузки'
+
+    def test_dry_run(self, capsys):
+        from reviews.models import User
+
+        call_command('generate_dataset', '--scale', '0.01', '--dry-run')
+        assert User.objects.count() == 0
+        assert 'users: 100' in capsys.readouterr().out
@@ -0,0 +1,147 @@
+import datetime as dt
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def ranked_catalog(catalog, django_user_model):
+    """
+    Title 0 keeps the mixed reviews of the catalog, moved out of the
+    trending window; title 1 gets a single 10, title 2 twelve 9s.
+    """
+    from reviews import leaderboards
+    from reviews.models import Review, Title
+
+    titles = list(Title.objects.order_by('id')[:3])
+    Review.objects.update(pub_date=timezone.now() - dt.timedelta(days=30))
+    users = django_user_model.objects.exclude(username='TestAdmin')
+    Review.objects.create(
+        title=titles[1], author=users[0], text='Шедевр', score=10
+    )
+    for author in users:
+        Review.objects.create(
+            title=titles[2], author=author, text='Отлично', score=9
+        )
+    leaderboards.refresh()
+    return titles
+
+
+def ranked_ids(board, scope='all', scope_id=0):
+    from reviews.models import TitleRanking
+
+    return list(TitleRanking.objects.filter(
+        board=board, scope=scope, scope_id=scope_id
+    ).values_list('title_id', flat=True))
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_top_weights_scores_by_confidence(self, ranked_catalog):
+        first, single_ten, nines = (title.id for title in ranked_catalog)
+
+        assert ranked_ids('top') == [nines, single_ten, first], (
+            'Проверьте, что одна высокая оценка не поднимает произведение '
+            'выше многих оценок чуть ниже'
+        )
+
+    def test_category_and_genre_boards(self, ranked_catalog):
+        first, single_ten, nines = (title.id for title in ranked_catalog)
+        category = ranked_catalog[1].category_id
+        genres = {
+            genre.slug: genre.id for genre in ranked_catalog[2].genre.all()
+        }
+
+        assert ranked_ids('top', 'category', category) == [single_ten]
+        assert ranked_ids('top', 'genre', genres['genre-2']) == [
+            nines, single_ten, first
+        ]
+        assert ranked_ids('top', 'genre', genres['genre-3']) == [
+            nines, single_ten
+        ]
+
+    def test_trending_counts_recent_reviews(self, ranked_catalog):
+        _, single_ten, nines = (title.id for title in ranked_catalog)
+
+        assert ranked_ids('trending') == [nines, single_ten]
+
+    def test_refresh_replaces_board(self, ranked_catalog, settings):
+        from reviews import leaderboards
+        from reviews.models import TitleRanking
+
+        settings.LEADERBOARD_SIZE = 1
+        counts = leaderboards.refresh(['trending'])
+
+        assert ranked_ids('trending') == [ranked_catalog[2].id]
+        assert counts == {
+            'trending': TitleRanking.objects.filter(board='trending').count()
+        }
+        assert len(ranked_ids('top')) == 3
+
+    def test_command(self, ranked_catalog, capsys):
+        call_command('refresh_leaderboards', '--board', 'top')
+
+        assert 'top' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+class TestLeaderboardEndpoint:
+    url = '/api/v1/leaderboards/'
+
+    def get(self, url):
+        response = APIClient().get(url)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_pages_by_position(self, ranked_catalog, monkeypatch):
+        from api.pagination import PositionCursorPagination
+
+        monkeypatch.setattr(PositionCursorPagination, 'page_size', 1)
+        url, items, queries = f'{self.url}top/', [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                page = self.get(url)
+            items += page['results']
+            queries.append(len(captured))
+            url = page['next']
+
+        assert [item['position'] for item in items] == [1, 2, 3]
+        assert [item['id'] for item in items] == [
+            ranked_catalog[2].id, ranked_catalog[1].id, ranked_catalog[0].id
+        ]
+        assert items[0]['score'] > items[1]['score'] > items[2]['score']
+        assert items[0]['genre'] and items[0]['category']
+        assert len(set(queries)) == 1, (
+            'Проверьте, что страница рейтинга читается одинаковым числом '
+            'запросов'
+        )
+
+    def test_scopes_and_fields(self, ranked_catalog):
+        data = self.get(
+            f'{self.url}trending/?genre=genre-3&fields=position,name'
+        )
+
+        assert data['results'] == [
+            {'position': 1, 'name': ranked_catalog[2].name},
+            {'position': 2, 'name': ranked_catalog[1].name},
+        ]
+        assert self.get(f'{self.url}top/?category=missing')['results'] == []
+        assert APIClient().get(
+            f'{self.url}top/?category=category-0&genre=genre-0'
+        ).status_code == 400
+        assert APIClient().get(f'{self.url}best/').status_code == 404
+
+    def test_refresh_invalidates_cached_responses(self, ranked_catalog,
+                                                  settings):
+        from reviews import leaderboards
+
+        assert len(self.get(f'{self.url}top/')['results']) == 3
+        settings.LEADERBOARD_SIZE = 1
+        leaderboards.refresh()
+
+        assert len(self.get(f'{self.url}top/')['results']) == 1
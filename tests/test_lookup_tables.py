@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def lookup_queries(queries):
+    """Queries looking rows up by slug."""
+    return [
+        query['sql'] for query in queries.captured_queries
+        if '"slug" = ' in query['sql'] or '"slug" IN ' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestLookupTables:
+
+    @pytest.fixture
+    def client(self, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        # A token header keeps the response cache out of the way.
+        client.credentials(HTTP_AUTHORIZATION='Bearer admin')
+        return client
+
+    def create_title(self, client, catalog, genres):
+        return client.post('/api/v1/titles/', {
+            'name': 'Новое', 'year': 2001, 'description': 'Описание',
+            'category': catalog['category'].slug, 'genre': genres,
+        })
+
+    def test_slugs_resolve_without_queries(self, client, catalog):
+        genres = [f'genre-{i}' for i in range(5)]
+        self.create_title(client, catalog, genres[:1])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_title(client, catalog, genres)
+
+        assert response.status_code == 201
+        assert response.json()['genre'] == genres
+        assert lookup_queries(queries) == [], (
+            'Проверьте, что slug категории и жанров не ищутся в базе'
+        )
+
+    def test_unknown_slug(self, client, catalog):
+        response = self.create_title(client, catalog, ['genre-0', 'missing'])
+
+        assert response.status_code == 400
+        assert 'missing' in response.json()['genre'][0]
+
+    def test_version_bump_reloads_the_table(self, client, catalog):
+        from api.cache import bump_version
+        from reviews.models import Genre
+
+        assert client.get('/api/v1/genres/').json()['count'] == 12
+        # Another worker's write: no signals here, only its version bump.
+        Genre.objects.bulk_create([Genre(name='Новый', slug='new')])
+        assert client.get('/api/v1/genres/').json()['count'] == 12
+        assert self.create_title(client, catalog, ['new']).status_code == 400
+
+        bump_version('reviews.Genre')
+
+        assert client.get('/api/v1/genres/').json()['count'] == 13
+        assert self.create_title(client, catalog, ['new']).status_code == 201
+
+    def test_list_without_queries(self, client, catalog):
+        client.get('/api/v1/categories/?page=2')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/categories/?page=2')
+
+        assert response.status_code == 200
+        assert [item['slug'] for item in response.json()['results']] == [
+            f'category-{i}' for i in range(5, 10)
+        ]
+        assert len(queries) == 0
+
+    def test_search_and_filters(self, client, catalog):
+        found = client.get('/api/v1/genres/?search=Жанр 1').json()
+        titles = client.get('/api/v1/titles/?genre=genre-0').json()
+        missing = client.get('/api/v1/titles/?category=missing').json()
+
+        assert {item['slug'] for item in found['results']} == {
+            'genre-1', 'genre-10', 'genre-11'
+        }
+        assert titles['count'] == 3
+        assert missing['count'] == 0
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import subprocess
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+LIST_URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def scrape(settings):
+    settings.METRICS_TOKEN = 'secret'
+
+    def scrape(client):
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+        return response
+    return scrape
+
+
+def server_timing(response):
+    return dict(
+        re.match(r'(\w+);dur=([\d.]+)', part.strip()).groups()
+        for part in response['Server-Timing'].split(',')
+    )
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_server_timing_header(self, client, title):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(LIST_URL)
+        assert response.status_code == 200
+        assert f'desc="{len(queries)} queries"' in response['Server-Timing']
+        timing = server_timing(response)
+        assert set(timing) == {'db', 'serialize', 'render', 'total'}
+        assert float(timing['serialize']) > 0
+        assert float(timing['render']) > 0
+        assert float(timing['total']) >= float(timing['db'])
+
+    def test_metrics_endpoint(self, client, title, scrape):
+        client.get(LIST_URL)
+        client.get(LIST_URL)
+        response = scrape(client)
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert (
+            'yamdb_requests_total{view="api:titles-list",method="GET",'
+            'status="200"} 2'
+        ) in text
+        labels = '{view="api:titles-list",method="GET"'
+        assert f'yamdb_request_duration_seconds_count{labels}}} 2' in text
+        assert (
+            f'yamdb_request_duration_seconds_bucket{labels},le="+Inf"}} 2'
+        ) in text
+        assert f'yamdb_response_size_bytes_count{labels}}} 2' in text
+
+    def test_unsampled_requests_are_only_counted(self, client, settings,
+                                                 title, scrape):
+        settings.METRICS_SAMPLE_RATE = 0
+        response = client.get(LIST_URL)
+        assert 'Server-Timing' not in response
+        text = scrape(client).content.decode()
+        assert (
+            'yamdb_requests_total{view="api:titles-list",method="GET",'
+            'status="200"} 1'
+        ) in text
+        assert 'yamdb_request_duration_seconds_count{view="api:titles' \
+            not in text
+
+    def test_token(self, settings):
+        client = APIClient()
+        assert client.get('/metrics').status_code == 403, (
+            'Проверьте, что без METRICS_TOKEN метрики закрыты'
+        )
+        settings.METRICS_TOKEN = 'secret'
+        assert client.get('/metrics').status_code == 403
+        client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        assert client.get('/metrics').status_code == 200
+
+    def test_workers_are_merged(self, client, settings, tmp_path, scrape):
+        settings.METRICS_DIR = str(tmp_path)
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+        for pid, count in ((os.getppid(), 3), (exited.pid, 5)):
+            (tmp_path / f'{pid}.json').write_text(json.dumps([[
+                'yamdb_requests_total', ['api:genres-list', 'GET', '200'],
+                [count]
+            ]]))
+        client.get('/api/v1/genres/')
+        text = scrape(client).content.decode()
+        assert (
+            'yamdb_requests_total{view="api:genres-list",method="GET",'
+            'status="200"} 4'
+        ) in text
+        assert not (tmp_path / f'{exited.pid}.json').exists(), (
+            'Проверьте, что файлы завершившихся воркеров удаляются'
+        )
@@ -0,0 +1,39 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert 'count' not in response.data, (
+                'Проверьте, что в режиме курсора не считается `count`'
+            )
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_walks_all_reviews(self, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        ids = self.walk(APIClient(), f'{url}?cursor=')
+
+        assert ids == list(
+            title.reviews.order_by('id').values_list('id', flat=True)
+        ), 'Проверьте, что курсоры обходят все отзывы по порядку без повторов'
+
+    def test_page_number_mode_is_default(self, catalog):
+        response = APIClient().get('/api/v1/titles/?page=2')
+
+        assert response.status_code == 200
+        assert response.data['count'] == 12
+        assert 'page=3' in response.data['next']
+
+    def test_invalid_cursor(self, catalog):
+        response = APIClient().get('/api/v1/titles/?cursor=garbage')
+
+        assert response.status_code == 404
@@ -0,0 +1,64 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+# Query budget of every read endpoint, counted with a forced login so that
+# authentication itself does not touch the database. Lists are checked on
+# a catalog several pages long: a budget that only holds for tiny pages
+# hides an N+1 query. Reviews and comments include the ETag stamp query.
+QUERY_BUDGETS = {
+    '/api/v1/titles/': 3,
+    '/api/v1/titles/{title}/': 2,
+    '/api/v1/titles/?cursor=': 2,
+    '/api/v1/categories/': 2,
+    '/api/v1/genres/': 2,
+    '/api/v1/titles/{title}/reviews/': 4,
+    '/api/v1/titles/{title}/reviews/{review}/': 3,
+    '/api/v1/titles/{title}/reviews/?cursor=': 3,
+    '/api/v1/titles/{title}/reviews/{review}/comments/': 4,
+    '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/': 3,
+    '/api/v1/titles/{title}/reviews/{review}/comments/?cursor=': 3,
+    '/api/v1/users/': 2,
+    '/api/v1/users/{username}/': 1,
+    '/api/v1/users/me/': 0,
+}
+
+
+def format_url(url, catalog):
+    return url.format(
+        title=catalog['title'].id,
+        review=catalog['review'].id,
+        comment=catalog['comment'].id,
+        username=catalog['user'].username,
+    )
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('url', QUERY_BUDGETS)
+    def test_read_endpoint_query_budget(self, url, catalog, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        formatted_url = format_url(url, catalog)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(formatted_url)
+
+        assert response.status_code == 200, (
+            f'Эндпоинт `{formatted_url}` вернул {response.status_code}'
+        )
+        executed = '\n'.join(query['sql'] for query in queries)
+        assert len(queries) <= QUERY_BUDGETS[url], (
+            f'Эндпоинт `{url}` выполнил {len(queries)} запросов к БД '
+            f'при бюджете {QUERY_BUDGETS[url]}:\n{executed}'
+        )
+
+    def test_benchmark_command(self, catalog, capsys):
+        call_command('bench_queries', '--repeat', '1')
+
+        output = capsys.readouterr().out
+        assert '/api/v1/titles/' in output
+        assert 'queries' in output
@@ -0,0 +1,97 @@
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """A second, empty SQLite database standing in for a lagging replica."""
+    connections.databases['replica'] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    connections.ensure_defaults('replica')
+    connections.prepare_test_settings('replica')
+    call_command('migrate', database='replica', verbosity=0)
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.REPLICA_STICKY_SECONDS = 60
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouter:
+
+    def test_safe_requests_read_from_replica(self, replica, title, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.credentials(HTTP_AUTHORIZATION='Bearer reader')
+        assert client.get(
+            f'/api/v1/titles/{title.id}/reviews/'
+        ).status_code == 404, 'Проверьте, что чтение отзывов идёт с реплики'
+        assert client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'someone', 'email': 'someone@yamdb.fake'}
+        ).status_code == 200
+
+    def test_version_etags_come_with_primary_reads(self, replica, title,
+                                                   admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.credentials(HTTP_AUTHORIZATION='Bearer reader')
+        response = client.get('/api/v1/titles/')
+
+        assert [item['name'] for item in response.json()['results']] == [
+            title.name
+        ], (
+            'Проверьте, что тело ответа с ETag по счётчикам версий читается '
+            'из основной базы, как и сами счётчики'
+        )
+        assert response.has_header('ETag')
+
+    def test_cached_responses_are_built_on_primary(self, replica, title):
+        assert [
+            item['name']
+            for item in APIClient().get('/api/v1/titles/').json()['results']
+        ] == [title.name], (
+            'Проверьте, что ответы для кэша читаются из основной базы'
+        )
+
+    def test_anonymous_writers_are_pinned_by_cookie(self, replica, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        writer = APIClient(REMOTE_ADDR='10.0.0.1')
+        response = writer.post(
+            '/api/v1/auth/signup/',
+            {'username': 'someone', 'email': 'someone@yamdb.fake'}
+        )
+        assert 'replica_pin' in response.cookies
+
+        assert writer.get(url).status_code == 200
+        assert APIClient(REMOTE_ADDR='10.0.0.1').get(url).status_code == 404, (
+            'Проверьте, что запись одного анонимного клиента не привязывает '
+            'к основной базе других клиентов с тем же адресом'
+        )
+
+    def test_writers_stick_to_primary(self, replica, admin, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        writer = APIClient()
+        writer.force_authenticate(admin)
+        writer.credentials(HTTP_AUTHORIZATION='Bearer writer')
+        response = writer.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+
+        assert [
+            review['text'] for review in writer.get(url).json()['results']
+        ] == ['Отзыв'], 'Проверьте, что автор изменений читает их с мастера'
+        reader = APIClient()
+        reader.force_authenticate(admin)
+        reader.credentials(HTTP_AUTHORIZATION='Bearer reader')
+        assert reader.get(url).status_code == 404
+
+    def test_without_replicas_everything_reads_primary(self, category):
+        response = APIClient().get('/api/v1/categories/')
+        assert response.json()['results'][0]['slug'] == category.slug
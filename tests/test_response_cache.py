@@ -0,0 +1,118 @@
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/?page=2',
+        '/api/v1/categories/',
+        '/api/v1/genres/',
+    ))
+    def test_anonymous_read_is_cached(self, url, catalog):
+        client = APIClient()
+        first = client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+        assert second['Content-Type'] == first['Content-Type']
+        assert len(queries) == 0, (
+            'Проверьте, что ответ из кэша не обращается к БД'
+        )
+
+    def test_query_string_is_normalized(self, catalog):
+        client = APIClient()
+        client.get('/api/v1/titles/?year_min=2000&page=2')
+        response = client.get('/api/v1/titles/?page=2&year_min=2000')
+
+        assert response['X-Cache'] == 'HIT'
+
+    def test_writes_invalidate_dependent_responses(self, catalog, admin):
+        from reviews.models import Review
+
+        client = APIClient()
+        url = f'/api/v1/titles/{catalog["title"].id}/'
+        client.get(url)
+        client.get('/api/v1/genres/')
+        Review.objects.filter(pk=catalog['review'].pk).delete()
+
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение отзыва сбрасывает кэш произведений'
+        )
+        assert response.data['rating'] == 5
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(admin)
+        admin_client.patch(url, {'genre': ['genre-5']})
+        assert client.get(url).data['genre'] == [
+            {'name': 'Жанр 5', 'slug': 'genre-5'}
+        ]
+
+    def test_version_is_bumped_again_on_commit(
+            self, django_capture_on_commit_callbacks):
+        from api.cache import get_versions
+        from reviews.models import Genre
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            Genre.objects.create(name='Драма', slug='drama')
+            [written] = get_versions(['reviews.Genre'])
+        for callback in callbacks:
+            callback()
+
+        assert get_versions(['reviews.Genre'])[0] > written, (
+            'Проверьте, что версия увеличивается и после коммита'
+        )
+
+    def test_authenticated_requests_bypass_cache(self, catalog):
+        client = APIClient(HTTP_AUTHORIZATION='Bearer invalid')
+        response = client.get('/api/v1/categories/')
+
+        assert response.status_code == 401
+        assert not response.has_header('X-Cache')
+
+
+def test_file_cache_increments_are_atomic(tmp_path):
+    from api.cache_backends import AtomicFileBasedCache
+
+    def bump(_):
+        # A cache object per worker, like separate processes.
+        cache = AtomicFileBasedCache(str(tmp_path), {})
+        for _ in range(25):
+            cache.incr('version')
+
+    AtomicFileBasedCache(str(tmp_path), {}).set('version', 0)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(bump, range(8)))
+
+    assert AtomicFileBasedCache(str(tmp_path), {}).get('version') == 200
+
+
+def test_file_cache_increments_keep_expiry(tmp_path):
+    from api.cache_backends import AtomicFileBasedCache
+
+    cache = AtomicFileBasedCache(str(tmp_path), {'TIMEOUT': 300})
+    cache.set('version', 1, timeout=None)
+    cache.set('counter', 1, timeout=60)
+    assert (cache.incr('version'), cache.incr('counter')) == (2, 2)
+
+    with open(cache._key_to_file('version'), 'rb') as fp:
+        assert pickle.load(fp) is None, (
+            'Проверьте, что счётчик версий без срока хранения не получает '
+            'срок при увеличении'
+        )
+    with open(cache._key_to_file('counter'), 'rb') as fp:
+        assert pickle.load(fp) - time.time() <= 60
+    with pytest.raises(ValueError):
+        cache.incr('missing')
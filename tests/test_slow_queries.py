@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+STATUS_URL = '/api/v1/status/slow-queries/'
+
+
+@pytest.fixture
+def capture_all(settings, tmp_path):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    settings.SLOW_QUERY_LOG = {
+        'PATH': str(tmp_path / 'slow.log'), 'BACKUP_COUNT': 1,
+    }
+    return tmp_path / 'slow.log'
+
+
+def title_selects(captures):
+    return [
+        capture for capture in captures
+        if capture['view'] == 'api:titles-list'
+        and 'FROM "reviews_title"' in capture['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestSlowQueries:
+
+    def test_nothing_captured_without_threshold(self, client,
+                                                slow_query_buffer, title):
+        client.get('/api/v1/titles/')
+        assert slow_query_buffer.latest() == []
+
+    def test_capture(self, client, capture_all, slow_query_buffer, title):
+        client.get('/api/v1/titles/', {'year': 2000})
+        captures = title_selects(slow_query_buffer.latest())
+        assert captures, 'Проверьте, что медленные запросы сохраняются'
+        capture = captures[0]
+        assert capture['path'] == '/api/v1/titles/'
+        assert '2000' in capture['params']
+        assert capture['plan'], 'Проверьте, что план запроса сохраняется'
+        assert not capture['plan'].startswith('EXPLAIN failed')
+        assert capture['stack']
+        assert all(
+            not frame.startswith('/') for frame in capture['stack']
+        )
+
+        logged = [
+            json.loads(line)
+            for line in capture_all.read_text(encoding='utf-8').splitlines()
+        ]
+        assert title_selects(logged)
+
+    def test_user_queries_are_redacted(self, capture_all, slow_query_buffer):
+        APIClient().post('/api/v1/auth/signup/', {
+            'username': 'someone', 'email': 'someone@yamdb.fake'
+        })
+        captures = [
+            capture for capture in slow_query_buffer.latest()
+            if '"reviews_user"' in capture['sql']
+        ]
+
+        assert captures
+        assert 'someone' not in json.dumps(captures), (
+            'Проверьте, что параметры запросов к пользователям не сохраняются'
+        )
+        assert all(capture['plan'] is None for capture in captures)
+        assert capture_all.exists()
+        assert 'someone@yamdb.fake' not in capture_all.read_text(
+            encoding='utf-8'
+        )
+
+    def test_writes_are_not_explained(self, capture_all, slow_query_buffer,
+                                      category):
+        category.name = 'Кино'
+        category.save()
+        updates = [
+            capture for capture in slow_query_buffer.latest()
+            if capture['sql'].startswith('UPDATE')
+        ]
+        assert updates and updates[0]['plan'] is None
+        assert updates[0]['view'] is None
+
+    def test_admin_endpoint(self, admin, user, capture_all, title):
+        client = APIClient()
+        client.force_authenticate(user)
+        assert client.get(STATUS_URL).status_code == 403
+
+        client.force_authenticate(admin)
+        client.get('/api/v1/titles/')
+        response = client.get(STATUS_URL, {'limit': 3})
+        assert response.status_code == 200
+        assert response.json()['threshold_ms'] == 0
+        assert len(response.json()['queries']) == 3
+
+        assert client.delete(STATUS_URL).status_code == 204
+        assert response.json()['queries'] != client.get(
+            STATUS_URL
+        ).json()['queries']
+
+    def test_command(self, client, capsys, capture_all, title):
+        client.get('/api/v1/titles/')
+        call_command('slow_queries', '--view', 'api:titles-list')
+        output = capsys.readouterr().out
+        assert 'api:titles-list' in output
+        assert 'FROM "reviews_title"' in output
+        assert 'plan:' in output
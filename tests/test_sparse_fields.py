@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def get(self, url, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200, response.content
+        sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+        return response.json(), sql, len(queries)
+
+    def test_title_list_fields(self, catalog):
+        data, sql, count = self.get('/api/v1/titles/?fields=id,name,rating')
+
+        assert [list(item) for item in data['results']] == [
+            ['id', 'name', 'rating']
+        ] * len(data['results'])
+        assert '"reviews_title"."description"' not in sql
+        assert 'reviews_genre' not in sql and 'reviews_category' not in sql
+        assert count == 2, (
+            'Проверьте, что без поля genre жанры не запрашиваются'
+        )
+
+    def test_title_detail_exclude(self, catalog):
+        data, sql, count = self.get(
+            f'/api/v1/titles/{catalog["title"].id}/'
+            '?exclude=description,genre'
+        )
+
+        assert list(data) == ['id', 'name', 'year', 'rating', 'category']
+        assert '"reviews_title"."description"' not in sql
+        assert 'reviews_genre' not in sql
+        assert count == 1
+
+    def test_review_list_without_text(self, catalog):
+        title = catalog['title']
+        data, sql, _ = self.get(
+            f'/api/v1/titles/{title.id}/reviews/?exclude=text,author'
+        )
+
+        assert list(data['results'][0]) == ['id', 'score', 'pub_date']
+        assert '"reviews_review"."text"' not in sql
+        assert 'reviews_user' not in sql
+
+    def test_comment_detail_fields(self, catalog):
+        comment = catalog['comment']
+        data, sql, _ = self.get(
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/{comment.id}/?fields=author'
+        )
+
+        assert data == {'author': comment.author.username}
+        assert '"reviews_comment"."text"' not in sql
+
+    def test_other_endpoints(self, catalog, admin):
+        categories, _, _ = self.get('/api/v1/categories/?fields=slug')
+        profile, _, _ = self.get('/api/v1/users/me/?fields=username', admin)
+        users, sql, _ = self.get('/api/v1/users/?exclude=bio', admin)
+
+        assert list(categories['results'][0]) == ['slug']
+        assert profile == {'username': admin.username}
+        assert 'bio' not in users['results'][0]
+        assert '"reviews_user"."bio"' not in sql
+
+    def test_unknown_field(self, catalog):
+        response = APIClient().get('/api/v1/titles/?fields=id,price')
+
+        assert response.status_code == 400
+        assert 'price' in response.json()['fields'][0]
+
+    def test_writes_show_all_fields(self, catalog, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.post('/api/v1/titles/?fields=id', {
+            'name': 'Новое', 'year': 2001, 'description': 'Описание',
+            'category': catalog['category'].slug,
+            'genre': [catalog['genre'].slug],
+        })
+
+        assert response.status_code == 201
+        assert 'description' in response.json()
@@ -0,0 +1,154 @@
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def get_token(user):
+    user.confirmation_code = 'code'
+    user.save()
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username, 'confirmation_code': 'code'
+    })
+    assert response.status_code == 201
+    return response.json()['token']
+
+
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def user_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if 'reviews_user' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestStatelessAuth:
+
+    def test_authenticated_request_skips_user_lookup(self, catalog, user):
+        client = token_client(get_token(user))
+        client.get('/api/v1/titles/')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/')
+
+        assert response.status_code == 200
+        assert user_queries(queries) == [], (
+            'Проверьте, что аутентификация по токену не загружает пользователя'
+        )
+
+    def test_role_claims_drive_permissions(self, admin, user):
+        assert token_client(get_token(admin)).get(
+            '/api/v1/users/'
+        ).status_code == 200
+        assert token_client(get_token(user)).get(
+            '/api/v1/users/'
+        ).status_code == 403
+
+    def test_writes_and_profile_use_the_user_row(self, title, user):
+        client = token_client(get_token(user))
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        response = client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        review_url = f'{url}{response.json()["id"]}/'
+        assert client.patch(review_url, {'text': 'Правка'}).status_code == 200
+        assert client.post(url, {'text': 'Ещё', 'score': 7}).status_code == 400
+        assert client.get('/api/v1/users/me/').json()['email'] == user.email
+
+    @pytest.mark.parametrize('change', ['role', 'deactivate', 'delete'])
+    def test_user_changes_revoke_tokens(self, user, change):
+        client = token_client(get_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        if change == 'role':
+            user.role = 'admin'
+            user.save()
+        elif change == 'deactivate':
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+        else:
+            user.delete()
+
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_profile_edit_keeps_token(self, user):
+        client = token_client(get_token(user))
+        response = client.patch('/api/v1/users/me/', {'bio': 'О себе'})
+
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+    def test_revoke_tokens_command(self, user):
+        client = token_client(get_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        call_command('revoke_tokens', user.username)
+
+        assert client.get('/api/v1/users/me/').status_code == 401
+        user.refresh_from_db()
+        assert token_client(get_token(user)).get(
+            '/api/v1/users/me/'
+        ).status_code == 200
+
+    def test_revocation_wins_over_stale_versions(
+        self, user, django_capture_on_commit_callbacks
+    ):
+        from api.authentication import (TOKEN_VERSION_KEY, get_versions_cache,
+                                        revoke_tokens)
+        from django.db import transaction
+        from reviews.models import User
+
+        client = token_client(get_token(user))
+        key = TOKEN_VERSION_KEY.format(user.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                revoke_tokens(User.objects.filter(pk=user.pk))
+                # A request that read the version before the commit.
+                get_versions_cache().set(key, user.token_version)
+
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что версия токена сбрасывается после коммита'
+        )
+
+    def test_token_versions_expire(self, user, settings):
+        from api.authentication import (TOKEN_VERSION_KEY, get_token_version,
+                                        get_versions_cache)
+
+        settings.JWT_TOKEN_VERSION_TIMEOUT = 60
+        get_token_version(user.pk)
+        cache = get_versions_cache()
+        expires = cache._expire_info[
+            cache.make_key(TOKEN_VERSION_KEY.format(user.pk))
+        ]
+
+        assert expires is not None and expires - time.time() <= 60, (
+            'Проверьте, что версия токена кэшируется на ограниченное время'
+        )
+
+    def test_tokens_without_claims_are_still_accepted(self, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client = token_client(str(AccessToken.for_user(user)))
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+    def test_token_cache_is_bounded(self):
+        from api.authentication import TokenLRU
+
+        tokens = TokenLRU(maxsize=2)
+        for raw in (b'a.b.1', b'a.b.2', b'a.b.3'):
+            tokens.put(raw, type('Token', (), {'token': raw}))
+
+        assert len(tokens) == 2
+        assert tokens.get(b'a.b.1') is None
+        assert tokens.get(b'a.b.3').token == b'a.b.3'
+        assert tokens.get(b'forged.payload.3') is None
@@ -0,0 +1,133 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'auth': '2/min', 'writes': '3/min', 'anon_reads': '4/min',
+        },
+    }
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_auth_scope_is_per_address(self, rates):
+        signup = APIClient().post
+        data = {'username': 'someone', 'email': 'someone@yamdb.fake'}
+        for _ in range(2):
+            assert signup('/api/v1/auth/signup/', data).status_code == 200
+
+        with CaptureQueriesContext(connection) as queries:
+            response = signup('/api/v1/auth/signup/', data)
+
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+        assert len(queries) == 0, (
+            'Проверьте, что отклонённый запрос не обращается к базе данных'
+        )
+        assert APIClient(REMOTE_ADDR='10.0.0.2').post(
+            '/api/v1/auth/token/', {'username': 'someone'}
+        ).status_code == 400
+
+    def test_forwarded_for_cannot_be_spoofed(self, rates):
+        data = {'username': 'someone', 'email': 'someone@yamdb.fake'}
+        statuses = [
+            APIClient(
+                HTTP_X_FORWARDED_FOR=f'10.1.1.{i}, 192.0.2.1'
+            ).post('/api/v1/auth/signup/', data).status_code
+            for i in range(3)
+        ]
+
+        assert statuses == [200, 200, 429], (
+            'Проверьте, что адрес клиента берётся из записи, добавленной '
+            'nginx, а не из подставленных клиентом'
+        )
+        assert APIClient(
+            HTTP_X_FORWARDED_FOR='192.0.2.1, 192.0.2.2'
+        ).post('/api/v1/auth/signup/', data).status_code == 200
+
+    def test_anonymous_reads_including_cached_ones(self, rates, catalog):
+        client = APIClient()
+        statuses = [
+            client.get('/api/v1/categories/').status_code for _ in range(5)
+        ]
+
+        assert statuses == [200, 200, 200, 200, 429]
+
+    def test_cached_reads_use_api_authentication(self, rates, catalog,
+                                                 admin):
+        client = APIClient()
+        # A session is not an API credential: the client reads anonymously.
+        client.force_login(admin)
+        statuses = [
+            client.get('/api/v1/categories/').status_code for _ in range(5)
+        ]
+
+        assert statuses == [200, 200, 200, 200, 429], (
+            'Проверьте, что ответы из кэша ограничиваются по клиенту, '
+            'каким его видит аутентификация API'
+        )
+
+    def test_writes_are_per_user(self, rates, catalog, user):
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        review_url = f'{url}{catalog["review"].id}/'
+        client = APIClient()
+        client.force_authenticate(catalog['user'])
+        statuses = [
+            client.patch(review_url, {'text': f'Правка {i}'}).status_code
+            for i in range(4)
+        ]
+        assert statuses == [200, 200, 200, 429]
+        assert client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается лимитом на запись'
+        )
+
+        other = APIClient()
+        other.force_authenticate(user)
+        assert other.post(url, {'text': 'Отзыв', 'score': 5}).status_code == 201
+
+
+class TestCounterStores:
+
+    @pytest.mark.parametrize('store_name', ['local', 'file', 'cache'])
+    def test_sliding_window(self, store_name, tmp_path, monkeypatch):
+        from api import throttling
+
+        store = {
+            'local': lambda: throttling.LocalCounterStore(),
+            'file': lambda: throttling.FileCounterStore(tmp_path, shards=2),
+            'cache': lambda: throttling.CacheCounterStore(),
+        }[store_name]()
+        store.clear()
+        now = 1000 * 60 + 30
+        monkeypatch.setattr(throttling.time, 'time', lambda: now)
+
+        assert [store.hit('key', 4, 60)[0] for _ in range(5)] == [
+            True, True, True, True, False
+        ]
+        assert store.hit('other', 4, 60)[0]
+
+        # Half a window later half of the previous window still counts.
+        now += 60
+        allowed, wait = store.hit('key', 4, 60)
+        assert allowed
+        assert [store.hit('key', 4, 60)[0] for _ in range(2)] == [True, False]
+
+        now += 120
+        assert store.hit('key', 4, 60)[0]
+
+    def test_file_store_is_shared(self, tmp_path):
+        from api.throttling import FileCounterStore
+
+        first = FileCounterStore(tmp_path)
+        second = FileCounterStore(tmp_path)
+        assert first.hit('key', 1, 60)[0]
+        allowed, wait = second.hit('key', 1, 60)
+        assert not allowed
+        assert 0 < wait <= 60
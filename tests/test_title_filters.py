@@ -0,0 +1,54 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+def names(response):
+    assert response.status_code == 200
+    return [title['name'] for title in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self, category):
+        from reviews.models import Title
+        Title.objects.create(
+            name='Война и мир', year=1869, description='Роман-эпопея',
+            category=category
+        )
+        Title.objects.create(
+            name='Мир', year=2000, description='Фильм о войне'
+        )
+        Title.objects.create(
+            name='Гарри Поттер', year=2001, description='Мир магии'
+        )
+
+    def test_exact_and_range_filters(self, titles):
+        client = APIClient()
+
+        assert names(client.get(self.url, {'year': 2000})) == ['Мир']
+        assert names(client.get(self.url, {'year_min': 1900})) == [
+            'Мир', 'Гарри Поттер'
+        ]
+        assert names(client.get(self.url, {'year_max': 2000})) == [
+            'Война и мир', 'Мир'
+        ]
+        assert names(client.get(self.url, {'category': 'films'})) == [
+            'Война и мир'
+        ]
+        assert names(client.get(self.url, {'category': 'film'})) == [], (
+            'Проверьте, что фильтр по категории сравнивает slug целиком'
+        )
+
+    def test_search_ranks_name_matches_first(self, titles):
+        found = names(APIClient().get(self.url, {'search': 'мир'}))
+
+        assert set(found) == {'Война и мир', 'Мир', 'Гарри Поттер'}
+        assert found[-1] == 'Гарри Поттер', (
+            'Проверьте, что совпадения в названии выше совпадений в описании'
+        )
+        assert names(APIClient().get(self.url, {'search': 'войн'})) == [
+            'Война и мир', 'Мир'
+        ]
@@ -0,0 +1,56 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def rating_of(title):
+    title.refresh_from_db()
+    return title.rating, title.reviews_count, title.score_sum
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_review_changes(self, title, user, another_user):
+        from reviews.models import Review
+
+        assert rating_of(title) == (None, 0, 0), (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='Текст', score=7
+        )
+        Review.objects.create(
+            title=title, author=another_user, text='Текст', score=4
+        )
+        assert rating_of(title) == (5.5, 2, 11), (
+            'Проверьте, что рейтинг пересчитывается при создании отзыва'
+        )
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 10
+        review.save()
+        assert rating_of(title) == (7.0, 2, 14), (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки'
+        )
+
+        review.delete()
+        assert rating_of(title) == (4.0, 1, 4), (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+        another_user.delete()
+        assert rating_of(title) == (None, 0, 0), (
+            'Проверьте, что рейтинг пересчитывается при каскадном удалении'
+        )
+
+    def test_recalculate_ratings_command(self, title, user):
+        from reviews.models import Review, Title
+
+        Review.objects.create(title=title, author=user, text='Текст', score=8)
+        Title.objects.update(score_sum=100, reviews_count=3)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+
+        call_command('recalculate_ratings')
+        assert rating_of(title) == (8.0, 1, 8)
+        call_command('recalculate_ratings', '--check')